@@ -3,46 +3,76 @@
 # PURPOSE: Flask application factory and initialization
 # ================================================
 import os
-import sys
+import threading
 from dotenv import load_dotenv
 from flask import Flask
 from flask_cors import CORS
-from supabase import create_client, Client
-from .config import logger  # Import the configured logger
 
-# Load environment variables from .env file
+# Load environment variables from .env file before the config module reads them
 load_dotenv()
 
-# Global Supabase client, initialized once
-supabase: Client = None
+from .config import logger  # Import the configured logger
+from .config import WARMUP_ON_START, SNAPSHOT_MODE, ROLLUP_MODE, NAME_INDEX_ENABLED
+
+# The Supabase client is created on first use; importing supabase alone takes a large share of startup
+_supabase_client = None
+_supabase_lock = threading.Lock()
 
 def init_supabase_client():
-    """Initializes and returns the Supabase client."""
-    global supabase
-    if supabase is None:
-        try:
-            url: str = os.environ.get("SUPABASE_URL")
-            key: str = os.environ.get("SUPABASE_KEY")
-            if not url or not key:
-                logger.critical("Supabase URL and Key must be set in the .env file.")
-                sys.exit(1)
-            supabase = create_client(url, key)
-            logger.success("Successfully connected to Supabase.")
-        except Exception as e:
-            logger.critical(f"Failed to connect to Supabase. Check credentials. Error: {e}")
-            sys.exit(1)
-    return supabase
-
-def create_app():
-    """Application factory function."""
+    """Creates the Supabase client on first use and returns it. Raises RuntimeError when it cannot be created."""
+    global _supabase_client
+    if _supabase_client is None:
+        with _supabase_lock:
+            if _supabase_client is None:
+                from supabase import create_client
+                url: str = os.environ.get("SUPABASE_URL")
+                key: str = os.environ.get("SUPABASE_KEY")
+                if not url or not key:
+                    logger.critical("Supabase URL and Key must be set in the .env file.")
+                    raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set.")
+                try:
+                    _supabase_client = create_client(url, key)
+                except Exception as e:
+                    logger.critical(f"Failed to connect to Supabase. Check credentials. Error: {e}")
+                    raise RuntimeError(f"Failed to create the Supabase client: {e}") from e
+                logger.success("Successfully connected to Supabase.")
+    return _supabase_client
+
+class _LazySupabaseClient:
+    """Stands in for the Supabase client, creating the real one on first attribute access."""
+
+    def __getattr__(self, name):
+        return getattr(init_supabase_client(), name)
+
+# Global Supabase client, initialized once on first use
+supabase = _LazySupabaseClient()
+
+def warm_up():
+    """
+    Pays the first request's one-off costs up front: imports the query modules, creates the
+    Supabase client and loads the snapshots, rollups and name index that are enabled. Run it
+    in each worker before it accepts traffic.
+    """
+    from .services import data_service
+    init_supabase_client()
+    if SNAPSHOT_MODE:
+        data_service.campaign_snapshot.get_frame()
+        data_service.target_snapshot.get_frame()
+        if ROLLUP_MODE:
+            data_service.campaign_rollups.ensure_built(data_service.campaign_snapshot.get_frame())
+    if NAME_INDEX_ENABLED:
+        data_service.name_index()
+    logger.success("Warm-up complete.")
+
+def create_app(warm: bool = None):
+    """Application factory function. warm runs warm_up() first; it defaults to WARMUP_ON_START."""
     app = Flask(__name__)
     CORS(app)
-    
-    # Initialize extensions
-    init_supabase_client()
 
     with app.app_context():
         # Import and register routes/blueprints
         from . import routes
-        
+
+    if WARMUP_ON_START if warm is None else warm:
+        warm_up()
     return app
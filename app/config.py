@@ -19,3 +19,73 @@ TARGET_VIEW_NAME = 'all_market_targets'
 NORDIC_COUNTRIES = ['Sweden', 'Norway', 'Denmark']
 HARDCODED_RATES = {"EUR": 1.0, "GBP": 0.85, "SEK": 11.30, "NOK": 11.50, "DKK": 7.46}
 MONTH_ORDER = {'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6, 'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12}
+
+# --- Snapshot Cache ---
+# When enabled, each view is loaded once into memory and filtered locally instead of per request
+SNAPSHOT_MODE = os.environ.get("SNAPSHOT_MODE", "False").lower() in ['true', '1']
+SNAPSHOT_TTL_SECONDS = int(os.environ.get("SNAPSHOT_TTL_SECONDS", 300))
+# With snapshots enabled, answer the summary, tier and monthly views from rollups of the campaign snapshot
+ROLLUP_MODE = os.environ.get("ROLLUP_MODE", "False").lower() in ['true', '1']
+# With snapshots enabled, keep them as Arrow files in this directory, memory-mapped by every worker
+# process (requires pyarrow). A worker reuses a file another worker refreshed within SNAPSHOT_TTL_SECONDS.
+SHARED_SNAPSHOT_DIR = os.environ.get("SHARED_SNAPSHOT_DIR")
+
+# --- Delta Sync ---
+# With snapshots enabled, refreshes fetch only rows whose watermark column is at or past the last
+# value seen, merging them by key; a full reload every DELTA_SYNC_RECONCILE_SECONDS picks up deletes
+DELTA_SYNC_ENABLED = os.environ.get("DELTA_SYNC_ENABLED", "False").lower() in ['true', '1']
+DELTA_SYNC_WATERMARK_COLUMN = os.environ.get("DELTA_SYNC_WATERMARK_COLUMN", "updated_at")
+DELTA_SYNC_KEY_COLUMNS = [col.strip() for col in os.environ.get("DELTA_SYNC_KEY_COLUMNS", "id").split(",") if col.strip()]
+DELTA_SYNC_RECONCILE_SECONDS = int(os.environ.get("DELTA_SYNC_RECONCILE_SECONDS", 3600))
+
+# --- Influencer Name Index ---
+# Profile lookups resolve the requested name to exact names through an in-memory index instead of
+# an ilike scan; queries matching more than NAME_INDEX_MAX_RESOLVED names keep the ilike filter.
+# The index is on by default only with snapshots, which already hold the names. Without them the
+# campaign view's name column is reloaded every NAME_INDEX_TTL_SECONDS.
+NAME_INDEX_ENABLED = os.environ.get("NAME_INDEX_ENABLED", str(SNAPSHOT_MODE)).lower() in ['true', '1']
+NAME_INDEX_TTL_SECONDS = int(os.environ.get("NAME_INDEX_TTL_SECONDS", 300))
+NAME_INDEX_MAX_RESOLVED = int(os.environ.get("NAME_INDEX_MAX_RESOLVED", 100))
+
+# --- Response Cache ---
+# Serialized query responses are cached per canonical payload, bounded by total size with LRU eviction
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "True").lower() in ['true', '1']
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+RESPONSE_CACHE_TTL_SECONDS = {
+    "dashboard": int(os.environ.get("RESPONSE_CACHE_DASHBOARD_TTL_SECONDS", 300)),
+    "influencer_analytics": int(os.environ.get("RESPONSE_CACHE_ANALYTICS_TTL_SECONDS", 120))
+}
+
+# --- Supabase Fetching ---
+# Views are read in pages of FETCH_PAGE_SIZE rows (keep it at or below the PostgREST max-rows cap),
+# with up to FETCH_MAX_WORKERS pages in flight. Every page is ordered by FETCH_ORDER_COLUMN, a unique
+# column of both views (their primary key, "id", by default): each range request is a separate query,
+# and without a unique order Postgres may return rows in a different order to each. With the column
+# set to "" a view that does not fit in one page is refused rather than read inconsistently.
+FETCH_PAGE_SIZE = int(os.environ.get("FETCH_PAGE_SIZE", 1000))
+FETCH_MAX_WORKERS = int(os.environ.get("FETCH_MAX_WORKERS", 4))
+FETCH_ORDER_COLUMN = os.environ.get("FETCH_ORDER_COLUMN", "id")
+
+# --- Streaming Responses ---
+# Rows per chunk written to NDJSON streams ("format": "ndjson")
+STREAM_CHUNK_ROWS = int(os.environ.get("STREAM_CHUNK_ROWS", 1000))
+
+# --- Batch Queries ---
+# Maximum sub-queries per /api/influencer/query/batch request, and how many are processed at once
+BATCH_MAX_QUERIES = int(os.environ.get("BATCH_MAX_QUERIES", 20))
+BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", 4))
+
+# --- Request Timing ---
+# Times fetch, coercion, currency conversion, aggregation and serialization per query request,
+# reported in a Server-Timing header and as Prometheus histograms on GET /metrics
+TIMING_ENABLED = os.environ.get("TIMING_ENABLED", "False").lower() in ['true', '1']
+
+# --- Request Coalescing ---
+# Concurrent requests with the same canonical payload share one computation; the requests that
+# join it give up with a 504 after COALESCE_TIMEOUT_SECONDS
+COALESCE_ENABLED = os.environ.get("COALESCE_ENABLED", "True").lower() in ['true', '1']
+COALESCE_TIMEOUT_SECONDS = float(os.environ.get("COALESCE_TIMEOUT_SECONDS", 30))
+
+# --- Startup ---
+# Run the warm-up (imports, Supabase client, snapshots, name index) before serving the first request
+WARMUP_ON_START = os.environ.get("WARMUP_ON_START", "False").lower() in ['true', '1']
@@ -0,0 +1,19 @@
+# ================================================
+# FILE: app/lazy.py
+# PURPOSE: Deferred imports of the heavy query modules
+# ================================================
+import importlib
+
+class LazyModule:
+    """
+    Stands in for a module that is imported on first attribute access, so pandas and the
+    services behind it load with the first query (or the warm-up) rather than at startup.
+    Attributes are looked up on the real module each time, so patching it still works.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        # import_module returns the cached module after the first call and is thread-safe
+        return getattr(importlib.import_module(self._name), attr)
@@ -5,8 +5,58 @@
 import traceback
 from flask import current_app as app
 from flask import request, jsonify
-from .config import logger
-from .services import data_service
+from .config import logger, SNAPSHOT_MODE, RESPONSE_CACHE_ENABLED, BATCH_MAX_QUERIES, TIMING_ENABLED, COALESCE_ENABLED
+from .lazy import LazyModule
+from .services import cache_service, timing_service
+from .services.cache_service import response_cache
+from .services.coalesce_service import query_flights, CoalesceTimeout
+
+# pandas and the query services load with the first query or the warm-up, not at startup
+data_service = LazyModule('app.services.data_service')
+processing_service = LazyModule('app.services.processing_service')
+serialization = LazyModule('app.serialization')
+
+def _timing_labels(payload: dict):
+    """
+    Returns the (source, view) a query request is timed under. Unknown views are labelled
+    "other" to bound metric label cardinality.
+    """
+    source = payload.get("source")
+    if source not in cache_service.SOURCE_VIEWS:
+        return "other", "other"
+    if source == "influencer_analytics" and payload.get("filters", {}).get("influencer_name"):
+        return source, "profile"
+    if source == "dashboard":
+        view, known = payload.get("view", "dashboard"), {"dashboard", "market_comparison"}
+    else:
+        view, known = payload.get("view", "summary"), set(processing_service.ANALYTICS_VIEW_COLUMNS) | {"name_search"}
+    return source, view if view in known else "other"
+
+@app.after_request
+def add_server_timing(response):
+    """Reports a timed request's spans in a Server-Timing header and records them as metrics."""
+    if (timings := timing_service.end()) is not None:
+        total = timings.total()
+        response.headers['Server-Timing'] = timings.server_timing(total)
+        timing_service.metrics.observe(timings, total)
+    return response
+
+def _query_result(source: str, payload: dict) -> dict:
+    if source == "dashboard":
+        return data_service.get_dashboard_data(payload)
+    return data_service.get_analytics_data(payload)
+
+def _serialized_query(source: str, payload: dict, cache_key: str):
+    """Answers a query as (JSON body, status), caching successful bodies under cache_key."""
+    result = _query_result(source, payload)
+    if "error" in result:
+        # Errors from services are already logged, so just return
+        return serialization.dumps(result), 400
+    with timing_service.span("serialize"):
+        body = serialization.dumps(result)
+    if cache_key:
+        response_cache.put(cache_key, source, body)
+    return body, 200
 
 @app.route('/api/influencer/query', methods=['POST'])
 def handle_influencer_query():
@@ -16,28 +66,130 @@ def handle_influencer_query():
         if not payload:
             logger.warning("Received request with invalid or missing JSON payload.")
             return jsonify({"error": "Invalid JSON payload"}), 400
+        if TIMING_ENABLED:
+            timing_service.begin(*_timing_labels(payload))
         
         source = payload.get("source")
         logger.info(f"Routing request for source: '{source}'")
 
-        if source == "dashboard":
-            result = data_service.get_dashboard_data(payload)
-        elif source == "influencer_analytics":
-            result = data_service.get_analytics_data(payload)
-        else:
+        if payload.get("format", "records") not in serialization.RESPONSE_FORMATS:
+            logger.warning(f"Received invalid format: {payload.get('format')}")
+            return jsonify({"error": f"Invalid 'format'. Must be one of: {', '.join(serialization.RESPONSE_FORMATS)}."}), 400
+
+        # Streamed responses are never buffered, so they bypass the response cache
+        streaming = payload.get("format") == "ndjson"
+        cache_key = cache_service.canonical_key(payload) if RESPONSE_CACHE_ENABLED and not streaming and source in cache_service.SOURCE_VIEWS else None
+        if cache_key and (cached_body := response_cache.get(cache_key)) is not None:
+            logger.info(f"Serving cached response for source: '{source}'")
+            return app.response_class(cached_body, mimetype='application/json')
+
+        if source not in cache_service.SOURCE_VIEWS:
             logger.warning(f"Received invalid source: {source}")
-            result = {"error": f"Invalid 'source'. Must be 'dashboard' or 'influencer_analytics'."}
-        
-        if "error" in result:
-            # Errors from services are already logged, so just return
-            return jsonify(result), 400
-        
-        return jsonify(result)
+            return jsonify({"error": f"Invalid 'source'. Must be 'dashboard' or 'influencer_analytics'."}), 400
 
+        if streaming:
+            result = _query_result(source, payload)
+            if "error" in result:
+                return jsonify(result), 400
+            return serialization.ndjson_response(result)
+
+        if COALESCE_ENABLED:
+            # Requests identical to one already being answered wait for that answer instead of recomputing it
+            with timing_service.span("coalesce"):
+                body, status = query_flights.do(cache_key or cache_service.canonical_key(payload), lambda: _serialized_query(source, payload, cache_key))
+        else:
+            body, status = _serialized_query(source, payload, cache_key)
+        return app.response_class(body, status=status, mimetype='application/json')
+
+    except CoalesceTimeout as e:
+        logger.warning(f"Coalesced request timed out: {e}")
+        return jsonify({"error": str(e)}), 504
     except Exception as e:
         logger.critical(f"An unhandled exception occurred in handle_influencer_query: {e}\n{traceback.format_exc()}")
         return jsonify({"error": f"An internal server error occurred: {str(e)}"}), 500
 
+def _batch_cache_key(query) -> str:
+    """Returns the response cache key a batch sub-query shares with the single query endpoint, or None when it is not cached."""
+    if RESPONSE_CACHE_ENABLED and isinstance(query, dict) and query.get("source") in cache_service.SOURCE_VIEWS and query.get("format") != "ndjson":
+        return cache_service.canonical_key(query)
+    return None
+
+@app.route('/api/influencer/query/batch', methods=['POST'])
+def handle_influencer_batch_query():
+    """Answers a list of query payloads in one request, fetching each distinct data set once."""
+    try:
+        payload = request.get_json(silent=True)
+        queries = payload.get("queries") if isinstance(payload, dict) else None
+        if not isinstance(queries, list) or not queries:
+            logger.warning("Received batch request without a 'queries' list.")
+            return jsonify({"error": "Batch payload must contain a non-empty 'queries' list"}), 400
+        if len(queries) > BATCH_MAX_QUERIES:
+            return jsonify({"error": f"A batch may contain at most {BATCH_MAX_QUERIES} queries."}), 400
+
+        logger.info(f"Routing batch request with {len(queries)} queries")
+        if TIMING_ENABLED:
+            # Sub-queries run on worker threads, so only the batch as a whole is timed
+            timing_service.begin("batch", "batch")
+
+        # Sub-queries share the single query endpoint's cache entries; only the misses are computed
+        cache_keys = [_batch_cache_key(query) for query in queries]
+        bodies = [response_cache.get(key) if key else None for key in cache_keys]
+        misses = [index for index, body in enumerate(bodies) if body is None]
+        results = data_service.get_batch_data([queries[index] for index in misses]) if misses else []
+        items = [b'{"status":"ok","result":' + body + b'}' if body is not None else None for body in bodies]
+        with timing_service.span("serialize"):
+            for index, result in zip(misses, results):
+                if "error" in result:
+                    items[index] = serialization.dumps({"status": "error", "error": result["error"]})
+                    continue
+                body = serialization.dumps(result)
+                if cache_keys[index]:
+                    response_cache.put(cache_keys[index], queries[index]["source"], body)
+                items[index] = b'{"status":"ok","result":' + body + b'}'
+            body = b'{"count":' + str(len(items)).encode() + b',"results":[' + b','.join(items) + b']}'
+        return app.response_class(body, mimetype='application/json')
+
+    except Exception as e:
+        logger.critical(f"An unhandled exception occurred in handle_influencer_batch_query: {e}\n{traceback.format_exc()}")
+        return jsonify({"error": f"An internal server error occurred: {str(e)}"}), 500
+
+@app.route('/api/snapshot/refresh', methods=['POST'])
+def refresh_snapshots():
+    """Reloads the in-memory view snapshots on demand."""
+    if not SNAPSHOT_MODE:
+        return jsonify({"error": "Snapshot mode is disabled. Set SNAPSHOT_MODE=true to enable it."}), 400
+    try:
+        row_counts = data_service.refresh_snapshots()
+        return jsonify({"status": "refreshed", "views": row_counts})
+    except Exception as e:
+        logger.error(f"Snapshot refresh failed: {e}\n{traceback.format_exc()}")
+        return jsonify({"error": f"Snapshot refresh failed: {str(e)}"}), 500
+
+@app.route('/api/snapshot/memory', methods=['GET'])
+def snapshot_memory():
+    """Reports the typed versus untyped memory footprint of each snapshot loaded in this worker process."""
+    return jsonify(data_service.snapshot_memory_report())
+
+@app.route('/api/snapshot/sync', methods=['GET'])
+def snapshot_sync_metrics():
+    """Reports rows pulled and duration of the delta syncs behind each snapshot of this worker process."""
+    return jsonify(data_service.sync_metrics())
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Reports hit, miss and eviction counts for this worker process's response cache."""
+    return jsonify({"enabled": RESPONSE_CACHE_ENABLED, **response_cache.stats()})
+
+@app.route('/api/coalesce/stats', methods=['GET'])
+def coalesce_stats():
+    """Reports how many query requests this worker process computed and how many joined one already in flight."""
+    return jsonify({"enabled": COALESCE_ENABLED, **query_flights.stats()})
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Exposes this worker process's request latency histograms and row counts in the Prometheus text format."""
+    return app.response_class(timing_service.metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/')
 def health_check():
     """Provides a simple health check endpoint."""
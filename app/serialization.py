@@ -0,0 +1,138 @@
+# ================================================
+# FILE: app/serialization.py
+# PURPOSE: Fast DataFrame-to-JSON conversion for API responses
+# ================================================
+import datetime
+import json
+import math
+import numpy as np
+import pandas as pd
+from flask import current_app
+from .config import STREAM_CHUNK_ROWS
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder is used without it
+    orjson = None
+
+# Output layouts accepted in the payload's "format" field
+RESPONSE_FORMATS = ("records", "columnar", "ndjson")
+_ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+class FrameRows:
+    """Rows of a processed frame that are serialized lazily, chunk by chunk, when streamed."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    def __len__(self):
+        return len(self.df)
+
+    def iter_chunks(self, chunk_rows: int = STREAM_CHUNK_ROWS):
+        for start in range(0, len(self.df), chunk_rows):
+            yield frame_to_records(self.df.iloc[start:start + chunk_rows])
+
+def _json_default(obj):
+    """Encodes the non-JSON types that can appear in processed frames."""
+    if isinstance(obj, FrameRows):
+        # Row sets are only inlined when a result holding them is encoded whole
+        return frame_to_records(obj.df)
+    if obj is pd.NaT:
+        # NaT subclasses datetime, whose isoformat() would write the string "NaT"
+        return None
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _sanitize(obj):
+    """Replaces NaN/inf with None and unwraps numpy values for the standard library encoder."""
+    if isinstance(obj, dict):
+        return {key: _sanitize(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple, np.ndarray)):
+        return [_sanitize(value) for value in obj]
+    if isinstance(obj, FrameRows):
+        return _sanitize(frame_to_records(obj.df))
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    return obj
+
+def dumps(obj) -> bytes:
+    """Serializes a response object to JSON bytes. NaN, infinite and NaT values become null."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default, option=_ORJSON_OPTIONS)
+    return json.dumps(_sanitize(obj), default=_json_default, allow_nan=False).encode()
+
+def json_response(obj, status: int = 200):
+    """Builds a Flask JSON response using the fast encoder."""
+    return current_app.response_class(dumps(obj), status=status, mimetype='application/json')
+
+def frame_to_records(df: pd.DataFrame) -> list:
+    """Equivalent of to_dict(orient='records'), built column-wise instead of boxing row by row."""
+    columns = list(df.columns)
+    values = [df[col].tolist() for col in columns]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+def frame_to_columns(df: pd.DataFrame) -> dict:
+    """
+    Column-oriented layout: {column: [values...]}. Plain numeric columns stay numpy arrays
+    so orjson can encode them directly without creating a Python object per value.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if orjson is not None and values.dtype.kind in 'biuf':
+            columns[col] = np.ascontiguousarray(values.to_numpy())
+        else:
+            columns[col] = values.tolist()
+    return columns
+
+def frame_output(df: pd.DataFrame, output_format: str = None):
+    """Converts a processed frame to the layout requested by the payload's "format"."""
+    if output_format == "columnar":
+        return frame_to_columns(df)
+    if output_format == "ndjson":
+        return FrameRows(df)
+    return frame_to_records(df)
+
+def _split_row_sets(value: dict, path: str, sections: dict) -> dict:
+    """
+    Copies a result without its row sets, collecting each one into sections under its dotted
+    path, such as "details" or "monthly_data.0.details".
+    """
+    remaining = {}
+    for key, item in value.items():
+        item_path = f"{path}.{key}" if path else str(key)
+        if isinstance(item, FrameRows):
+            sections[item_path] = item
+        elif isinstance(item, dict):
+            remaining[key] = _split_row_sets(item, item_path, sections)
+        elif isinstance(item, list) and any(isinstance(entry, dict) for entry in item):
+            remaining[key] = [_split_row_sets(entry, f"{item_path}.{i}", sections) if isinstance(entry, dict) else entry for i, entry in enumerate(item)]
+        else:
+            remaining[key] = item
+    return remaining
+
+def ndjson_lines(result: dict, chunk_rows: int = STREAM_CHUNK_ROWS):
+    """
+    Streams a processed result as newline-delimited JSON. The first line holds the result
+    without its row sets, plus the size of each row set ("sections") keyed by its dotted path,
+    so row sets nested in months or markets are streamed too. Each row set then follows as a
+    {"type": "section"} line and one line per row, encoded a chunk at a time.
+    """
+    sections = {}
+    header = _split_row_sets(result, "", sections)
+    yield dumps({"type": "summary", **header, "sections": {path: len(rows) for path, rows in sections.items()}}) + b"\n"
+    for name, rows in sections.items():
+        yield dumps({"type": "section", "name": name, "count": len(rows)}) + b"\n"
+        for chunk in rows.iter_chunks(chunk_rows):
+            yield b"".join(dumps(record) + b"\n" for record in chunk)
+
+def ndjson_response(result: dict):
+    """Builds a streaming NDJSON response for a processed result."""
+    return current_app.response_class(ndjson_lines(result), mimetype='application/x-ndjson')
@@ -0,0 +1,132 @@
+# ================================================
+# FILE: app/services/cache_service.py
+# PURPOSE: Bounded LRU/TTL cache for serialized query responses
+# ================================================
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional
+from app.config import logger, CAMPAIGN_VIEW_NAME, TARGET_VIEW_NAME, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL_SECONDS
+
+# Which underlying view each query source reads from, used to invalidate on refresh
+SOURCE_VIEWS = {"dashboard": TARGET_VIEW_NAME, "influencer_analytics": CAMPAIGN_VIEW_NAME}
+
+# Filters for which a missing value, an empty value and "All" all mean "no filter"
+ALL_EQUIVALENT_FILTERS = ['year', 'market', 'month', 'week_number']
+INTEGER_FILTERS = ['year', 'week_number']
+
+def canonicalize_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalizes a query payload so that equivalent requests compare equal."""
+    canonical = dict(payload)
+    filters = dict(payload.get("filters") or {})
+
+    for key in ALL_EQUIVALENT_FILTERS:
+        if key in filters and (not filters[key] or filters[key] == "All"):
+            del filters[key]
+    for key in INTEGER_FILTERS:
+        if key in filters:
+            try:
+                filters[key] = int(filters[key])
+            except (ValueError, TypeError):
+                pass
+    if isinstance(filters.get("tier"), str):
+        filters["tier"] = filters["tier"].lower()
+    if isinstance(filters.get("influencer_name"), str):
+        # The name is matched case-insensitively after stripping whitespace
+        filters["influencer_name"] = filters["influencer_name"].strip().lower()
+    canonical["filters"] = filters
+
+    if payload.get("source") == "influencer_analytics" and "view" not in payload:
+        canonical["view"] = "summary"
+    if sort_config := payload.get("sort"):
+        canonical["sort"] = {"by": sort_config.get("by", "total_spend_eur"), "order": "asc" if sort_config.get("order", "desc") == "asc" else "desc"}
+    else:
+        canonical.pop("sort", None)
+    return canonical
+
+def canonical_key(payload: Dict[str, Any]) -> str:
+    """Returns a stable string key for a query payload."""
+    return json.dumps(canonicalize_payload(payload), sort_keys=True, default=str)
+
+class ResponseCache:
+    """Thread-safe LRU cache of serialized responses, bounded by total bytes, with per-source TTLs."""
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES, ttl_seconds: Dict[str, float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else dict(RESPONSE_CACHE_TTL_SECONDS)
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the cached body for a key, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            source, body, expires_at = entry
+            if self.clock() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: str, source: str, body: bytes):
+        """Stores a body, evicting least recently used entries to stay within the byte bound."""
+        size = len(body)
+        if size > self.max_bytes:
+            logger.warning(f"Response of {size} bytes exceeds the cache bound and was not cached.")
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (source, body, self.clock() + self.ttl_seconds.get(source, 0))
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, source: str = None) -> int:
+        """Drops every entry for a source, or all entries when no source is given."""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if source is None or entry[0] == source]
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+        if keys:
+            logger.info(f"Invalidated {len(keys)} cached responses for source '{source or 'all'}'.")
+        return len(keys)
+
+    def invalidate_view(self, view_name: str) -> int:
+        """Drops cached responses for every source that reads from the given view."""
+        return sum(self.invalidate(source) for source, view in SOURCE_VIEWS.items() if view == view_name)
+
+    def clear(self):
+        """Empties the cache and resets its counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "expirations": self.expirations, "invalidations": self.invalidations,
+                "entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes
+            }
+
+    def _remove(self, key: str):
+        source, body, expires_at = self._entries.pop(key)
+        self._bytes -= len(body)
+
+# Process-wide cache used by the query routes
+response_cache = ResponseCache()
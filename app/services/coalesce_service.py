@@ -0,0 +1,72 @@
+# ================================================
+# FILE: app/services/coalesce_service.py
+# PURPOSE: Single-flight coalescing of identical in-flight queries
+# ================================================
+import threading
+from typing import Any, Callable, Dict
+from app.config import logger, COALESCE_TIMEOUT_SECONDS
+
+class CoalesceTimeout(Exception):
+    """Raised to a waiting request when the computation it joined does not finish in time."""
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time. Callers arriving while a computation for
+    their key is in progress wait for it and share its result, or its exception, instead of
+    starting their own. Nothing is kept once the computation finishes.
+    """
+
+    def __init__(self, timeout_seconds: float = COALESCE_TIMEOUT_SECONDS):
+        self.timeout_seconds = timeout_seconds
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {"executed": 0, "coalesced": 0, "errors": 0, "timeouts": 0}
+
+    def do(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Returns compute()'s result, computed once for every concurrent caller with this key."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats["executed"] += 1
+            else:
+                flight.waiters += 1
+                self._stats["coalesced"] += 1
+
+        if leader:
+            try:
+                flight.result = compute()
+            except Exception as e:
+                flight.error = e
+                with self._lock:
+                    self._stats["errors"] += 1
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+            if flight.waiters:
+                logger.info(f"Shared one computation with {flight.waiters} coalesced requests.")
+        elif not flight.done.wait(self.timeout_seconds):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise CoalesceTimeout(f"Timed out after {self.timeout_seconds}s waiting for an identical query in progress.")
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._flights)}
+
+query_flights = SingleFlight()
@@ -4,71 +4,434 @@
 # ================================================
 import traceback
 import pandas as pd
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
 from app import supabase
-from app.config import logger, TARGET_VIEW_NAME, CAMPAIGN_VIEW_NAME, NORDIC_COUNTRIES
-from . import processing_service
+from app.config import (
+    logger, TARGET_VIEW_NAME, CAMPAIGN_VIEW_NAME, NORDIC_COUNTRIES, SNAPSHOT_MODE,
+    FETCH_PAGE_SIZE, FETCH_MAX_WORKERS, FETCH_ORDER_COLUMN, BATCH_MAX_WORKERS, ROLLUP_MODE, DELTA_SYNC_ENABLED,
+    NAME_INDEX_ENABLED, NAME_INDEX_TTL_SECONDS, NAME_INDEX_MAX_RESOLVED, SHARED_SNAPSHOT_DIR
+)
+from . import processing_service, snapshot_service, schema_service, rollup_service, sync_service, search_service, timing_service
+from . import shared_snapshot_service, cache_service
+
+def comparison_markets(filters: Dict[str, Any]) -> Optional[List[str]]:
+    """Reads the markets of a market_comparison payload, expanding "Nordics"; None means every market."""
+    markets = filters.get("markets")
+    if isinstance(markets, str):
+        markets = [market.strip() for market in markets.split(",")]
+    if not markets or markets == "All" or "All" in markets:
+        return None
+    expanded = []
+    for market in markets:
+        expanded.extend(NORDIC_COUNTRIES if market == "Nordics" else [market])
+    return list(dict.fromkeys(expanded))
+
+def _dashboard_filter_clauses(filters: Dict[str, Any]) -> List[snapshot_service.FilterClause]:
+    """Translates dashboard filters into (operator, column, value) clauses."""
+    clauses = []
+    market_filter, year_filter = filters.get("market"), filters.get("year")
+    if year_filter and year_filter != "All":
+        clauses.append(('eq', 'year', int(year_filter)))
+    if market_filter and market_filter != "All":
+        if market_filter == "Nordics":
+            clauses.append(('in', 'region', NORDIC_COUNTRIES))
+        else:
+            clauses.append(('eq', 'region', market_filter))
+    return clauses
+
+def _analytics_filter_clauses(filters: Dict[str, Any]) -> List[snapshot_service.FilterClause]:
+    """Translates analytics filters into (operator, column, value) clauses."""
+    clauses = []
+    if influencer_name := filters.get("influencer_name"):
+        clauses.append(('ilike', 'influencer_name', influencer_name.strip()))
+    if year_str := filters.get("year", "All"):
+        if year_str != "All":
+            clauses.append(('eq', 'year', int(year_str)))
+    if market := filters.get("market", "All"):
+        if market != "All":
+            markets_to_filter = NORDIC_COUNTRIES if market == "Nordics" else [market]
+            clauses.append(('in', 'market', markets_to_filter))
+    if month := filters.get("month", "All"):
+        if month != "All":
+            clauses.append(('eq', 'month', month))
+    if week_number := filters.get("week_number"):
+        if week_number != "All":
+            try:
+                clauses.append(('eq', 'wk_clean', int(week_number)))
+                logger.info(f"Applied week number filter: {week_number}")
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid week_number filter value: {week_number}. Must be an integer.")
+    return clauses
+
+def _date_range_clauses(filters: Dict[str, Any]) -> List[snapshot_service.FilterClause]:
+    """
+    Translates the custom range into clauses on live_date_clean. Bounds are widened to whole
+    days (from the start of date_from to before the day after date_to) and sent as ISO dates,
+    so the pushed-down range never drops a row the exact in-memory range check keeps.
+    """
+    try:
+        date_from, date_to = pd.Timestamp(filters["date_from"]), pd.Timestamp(filters["date_to"])
+    except (KeyError, TypeError, ValueError):
+        # Missing or unparseable bounds are reported by the processing step
+        return []
+    return [
+        ('gte', 'live_date_clean', date_from.strftime('%Y-%m-%d')),
+        ('lt', 'live_date_clean', (date_to.normalize() + pd.Timedelta(days=1)).strftime('%Y-%m-%d'))
+    ]
+
+def _apply_clauses_to_query(query, clauses: List[snapshot_service.FilterClause]):
+    """Pushes filter clauses down into a Supabase query builder."""
+    for operator, column, value in clauses:
+        if operator == 'ilike':
+            query = query.ilike(column, f'%{value}%')
+        elif operator == 'in':
+            query = query.in_(column, value)
+        elif operator in ('gt', 'gte', 'lt', 'lte'):
+            query = getattr(query, operator)(column, value)
+        else:
+            query = query.eq(column, value)
+    return query
+
+def _projection(columns: Optional[List[str]]) -> str:
+    """Formats a column list for select(), falling back to every column."""
+    return ','.join(columns) if columns else '*'
+
+def _page_query(view_name: str, clauses: List[snapshot_service.FilterClause], columns: str, start: int, end: int, count: str = None):
+    """Builds the query for one page of a view."""
+    query = supabase.from_(view_name).select(columns, count=count) if count else supabase.from_(view_name).select(columns)
+    query = _apply_clauses_to_query(query, clauses)
+    if FETCH_ORDER_COLUMN:
+        query = query.order(FETCH_ORDER_COLUMN)
+    return query.range(start, end)
+
+def _fetch_page_frame(view_name: str, clauses: List[snapshot_service.FilterClause], columns: str, start: int, end: int) -> pd.DataFrame:
+    """Fetches one page and converts it to a typed frame straight away so its raw JSON rows can be released."""
+    response = _page_query(view_name, clauses, columns, start, end).execute()
+    return schema_service.build_frame(response.data or [], view_name)
+
+def fetch_view_frame(view_name: str, clauses: List[snapshot_service.FilterClause] = (), columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Reads every row of a view matching the clauses with range requests ordered by
+    FETCH_ORDER_COLUMN. The first page also returns the exact row count; the remaining pages
+    are fetched concurrently by a bounded worker pool, each converted to a DataFrame as it
+    arrives and concatenated in page order.
+    """
+    columns = _projection(columns)
+    first = _page_query(view_name, clauses, columns, 0, FETCH_PAGE_SIZE - 1, count='exact').execute()
+    first_rows = first.data or []
+    total = first.count
+    page_size = len(first_rows)
+    frames = [schema_service.build_frame(first_rows, view_name)]
+    del first, first_rows
+
+    # Without a row count, a non-empty first page may always have more behind it
+    more_pages = bool(page_size) and (total is None or total > page_size)
+    if more_pages and not FETCH_ORDER_COLUMN:
+        raise RuntimeError(f"'{view_name}' does not fit in one page; set FETCH_ORDER_COLUMN to a unique column so its pages can be read consistently.")
+
+    if more_pages and total is None:
+        # Keep requesting pages until one comes back short
+        while len(frames[-1]) == page_size:
+            start = sum(len(frame) for frame in frames)
+            frames.append(_fetch_page_frame(view_name, clauses, columns, start, start + page_size - 1))
+    elif more_pages:
+        # The server may cap pages below FETCH_PAGE_SIZE; page by what it actually returned
+        starts = range(page_size, total, page_size)
+        with ThreadPoolExecutor(max_workers=max(1, FETCH_MAX_WORKERS)) as executor:
+            frames.extend(executor.map(lambda start: _fetch_page_frame(view_name, clauses, columns, start, start + page_size - 1), starts))
+        logger.info(f"Fetched {total} rows from '{view_name}' in {len(starts) + 1} pages.")
+
+    return schema_service.concat_frames(frames)
+
+# Delta syncs keep snapshot refreshes cheap when DELTA_SYNC_ENABLED is set
+campaign_sync = sync_service.DeltaSync(CAMPAIGN_VIEW_NAME, lambda clauses: fetch_view_frame(CAMPAIGN_VIEW_NAME, clauses))
+target_sync = sync_service.DeltaSync(TARGET_VIEW_NAME, lambda clauses: fetch_view_frame(TARGET_VIEW_NAME, clauses))
+
+def _shared_snapshot_files() -> Dict[str, shared_snapshot_service.SharedSnapshotFile]:
+    if not SHARED_SNAPSHOT_DIR:
+        return {}
+    if shared_snapshot_service.pa is None:
+        logger.warning("SHARED_SNAPSHOT_DIR is set but pyarrow is not installed; each worker keeps its own snapshots.")
+        return {}
+    return {view: shared_snapshot_service.SharedSnapshotFile(view, SHARED_SNAPSHOT_DIR) for view in (CAMPAIGN_VIEW_NAME, TARGET_VIEW_NAME)}
+
+# Arrow files shared by every worker process, when SHARED_SNAPSHOT_DIR is set
+shared_snapshot_files = _shared_snapshot_files()
+
+def _snapshot_loader(view_name: str, sync: sync_service.DeltaSync):
+    load = sync.sync if DELTA_SYNC_ENABLED else lambda: fetch_view_frame(view_name)
+    shared = shared_snapshot_files.get(view_name)
+    if shared is None:
+        return load
+
+    def load_shared():
+        frame = shared.load(load)
+        if DELTA_SYNC_ENABLED:
+            # Sync on from the mapped frame so this worker holds no private copy of the view
+            sync.adopt(frame)
+        return frame
+    return load_shared
+
+# Snapshots are only loaded on first use, and only when SNAPSHOT_MODE is enabled
+campaign_snapshot = snapshot_service.ViewSnapshot(CAMPAIGN_VIEW_NAME, _snapshot_loader(CAMPAIGN_VIEW_NAME, campaign_sync), date_columns=('live_date_clean',))
+target_snapshot = snapshot_service.ViewSnapshot(TARGET_VIEW_NAME, _snapshot_loader(TARGET_VIEW_NAME, target_sync))
+
+# Drop cached responses as soon as the snapshot they were computed from is reloaded
+campaign_snapshot.on_refresh(cache_service.response_cache.invalidate_view)
+target_snapshot.on_refresh(cache_service.response_cache.invalidate_view)
+
+# Rollups of the campaign snapshot, rebuilt whenever the snapshot frame is replaced
+campaign_rollups = rollup_service.RollupStore()
+
+def _update_rollups(previous: pd.DataFrame, replaced: pd.DataFrame, changed: pd.DataFrame, positions, merged: pd.DataFrame):
+    """Carries a delta merge into the rollups when they describe the frame it was merged into."""
+    if campaign_rollups.describes(previous):
+        campaign_rollups.replace_rows(replaced, changed, merged, positions)
+
+campaign_sync.on_merge(_update_rollups)
+
+def _fetch_influencer_names() -> pd.DataFrame:
+    """Loads the distinct influencer names of the campaign view."""
+    return fetch_view_frame(CAMPAIGN_VIEW_NAME, columns=['influencer_name']).drop_duplicates(ignore_index=True)
+
+# Distinct influencer names for the name index when the campaign snapshot is not in use
+influencer_names_snapshot = snapshot_service.ViewSnapshot(CAMPAIGN_VIEW_NAME, _fetch_influencer_names, ttl_seconds=NAME_INDEX_TTL_SECONDS)
+name_indexes = search_service.NameIndexCache()
+
+def name_index() -> search_service.NameIndex:
+    """Returns the influencer name index of the campaign snapshot, or of the separately loaded names."""
+    return name_indexes.for_frame(campaign_snapshot.get_frame() if SNAPSHOT_MODE else influencer_names_snapshot.get_frame())
+
+def _resolve_name_clause(clauses: List[snapshot_service.FilterClause], influencer_name: str) -> List[snapshot_service.FilterClause]:
+    """
+    Replaces the ilike name clause with exact equality on the names the index resolves it to.
+    The ilike clause is kept when the index finds nothing, so influencers added since it was
+    built are still found, and when it finds more than NAME_INDEX_MAX_RESOLVED names, so short
+    queries do not become huge IN lists.
+    """
+    try:
+        names = name_index().resolve(influencer_name, limit=NAME_INDEX_MAX_RESOLVED)
+    except Exception as e:
+        logger.warning(f"Name index unavailable, falling back to ilike: {e}")
+        return clauses
+    if not names:
+        return clauses
+    logger.info(f"Resolved influencer name '{influencer_name}' to {len(names)} exact names.")
+    return [('in', 'influencer_name', names) if column == 'influencer_name' else (operator, column, value) for operator, column, value in clauses]
+
+def search_names(payload: Dict[str, Any]):
+    """Answers the name_search typeahead view."""
+    query = payload.get("query") or payload.get("filters", {}).get("influencer_name") or ""
+    limit = payload.get("limit", 10)
+    try:
+        limit = None if isinstance(limit, (bool, float)) else int(limit)
+    except (TypeError, ValueError):
+        limit = None
+    if limit is None or limit < 0:
+        logger.warning(f"Invalid name_search limit: {payload.get('limit')}")
+        return {"error": "'limit' must be a non-negative integer."}
+    try:
+        matches = name_index().search(query, limit)
+    except Exception as e:
+        logger.error(f"Name search failed: {e}\n{traceback.format_exc()}")
+        return {"error": f"Name search failed: {str(e)}"}
+    return {"source": "name_search", "query": query, "count": len(matches), "matches": matches}
+
+def refresh_snapshots():
+    """Reloads every view snapshot immediately; with delta sync this is a full reconcile."""
+    for sync in (campaign_sync, target_sync):
+        sync.request_reconcile()
+    for shared in shared_snapshot_files.values():
+        shared.request_refresh()
+    return {snapshot.view_name: len(snapshot.refresh()) for snapshot in (campaign_snapshot, target_snapshot)}
+
+def sync_metrics():
+    """Reports rows pulled and time spent per delta sync of each view."""
+    return {sync.view_name: {"enabled": DELTA_SYNC_ENABLED, **sync.metrics} for sync in (campaign_sync, target_sync)}
+
+def snapshot_memory_report():
+    """Reports the memory footprint of each loaded snapshot against its untyped equivalent."""
+    return {snapshot.view_name: snapshot.memory_report() for snapshot in (campaign_snapshot, target_snapshot)}
+
+def _load_frame(view_name: str, clauses: List[snapshot_service.FilterClause], columns: Optional[List[str]]) -> pd.DataFrame:
+    """Reads a view's matching rows from its snapshot in snapshot mode, otherwise from Supabase."""
+    with timing_service.span("fetch"):
+        if SNAPSHOT_MODE:
+            snapshot = campaign_snapshot if view_name == CAMPAIGN_VIEW_NAME else target_snapshot
+            frame = snapshot.select(clauses, columns)
+        else:
+            frame = fetch_view_frame(view_name, clauses, columns)
+    timing_service.add_rows("fetched", len(frame))
+    return frame
+
+def _dashboard_fetch_plan(payload: Dict[str, Any]):
+    """Returns the (view, clauses, columns) a dashboard payload needs."""
+    filters = payload.get("filters", {})
+    if payload.get("view") == "market_comparison":
+        # Every requested market comes from the same fetch
+        clauses = _dashboard_filter_clauses({"year": filters.get("year")})
+        if markets := comparison_markets(filters):
+            clauses.append(('in', 'region', markets))
+    else:
+        clauses = _dashboard_filter_clauses(filters)
+    return TARGET_VIEW_NAME, clauses, processing_service.required_dashboard_columns(payload)
+
+def _analytics_fetch_plan(payload: Dict[str, Any]):
+    """Returns the (view, clauses, columns) an analytics payload needs."""
+    filters = payload.get("filters", {})
+    clauses = _analytics_filter_clauses(filters)
+    if payload.get("view") == "custom_range_breakdown":
+        clauses += _date_range_clauses(filters)
+    if NAME_INDEX_ENABLED and filters.get("influencer_name"):
+        clauses = _resolve_name_clause(clauses, filters["influencer_name"].strip())
+    return CAMPAIGN_VIEW_NAME, clauses, processing_service.required_analytics_columns(payload)
+
+def _process_dashboard_frame(all_data: pd.DataFrame, payload: Dict[str, Any]):
+    if payload.get("view") == "market_comparison":
+        return processing_service.process_market_comparison(all_data, comparison_markets(payload.get("filters", {})), payload.get("format"))
+    return processing_service.process_dashboard_data(all_data, payload.get("filters", {}).get("market"), payload.get("format"))
+
+def _process_analytics_frame(df: pd.DataFrame, payload: Dict[str, Any]):
+    if df.empty:
+        logger.warning(f"No data found in view matching filters: {payload.get('filters', {})}")
+        return {"items": [], "count": 0}
+    return processing_service.route_analytics_processing(df, payload)
 
 def get_dashboard_data(payload: Dict[str, Any]):
     """Fetches and processes data for the dashboard source."""
     logger.info("Starting dashboard data processing from view.")
     try:
-        filters = payload.get("filters", {})
-        market_filter, year_filter = filters.get("market"), filters.get("year")
-        
-        query = supabase.from_(TARGET_VIEW_NAME).select('*')
-        if year_filter and year_filter != "All":
-            query = query.eq('year', int(year_filter))
-        if market_filter and market_filter != "All":
-            if market_filter == "Nordics":
-                query = query.in_('region', NORDIC_COUNTRIES)
-            else:
-                query = query.eq('region', market_filter)
-        
-        res = query.execute()
-        all_data = res.data if res.data else []
-        
-        return processing_service.process_dashboard_data(all_data, market_filter)
+        all_data = _load_frame(*_dashboard_fetch_plan(payload))
+        with timing_service.span("aggregate"):
+            return _process_dashboard_frame(all_data, payload)
     except Exception as e:
         logger.error(f"Dashboard query from view failed: {e}\n{traceback.format_exc()}")
         return {"error": f"Dashboard query failed: {str(e)}"}
 
+def _rollup_answerable(payload: Dict[str, Any], clauses: List[snapshot_service.FilterClause]) -> bool:
+    """True when rollup mode is on and the payload's view and filters can be answered from rollups."""
+    return (SNAPSHOT_MODE and ROLLUP_MODE and payload.get("view", "summary") in processing_service.ROLLUP_VIEWS
+            and "influencer_name" not in payload.get("filters", {}) and campaign_rollups.can_answer(clauses))
+
+def _get_rollup_analytics(payload: Dict[str, Any], clauses: List[snapshot_service.FilterClause]):
+    """Answers an analytics payload from the campaign rollups."""
+    with timing_service.span("fetch"):
+        campaign_rollups.ensure_built(campaign_snapshot.get_frame())
+        cells, assets = campaign_rollups.select(clauses)
+    timing_service.add_rows("rollup_cells", len(cells))
+    if cells.empty:
+        logger.warning(f"No rollups found matching filters: {payload.get('filters', {})}")
+        return {"items": [], "count": 0}
+    df = None
+    if payload.get("view") == "monthly_breakdown":
+        df = _load_frame(CAMPAIGN_VIEW_NAME, clauses, processing_service.required_analytics_columns(payload))
+    logger.success(f"Answering '{payload.get('view', 'summary')}' from {len(cells)} rollup cells.")
+    with timing_service.span("aggregate"):
+        return processing_service.route_rollup_processing(cells, assets, payload, df)
+
 def get_analytics_data(payload: Dict[str, Any]):
     """Fetches data for the analytics source and routes to processing."""
     logger.info("Starting analytics data request from view.")
+    if payload.get("view") == "name_search":
+        return search_names(payload)
     try:
-        filters = payload.get("filters", {})
-        query = supabase.from_(CAMPAIGN_VIEW_NAME).select("*")
-
-        if influencer_name := filters.get("influencer_name"):
-            query = query.ilike('influencer_name', f'%{influencer_name.strip()}%')
-        if year_str := filters.get("year", "All"):
-            if year_str != "All":
-                query = query.eq('year', int(year_str))
-        if market := filters.get("market", "All"):
-            if market != "All":
-                markets_to_filter = NORDIC_COUNTRIES if market == "Nordics" else [market]
-                query = query.in_('market', markets_to_filter)
-        if month := filters.get("month", "All"):
-            if month != "All":
-                query = query.eq('month', month)
-        if week_number := filters.get("week_number"):
-            if week_number != "All":
-                try:
-                    query = query.eq('wk_clean', int(week_number))
-                    logger.info(f"Applied week number filter: {week_number}")
-                except (ValueError, TypeError):
-                    logger.warning(f"Invalid week_number filter value: {week_number}. Must be an integer.")
-
-        response = query.execute()
-        if not response.data:
-            logger.warning(f"No data found in view matching filters: {filters}")
-            return {"items": [], "count": 0}
-            
-        logger.success(f"Fetched {len(response.data)} filtered records from view.")
-        df = pd.DataFrame(response.data)
-        
-        return processing_service.route_analytics_processing(df, payload)
+        view_name, clauses, columns = _analytics_fetch_plan(payload)
+        if _rollup_answerable(payload, clauses):
+            return _get_rollup_analytics(payload, clauses)
+        df = _load_frame(view_name, clauses, columns)
+        if not df.empty:
+            logger.success(f"Fetched {len(df)} filtered records from {'snapshot' if SNAPSHOT_MODE else 'view'}.")
+        with timing_service.span("aggregate"):
+            return _process_analytics_frame(df, payload)
     except Exception as e:
         logger.error(f"Analytics request from view failed: {e}\n{traceback.format_exc()}")
         return {"error": f"Influencer Analytics query failed: {str(e)}"}
+
+# source -> (fetch plan, frame processor, error prefix) for batched sub-queries
+BATCH_SOURCES = {
+    "dashboard": (_dashboard_fetch_plan, _process_dashboard_frame, "Dashboard query failed"),
+    "influencer_analytics": (_analytics_fetch_plan, _process_analytics_frame, "Influencer Analytics query failed")
+}
+
+def _batch_item_error(payload) -> Optional[str]:
+    """Validates one batch sub-query, returning an error message or None."""
+    if not isinstance(payload, dict):
+        return "Each batch query must be a JSON object."
+    if payload.get("source") not in BATCH_SOURCES:
+        return "Invalid 'source'. Must be 'dashboard' or 'influencer_analytics'."
+    if payload.get("format", "records") not in ("records", "columnar"):
+        return "Invalid 'format' in batch query. Must be one of: records, columnar."
+    return None
+
+def get_batch_data(payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Answers several payloads in one pass. Payloads the rollups can answer are answered from
+    them, as single queries are. The others share a single fetch of the union of their columns
+    when their filters translate to the same view and clauses; each payload is then processed
+    on its own copy of that frame, in parallel. Results keep the input order and failures are
+    reported per item.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(payloads)
+    groups: Dict[tuple, Dict[str, Any]] = {}
+    rollup_items = []
+
+    for index, payload in enumerate(payloads):
+        if error := _batch_item_error(payload):
+            results[index] = {"error": error}
+            continue
+        if payload.get("view") == "name_search":
+            results[index] = search_names(payload)
+            continue
+        fetch_plan, _, error_prefix = BATCH_SOURCES[payload["source"]]
+        try:
+            view_name, clauses, columns = fetch_plan(payload)
+        except Exception as e:
+            results[index] = {"error": f"{error_prefix}: {str(e)}"}
+            continue
+        if payload["source"] == "influencer_analytics" and _rollup_answerable(payload, clauses):
+            rollup_items.append((index, payload, clauses))
+            continue
+        group = groups.setdefault((view_name, repr(clauses)), {"view": view_name, "clauses": clauses, "columns": [], "items": []})
+        if columns is None or group["columns"] is None:
+            group["columns"] = None
+        else:
+            group["columns"] = list(dict.fromkeys(group["columns"] + columns))
+        group["items"].append((index, payload, columns))
+
+    def fetch_group(group):
+        try:
+            group["frame"] = _load_frame(group["view"], group["clauses"], group["columns"])
+        except Exception as e:
+            logger.error(f"Batch fetch from '{group['view']}' failed: {e}\n{traceback.format_exc()}")
+            group["error"] = str(e)
+
+    def process_item(group, index, payload, columns):
+        _, process_frame, error_prefix = BATCH_SOURCES[payload["source"]]
+        if "error" in group:
+            return index, {"error": f"{error_prefix}: {group['error']}"}
+        try:
+            # Processors modify their frame in place, so each item works on its own copy
+            frame = group["frame"]
+            frame = frame.copy() if columns is None or frame.empty else frame.loc[:, columns].copy()
+            return index, process_frame(frame, payload)
+        except Exception as e:
+            logger.error(f"Batch item {index} failed: {e}\n{traceback.format_exc()}")
+            return index, {"error": f"{error_prefix}: {str(e)}"}
+
+    def process_rollup_item(index, payload, clauses):
+        try:
+            return index, _get_rollup_analytics(payload, clauses)
+        except Exception as e:
+            logger.error(f"Batch item {index} failed: {e}\n{traceback.format_exc()}")
+            return index, {"error": f"Influencer Analytics query failed: {str(e)}"}
+
+    logger.info(f"Batch of {len(payloads)} queries needs {len(groups)} distinct fetches and {len(rollup_items)} rollup answers.")
+    with ThreadPoolExecutor(max_workers=max(1, BATCH_MAX_WORKERS)) as executor:
+        tasks = [executor.submit(process_rollup_item, *item) for item in rollup_items]
+        list(executor.map(fetch_group, groups.values()))
+        tasks += [executor.submit(process_item, group, *item) for group in groups.values() for item in group["items"]]
+        for task in tasks:
+            index, result = task.result()
+            results[index] = result
+    return results
@@ -2,27 +2,78 @@
 # FILE: app/services/processing_service.py
 # PURPOSE: Handles all DataFrame processing and transformations
 # ================================================
+import base64
+import datetime
+import json
+import numpy as np
 import pandas as pd
 import math
 import traceback
-from typing import Dict, Any
-from app.config import logger, MONTH_ORDER
-from app.utils import convert_to_eur
+from typing import Dict, Any, List, Optional, Tuple
+from app.config import logger, MONTH_ORDER, NORDIC_COUNTRIES
+from app.utils import convert_series_to_eur
+from app.serialization import dumps, frame_output
+from . import timing_service
 
-def process_dashboard_data(all_data: list, market_filter: str):
-    """Processes raw data from the dashboard view."""
-    if not all_data:
+# --- Column Projection Registry ---
+# The columns each analytics view reads. Fetches select only these; None means the view
+# returns whole rows and needs every column. Tests run each view on exactly these columns.
+_SUMMARY_COLUMNS = ['influencer_name', 'market', 'asset', 'currency', 'total_budget_clean', 'actual_conversions_clean', 'views_clean', 'views', 'clicks_clean', 'clicks', 'ctr_clean', 'cvr_clean']
+ANALYTICS_VIEW_COLUMNS = {
+    "summary": _SUMMARY_COLUMNS,
+    "discovery_tiers": _SUMMARY_COLUMNS,
+    "monthly_breakdown": ['month', 'influencer_name', 'market', 'currency', 'total_budget_clean', 'actual_conversions_clean'],
+    "custom_range_breakdown": ['influencer_name', 'market', 'currency', 'total_budget_clean', 'actual_conversions_clean', 'live_date_clean'],
+    "weekly_breakdown_by_number": ['influencer_name', 'market', 'currency', 'total_budget_clean', 'actual_conversions_clean', 'live_date_clean', 'wk_clean'],
+    "weekly_series": ['influencer_name', 'currency', 'total_budget_clean', 'actual_conversions_clean', 'year', 'wk_clean']
+}
+# Width, in weeks, of the rolling window in the weekly series
+WEEKLY_ROLLING_WEEKS = 4
+# Single-market dashboards return the view rows as they are; only the Nordics rollup is projected
+NORDICS_DASHBOARD_COLUMNS = ['month', 'currency', 'target_budget_clean', 'actual_spend_clean', 'target_conversions_clean', 'actual_conversions_clean']
+MARKET_COMPARISON_COLUMNS = ['region'] + NORDICS_DASHBOARD_COLUMNS
+_DASHBOARD_MEASURES = ['target_budget_clean', 'actual_spend_clean', 'target_conversions_clean', 'actual_conversions_clean']
+
+def required_analytics_columns(payload: Dict[str, Any]) -> Optional[List[str]]:
+    """Returns the columns the analytics view for a payload reads, or None for whole rows."""
+    if "influencer_name" in payload.get("filters", {}):
+        return None
+    return ANALYTICS_VIEW_COLUMNS.get(payload.get("view", "summary"))
+
+def required_dashboard_columns(payload: Dict[str, Any]) -> Optional[List[str]]:
+    """Returns the columns the dashboard processing for a payload reads, or None for whole rows."""
+    if payload.get("view") == "market_comparison":
+        return MARKET_COMPARISON_COLUMNS
+    if payload.get("filters", {}).get("market") == "Nordics":
+        return NORDICS_DASHBOARD_COLUMNS
+    return None
+
+def _coerce_numeric(df: pd.DataFrame, numeric_cols: List[str]):
+    """
+    Coerces the given columns to numbers in place, filling gaps with 0. Compactly stored
+    integer columns are widened to int64 so grouped sums cannot overflow.
+    """
+    with timing_service.span("coerce"):
+        for col in [c for c in numeric_cols if c in df.columns]:
+            values = pd.to_numeric(df[col], errors='coerce').fillna(0)
+            df[col] = values.astype('int64') if pd.api.types.is_integer_dtype(values) else values
+
+def _month_order(months: pd.Series) -> pd.Series:
+    """Maps month names to their calendar position, also for categorical month columns."""
+    return months.astype(object).map(MONTH_ORDER)
+
+def process_dashboard_data(all_data, market_filter: str, output_format: str = None):
+    """Processes raw data (a list of rows or a DataFrame) from the dashboard view."""
+    if all_data is None or len(all_data) == 0:
         return {"kpi_summary": {}, "monthly_detail": []}
 
-    df = pd.DataFrame(all_data)
-    numeric_cols = ['year', 'target_budget_clean', 'actual_spend_clean', 'target_conversions_clean', 'actual_conversions_clean']
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    df = all_data if isinstance(all_data, pd.DataFrame) else pd.DataFrame(all_data)
+    _coerce_numeric(df, ['year', 'target_budget_clean', 'actual_spend_clean', 'target_conversions_clean', 'actual_conversions_clean'])
     
     if market_filter == "Nordics":
-        df['target_budget_eur'] = df.apply(lambda row: convert_to_eur(row['target_budget_clean'], row['currency']), axis=1)
-        df['actual_spend_eur'] = df.apply(lambda row: convert_to_eur(row['actual_spend_clean'], row['currency']), axis=1)
-        monthly_agg = df.groupby('month').agg(
+        df['target_budget_eur'] = convert_series_to_eur(df['target_budget_clean'], df['currency'])
+        df['actual_spend_eur'] = convert_series_to_eur(df['actual_spend_clean'], df['currency'])
+        monthly_agg = df.groupby('month', observed=True).agg(
             target_budget_clean=('target_budget_eur', 'sum'),
             actual_spend_clean=('actual_spend_eur', 'sum'),
             target_conversions_clean=('target_conversions_clean', 'sum'),
@@ -31,6 +82,10 @@ def process_dashboard_data(all_data: list, market_filter: str):
         monthly_agg['region'], monthly_agg['currency'] = 'Nordics', 'EUR'
         df = monthly_agg
 
+    kpi = _dashboard_kpis(df)
+    return {"source": "dashboard", "kpi_summary": kpi, "monthly_detail": frame_output(_sorted_by_month(df), output_format)}
+
+def _dashboard_kpis(df: pd.DataFrame) -> dict:
     kpi = {
         'target_budget': int(df['target_budget_clean'].sum()), 
         'actual_spend': int(df['actual_spend_clean'].sum()),
@@ -38,99 +93,346 @@ def process_dashboard_data(all_data: list, market_filter: str):
         'actual_conversions': int(df['actual_conversions_clean'].sum())
     }
     kpi['actual_cac'] = float(kpi['actual_spend'] / kpi['actual_conversions']) if kpi['actual_conversions'] > 0 else 0.0
-    
+    return kpi
+
+def _sorted_by_month(df: pd.DataFrame) -> pd.DataFrame:
     df.fillna(0, inplace=True)
     df.replace([float('inf'), -float('inf')], 0, inplace=True)
-    df['month_order'] = df['month'].map(MONTH_ORDER)
-    df = df.sort_values('month_order').drop(columns=['month_order'])
+    df['month_order'] = _month_order(df['month'])
+    return df.sort_values('month_order').drop(columns=['month_order'])
+
+def process_market_comparison(all_data, markets: Optional[List[str]], output_format: str = None):
+    """
+    Builds dashboard KPIs and monthly detail for several markets, plus the EUR-normalized
+    Nordics total, from one frame. Rows are converted to EUR once and aggregated in a single
+    region x month groupby; each market and the Nordics total are then read off that result.
+    Market figures stay in the market's own currency, as in the single-market dashboard.
+    """
+    df = all_data if isinstance(all_data, pd.DataFrame) else pd.DataFrame(all_data)
+    if df.empty:
+        grouped = pd.DataFrame(columns=['region', 'month', 'currency'] + _DASHBOARD_MEASURES + ['target_budget_eur', 'actual_spend_eur'])
+    else:
+        _coerce_numeric(df, _DASHBOARD_MEASURES)
+        df = df.assign(
+            target_budget_eur=convert_series_to_eur(df['target_budget_clean'], df['currency']),
+            actual_spend_eur=convert_series_to_eur(df['actual_spend_clean'], df['currency'])
+        )
+        grouped = df.groupby(['region', 'month'], observed=True).agg(
+            currency=('currency', 'first'),
+            **{col: (col, 'sum') for col in _DASHBOARD_MEASURES + ['target_budget_eur', 'actual_spend_eur']}
+        ).reset_index()
+        grouped[['region', 'month', 'currency']] = grouped[['region', 'month', 'currency']].astype(object)
+
+    regions = markets if markets else sorted(grouped['region'].dropna().unique())
+    results = {}
+    for region in regions:
+        detail = grouped.loc[grouped['region'] == region, ['month', 'region', 'currency'] + _DASHBOARD_MEASURES]
+        if detail.empty:
+            results[region] = {"kpi_summary": {}, "monthly_detail": []}
+            continue
+        results[region] = {"kpi_summary": _dashboard_kpis(detail), "monthly_detail": frame_output(_sorted_by_month(detail.reset_index(drop=True)), output_format)}
+
+    nordics = grouped[grouped['region'].isin(NORDIC_COUNTRIES) & grouped['region'].isin(regions)]
+    if not nordics.empty:
+        monthly = nordics.groupby('month').agg(
+            target_budget_clean=('target_budget_eur', 'sum'),
+            actual_spend_clean=('actual_spend_eur', 'sum'),
+            target_conversions_clean=('target_conversions_clean', 'sum'),
+            actual_conversions_clean=('actual_conversions_clean', 'sum')
+        ).reset_index()
+        monthly['region'], monthly['currency'] = 'Nordics', 'EUR'
+        results["Nordics"] = {"kpi_summary": _dashboard_kpis(monthly), "monthly_detail": frame_output(_sorted_by_month(monthly), output_format)}
+
+    return {"source": "dashboard_comparison", "markets": results}
+
+def _clean_analytics_frame(df: pd.DataFrame):
+    """Coerces the analytics measures in place and fills views/clicks from their cleaned columns."""
+    _coerce_numeric(df, ['total_budget_clean', 'actual_conversions_clean', 'views_clean', 'views', 'clicks_clean', 'clicks', 'ctr_clean', 'cvr_clean'])
     
-    return {"source": "dashboard", "kpi_summary": kpi, "monthly_detail": df.to_dict(orient='records')}
+    # Projected frames only carry the engagement columns when the view reads them
+    if {'views_clean', 'views'}.issubset(df.columns):
+        df['views'] = df['views_clean'].where(df['views_clean'] > 0, df['views'])
+    if {'clicks_clean', 'clicks'}.issubset(df.columns):
+        df['clicks'] = df['clicks_clean'].where(df['clicks_clean'] > 0, df['clicks'])
 
 def route_analytics_processing(df: pd.DataFrame, payload: Dict[str, Any]):
     """Cleans the analytics DataFrame and routes it to the correct processing function."""
-    numeric_cols = ['total_budget_clean', 'actual_conversions_clean', 'views_clean', 'views', 'clicks_clean', 'clicks', 'ctr_clean', 'cvr_clean']
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    
-    df['views'] = df['views_clean'].where(df['views_clean'] > 0, df['views'])
-    df['clicks'] = df['clicks_clean'].where(df['clicks_clean'] > 0, df['clicks'])
+    _clean_analytics_frame(df)
 
     view = payload.get("view", "summary")
     filters = payload.get("filters", {})
 
     if "influencer_name" in filters:
-        return _influencer_process_profile(df, filters.get("influencer_name"))
+        return _influencer_process_profile(df, filters.get("influencer_name"), payload.get("format"))
     if view == "summary":
         return _influencer_process_summary(df, payload)
     if view == "discovery_tiers":
         return _influencer_process_discovery_tiers(df, payload)
     if view == "monthly_breakdown":
-        return _influencer_process_monthly_breakdown(df)
+        return _influencer_process_monthly_breakdown(df, payload)
     if view == "custom_range_breakdown":
         return _influencer_process_custom_range_breakdown(df, payload)
     if view == "weekly_breakdown_by_number":
         return _influencer_process_weekly_breakdown_by_number(df, payload)
+    if view == "weekly_series":
+        return _influencer_process_weekly_series(df, payload)
     
     return {"error": f"Invalid view '{view}'."}
 
-def _influencer_process_summary(df: pd.DataFrame, payload: dict):
-    """Processes data for the summary view."""
-    grouped = df.groupby('influencer_name').apply(lambda x: pd.Series({
-        'campaign_count': int(len(x)),
-        'total_conversions': int(x['actual_conversions_clean'].sum()),
-        'total_views': int(x['views'].sum()),
-        'total_clicks': int(x['clicks'].sum()),
-        'markets': list(x['market'].unique()),
-        'assets': list(x['asset'].dropna().unique()),
-        'total_spend_eur': float(sum(convert_to_eur(row['total_budget_clean'], row['currency']) for _, row in x.iterrows())),
-        'avg_ctr': float(x[x['ctr_clean'] > 0]['ctr_clean'].mean()),
-        'avg_cvr': float(x[x['cvr_clean'] > 0]['cvr_clean'].mean())
-    })).reset_index()
+def _group_segments(codes: np.ndarray, group_count: int, values: np.ndarray, order: Optional[np.ndarray] = None):
+    """
+    Orders values by group, keeping row order within each group, and returns them with each
+    group's start and length. order, when given, is a stable argsort of codes (or a subset of one).
+    """
+    if order is None:
+        order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(group_count + 1))
+    return values[order], bounds[:-1], np.diff(bounds)
+
+def _reduce_groups_in_row_order(codes: np.ndarray, group_count: int, values: np.ndarray, reducer) -> list:
+    """Applies a reducer to each group's values, taken in their original row order."""
+    ordered, starts, lengths = _group_segments(codes, group_count, values)
+    return [reducer(ordered[start:start + length]) for start, length in zip(starts, lengths)]
+
+# Segments longer than this are summed one at a time with cumsum instead of position by position
+_SEQUENTIAL_STEP_LIMIT = 32
+
+def _sequential_sums(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Sums each segment left to right, exactly as Python's sum() over its values would. Short
+    segments are advanced together one position at a time, so each step is one array add;
+    each long one takes the last value of its cumsum, which accumulates in the same order.
+    """
+    sums = np.zeros(len(starts))
+    long = np.flatnonzero(lengths > _SEQUENTIAL_STEP_LIMIT)
+    for segment in long:
+        sums[segment] = np.cumsum(values[starts[segment]:starts[segment] + lengths[segment]])[-1]
+    short = np.flatnonzero((lengths > 0) & (lengths <= _SEQUENTIAL_STEP_LIMIT))
+    if len(short):
+        short = short[np.argsort(-lengths[short], kind='stable')]
+        short_starts, short_lengths = starts[short], lengths[short]
+        totals, active = np.zeros(len(short)), len(short)
+        for position in range(int(short_lengths[0])):
+            while short_lengths[active - 1] <= position:
+                active -= 1
+            totals[:active] += values[short_starts[:active] + position]
+        sums[short] = totals
+    return sums
+
+def _pairwise_sums(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Sums each segment with numpy's pairwise summation, as ndarray.sum() and Series.mean() do.
+    Segments of up to 128 values are summed together, reproducing its exact rounding: under 8
+    values sequentially, otherwise in 8 strided lanes; longer ones are summed one at a time.
+    """
+    sums = np.zeros(len(starts))
+    short = lengths < 8
+    if short.any():
+        sums[short] = _sequential_sums(values, starts[short], lengths[short])
+    block = (lengths >= 8) & (lengths <= 128)
+    if block.any():
+        block_starts, block_lengths = starts[block], lengths[block]
+        lanes = values[block_starts[:, None] + np.arange(8)]
+        unrolled = block_lengths - block_lengths % 8
+        for position in range(8, int(unrolled.max()), 8):
+            active = unrolled > position
+            lanes[active] += values[block_starts[active, None] + position + np.arange(8)]
+        totals = ((lanes[:, 0] + lanes[:, 1]) + (lanes[:, 2] + lanes[:, 3])) + ((lanes[:, 4] + lanes[:, 5]) + (lanes[:, 6] + lanes[:, 7]))
+        for offset in range(7):
+            active = block_lengths % 8 > offset
+            totals[active] += values[block_starts[active] + unrolled[active] + offset]
+        sums[block] = totals
+    for segment in np.flatnonzero(lengths > 128):
+        sums[segment] = values[starts[segment]:starts[segment] + lengths[segment]].sum()
+    return sums
+
+def _unique_values_by_group(df: pd.DataFrame, column: str, groups: pd.Index, dropna: bool = False) -> pd.Series:
+    """Lists the distinct values of a column per influencer, in order of first appearance."""
+    values = df[['influencer_name', column]]
+    if dropna:
+        values = values.dropna(subset=[column])
+    values = values.drop_duplicates()
+    codes = groups.get_indexer(values['influencer_name'])
+    unique_values = _reduce_groups_in_row_order(codes, len(groups), values[column].to_numpy(dtype=object), lambda v: v.tolist())
+    return pd.Series(unique_values, index=groups, dtype=object)
+
+def _summary_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregates campaign rows into one summary row per influencer. Counts come from one grouped
+    aggregation; the EUR spend and the CTR/CVR averages are reduced in row order with the same
+    rounding as the legacy per-influencer sum() and Series.mean(), so totals stay bit-identical.
+    """
+    grouped = df.groupby('influencer_name', observed=True, sort=False).agg(
+        campaign_count=('influencer_name', 'size'),
+        total_conversions=('actual_conversions_clean', 'sum'),
+        total_views=('views', 'sum'),
+        total_clicks=('clicks', 'sum')
+    ).sort_index().astype('int64')
+
+    codes = grouped.index.get_indexer(df['influencer_name'])
+    order = np.argsort(codes, kind='stable')
+    spend_eur = convert_series_to_eur(df['total_budget_clean'], df['currency']).to_numpy(dtype='float64')
+    grouped['markets'] = _unique_values_by_group(df, 'market', grouped.index)
+    grouped['assets'] = _unique_values_by_group(df, 'asset', grouped.index, dropna=True)
+    grouped['total_spend_eur'] = _sequential_sums(*_group_segments(codes, len(grouped), spend_eur, order))
+    for metric, target in [('ctr_clean', 'avg_ctr'), ('cvr_clean', 'avg_cvr')]:
+        values = df[metric].to_numpy(dtype='float64')
+        positive = values > 0
+        ordered, starts, lengths = _group_segments(codes, len(grouped), values, order[positive[order]])
+        with np.errstate(invalid='ignore'):
+            grouped[target] = _pairwise_sums(ordered, starts, lengths) / np.where(lengths > 0, lengths, np.nan)
+    return _finish_summary_frame(grouped)
+
+def _finish_summary_frame(grouped: pd.DataFrame) -> pd.DataFrame:
+    """Orders the summary columns and derives the effective CAC."""
+    grouped = grouped[['campaign_count', 'total_conversions', 'total_views', 'total_clicks', 'markets', 'assets', 'total_spend_eur', 'avg_ctr', 'avg_cvr']].reset_index()
     
     grouped['effective_cac_eur'] = (grouped['total_spend_eur'] / grouped['total_conversions']).fillna(0).replace([float('inf'), -float('inf')], 0)
     grouped.fillna({'avg_ctr': 0, 'avg_cvr': 0}, inplace=True)
-    
-    if sort_config := payload.get("sort"):
-        grouped = grouped.sort_values(by=sort_config.get("by", "total_spend_eur"), ascending=sort_config.get("order", "desc") == "asc")
-        
-    return {"source": "influencer_summary", "count": len(grouped), "items": grouped.to_dict(orient='records')}
+    return grouped
+
+def _page_bounds(payload: dict) -> Tuple[int, Optional[int]]:
+    """Reads the optional 'offset' and 'limit' of a payload, raising ValueError when they are not non-negative integers."""
+    offset, limit = payload.get("offset", 0), payload.get("limit")
+    try:
+        offset, limit = int(offset or 0), None if limit is None else int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("'limit' and 'offset' must be integers.")
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("'limit' and 'offset' must not be negative.")
+    return offset, limit
+
+def _encode_cursor(state: dict) -> str:
+    return base64.urlsafe_b64encode(dumps(state)).decode()
+
+def _decode_cursor(cursor: str) -> dict:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        by, ascending, (last_value, last_name) = state["by"], state["asc"], state["after"]
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise ValueError("Invalid 'cursor'.")
+    return {"by": by, "asc": ascending, "after": (last_value, last_name)}
+
+def _comparable(values: pd.Series) -> pd.Series:
+    """Returns categorical values as plain objects so they can be ordered against a cursor value."""
+    return values.astype(object) if isinstance(values.dtype, pd.CategoricalDtype) else values
+
+def _summary_page(grouped: pd.DataFrame, sort_config: Optional[dict], offset: int, limit: Optional[int], cursor: Optional[str]):
+    """
+    Selects one page of summary rows, ordered by the sort column and then by influencer name
+    so pages never overlap or skip rows. A cursor resumes after the last row of the previous
+    page; when only the top rows are needed they are picked with nlargest/nsmallest instead
+    of sorting every influencer. Returns the page and the cursor for the next one, if any.
+    """
+    by = sort_config.get("by", "total_spend_eur") if sort_config else None
+    ascending = sort_config.get("order", "desc") == "asc" if sort_config else True
+    if by is not None and by not in grouped.columns:
+        raise ValueError(f"Cannot sort by '{by}'.")
+
+    # The summary frame is in influencer name order, which breaks ties between equal sort values
+    candidates = grouped
+    if cursor:
+        state = _decode_cursor(cursor)
+        if state["by"] != by or state["asc"] != ascending:
+            raise ValueError("'cursor' does not match the requested sort.")
+        if offset:
+            raise ValueError("'cursor' and 'offset' cannot be combined.")
+        last_value, last_name = state["after"]
+        # Names (and any sort column) may be unordered categoricals, which only compare for equality
+        after = _comparable(candidates['influencer_name']) > last_name
+        if by is not None:
+            values = _comparable(candidates[by])
+            after = (values > last_value if ascending else values < last_value) | ((values == last_value) & after)
+        candidates = candidates[after.to_numpy(dtype=bool)]
+
+    wanted = None if limit is None else offset + limit
+    if by is None:
+        ordered = candidates
+    elif wanted is not None and wanted < len(candidates) and pd.api.types.is_numeric_dtype(candidates[by]):
+        top = candidates.nsmallest(wanted, by, keep='first') if ascending else candidates.nlargest(wanted, by, keep='first')
+        ordered = top.sort_index().sort_values(by, ascending=ascending, kind='stable')
+    else:
+        ordered = candidates.sort_values(by, ascending=ascending, kind='stable')
+
+    page = ordered.iloc[offset:wanted]
+    next_cursor = None
+    if wanted is not None and wanted < len(candidates) and not page.empty:
+        last = page.iloc[-1]
+        next_cursor = _encode_cursor({"by": by, "asc": ascending, "after": [None if by is None else last[by], last['influencer_name']]})
+    return page, next_cursor
+
+def _summary_result(grouped: pd.DataFrame, payload: dict):
+    """
+    Sorts a summary frame as requested and builds the summary response. With 'limit',
+    'offset' or 'cursor' only one page is returned, together with the total and a cursor
+    for the following page.
+    """
+    sort_config = payload.get("sort")
+    if all(payload.get(key) is None for key in ("limit", "offset", "cursor")):
+        if sort_config:
+            grouped = grouped.sort_values(by=sort_config.get("by", "total_spend_eur"), ascending=sort_config.get("order", "desc") == "asc", kind='stable')
+        return {"source": "influencer_summary", "count": len(grouped), "items": frame_output(grouped, payload.get("format"))}
+
+    try:
+        offset, limit = _page_bounds(payload)
+        page, next_cursor = _summary_page(grouped, sort_config, offset, limit, payload.get("cursor"))
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"source": "influencer_summary", "count": len(page), "total": len(grouped), "items": frame_output(page, payload.get("format")), "next_cursor": next_cursor}
+
+def _influencer_process_summary(df: pd.DataFrame, payload: dict):
+    """Processes data for the summary view."""
+    return _summary_result(_summary_frame(df), payload)
 
 def _influencer_process_discovery_tiers(df: pd.DataFrame, payload: dict):
     """Processes data for the discovery tiers view."""
-    summary_result = _influencer_process_summary(df, {})
-    if not summary_result.get("items"): return {"gold": [], "silver": [], "bronze": []}
-    
-    grouped = pd.DataFrame(summary_result["items"])
+    return _discovery_tiers_from_summary(_summary_frame(df), payload)
+
+def _discovery_tiers_from_summary(grouped: pd.DataFrame, payload: dict):
+    """
+    Splits influencer summary rows into gold, silver and bronze tiers by effective CAC. Rows
+    with a positive CAC are ranked cheapest first and cut into thirds; rows without one are
+    bronze, after the ranked bronze rows. Only the requested tier is serialized, optionally
+    limited to a page of 'limit' rows from 'offset'.
+    """
+    try:
+        offset, limit = _page_bounds(payload)
+    except ValueError as e:
+        return {"error": str(e)}
     if grouped.empty: return {"gold": [], "silver": [], "bronze": []}
-    
-    zero_cac = grouped[grouped['effective_cac_eur'] <= 0]
-    ranked = grouped[grouped['effective_cac_eur'] > 0].sort_values(by='effective_cac_eur', ascending=True)
-    count = len(ranked)
-    
-    top_third_index, mid_third_index = math.ceil(count / 3), math.ceil(count * 2 / 3)
-    gold_df, silver_df = ranked.iloc[:top_third_index], ranked.iloc[top_third_index:mid_third_index]
-    bronze_df = pd.concat([ranked.iloc[mid_third_index:], zero_cac])
-    
-    all_tiers = {
-        "gold": gold_df.to_dict(orient='records'),
-        "silver": silver_df.to_dict(orient='records'),
-        "bronze": bronze_df.to_dict(orient='records')
-    }
-    
+
+    cac = grouped['effective_cac_eur']
+    rank = cac.where(cac > 0).rank(method='first').to_numpy()
+    count = int(np.count_nonzero(~np.isnan(rank)))
+    tiers = np.select([rank <= math.ceil(count / 3), rank <= math.ceil(count * 2 / 3)], ['gold', 'silver'], 'bronze')
+    # Unranked rows sort after every ranked row, in their summary order
+    order_key = np.where(np.isnan(rank), count + np.arange(len(rank)), rank)
+
+    def tier_output(tier: str):
+        positions = np.flatnonzero(tiers == tier)
+        positions = positions[np.argsort(order_key[positions], kind='stable')]
+        page = positions[offset:None if limit is None else offset + limit]
+        return frame_output(grouped.iloc[page], payload.get("format"))
+
     if requested_tier := payload.get("filters", {}).get("tier"):
-        if requested_tier.lower() in all_tiers:
-            return {"source": "discovery_tier_specific", "tier": requested_tier, "items": all_tiers[requested_tier.lower()]}
-            
-    return {"source": "discovery_tiers", **all_tiers}
+        if requested_tier.lower() in ('gold', 'silver', 'bronze'):
+            tier = requested_tier.lower()
+            return {"source": "discovery_tier_specific", "tier": tier, "total": int(np.count_nonzero(tiers == tier)), "items": tier_output(tier)}
+
+    return {"source": "discovery_tiers", **{tier: tier_output(tier) for tier in ('gold', 'silver', 'bronze')}}
 
-def _influencer_process_monthly_breakdown(df: pd.DataFrame):
-    """Processes data for the monthly breakdown view."""
+def _influencer_process_monthly_breakdown(df: pd.DataFrame, payload: dict, monthly_summaries: Optional[Dict[str, dict]] = None):
+    """Processes data for the monthly breakdown view. Precomputed summaries per month are used when given."""
     if df.empty or 'month' not in df.columns: return {"monthly_data": []}
     df = df.dropna(subset=['month'])
+    df = df.assign(spend_eur=convert_series_to_eur(df['total_budget_clean'], df['currency']))
     results = []
     
-    for month_name, month_df in df.groupby('month'):
-        total_spend_eur = float(sum(convert_to_eur(row['total_budget_clean'], row['currency']) for _, row in month_df.iterrows()))
+    for month_name, month_df in df.groupby('month', observed=True):
+        if monthly_summaries is not None and month_name in monthly_summaries:
+            results.append({'month': month_name, 'summary': monthly_summaries[month_name], 'details': _monthly_details(month_df, payload)})
+            continue
+        total_spend_eur = float(month_df['spend_eur'].sum())
         total_conversions = int(month_df['actual_conversions_clean'].sum())
         
         summary = {
@@ -140,13 +442,113 @@ def _influencer_process_monthly_breakdown(df: pd.DataFrame):
             'influencer_count': int(month_df['influencer_name'].nunique())
         }
         
-        details = month_df[['influencer_name', 'market', 'currency', 'total_budget_clean', 'actual_conversions_clean']].rename(columns={'total_budget_clean': 'budget_local', 'actual_conversions_clean': 'conversions'})
-        details['cac_local'] = (details['budget_local'] / details['conversions']).fillna(0).replace([float('inf'), -float('inf')], 0)
-        results.append({'month': month_name, 'summary': summary, 'details': details.to_dict(orient='records')})
+        results.append({'month': month_name, 'summary': summary, 'details': _monthly_details(month_df, payload)})
         
     results.sort(key=lambda x: MONTH_ORDER.get(x['month'], 99))
     return {"source": "monthly_breakdown", "monthly_data": results}
 
+def _monthly_details(month_df: pd.DataFrame, payload: dict):
+    details = month_df[['influencer_name', 'market', 'currency', 'total_budget_clean', 'actual_conversions_clean']].rename(columns={'total_budget_clean': 'budget_local', 'actual_conversions_clean': 'conversions'})
+    details['cac_local'] = (details['budget_local'] / details['conversions']).fillna(0).replace([float('inf'), -float('inf')], 0)
+    return frame_output(details, payload.get("format"))
+
+# --- Rollups ---
+# Additive aggregates per (influencer, market, year, month) cell. Merging cells answers the
+# summary, discovery tier and monthly summaries without revisiting campaign rows. Each cell
+# (and each asset within it) also keeps the position of its first row, so merged market and
+# asset lists keep the order in which they first appear in the campaign rows.
+ROLLUP_KEYS = ['influencer_name', 'market', 'year', 'month']
+ROLLUP_VIEWS = ('summary', 'discovery_tiers', 'monthly_breakdown')
+ROLLUP_SOURCE_COLUMNS = ROLLUP_KEYS + ['asset', 'currency', 'total_budget_clean', 'actual_conversions_clean', 'views_clean', 'views', 'clicks_clean', 'clicks', 'ctr_clean', 'cvr_clean']
+
+def campaign_rollups(df: pd.DataFrame, first_rows: np.ndarray) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Aggregates campaign rows into rollup cells and per-cell asset counts. first_rows holds
+    each row's position in the campaign data.
+    """
+    df = df[[col for col in ROLLUP_SOURCE_COLUMNS if col in df.columns]].copy()
+    _clean_analytics_frame(df)
+    frame = pd.DataFrame({key: df[key].astype(object) for key in ROLLUP_KEYS})
+    frame['row_count'] = 1
+    frame['spend_eur'] = convert_series_to_eur(df['total_budget_clean'], df['currency']).to_numpy(dtype='float64')
+    frame['conversions'] = df['actual_conversions_clean'].to_numpy()
+    frame['views'] = df['views'].to_numpy()
+    frame['clicks'] = df['clicks'].to_numpy()
+    for metric, prefix in [('ctr_clean', 'ctr'), ('cvr_clean', 'cvr')]:
+        values = df[metric].to_numpy(dtype='float64')
+        frame[f'{prefix}_sum'] = np.where(values > 0, values, 0.0)
+        frame[f'{prefix}_count'] = (values > 0).astype('int64')
+    frame['first_row'] = np.asarray(first_rows, dtype='float64')
+
+    cells = merge_rollups(frame, ROLLUP_KEYS)
+    assets = frame.assign(asset=df['asset'].astype(object).to_numpy()).dropna(subset=['asset'])
+    assets = merge_rollups(assets[ROLLUP_KEYS + ['asset', 'row_count', 'first_row']], ROLLUP_KEYS + ['asset'])
+    return cells, assets
+
+def merge_rollups(rollups: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """
+    Sums the measures of rows sharing the same keys and keeps their earliest first_row.
+    Removals are merged as negated rows; cells whose row count reaches zero are dropped.
+    """
+    measures = [col for col in rollups.columns if col not in keys and col != 'first_row']
+    merged = rollups.groupby(keys, dropna=False, sort=False).agg(**{col: (col, 'sum') for col in measures}, first_row=('first_row', 'min')).reset_index()
+    return merged[merged['row_count'] > 0].reset_index(drop=True)
+
+def _first_seen_lists(rollups: pd.DataFrame, column: str, groups: pd.Index) -> pd.Series:
+    """Lists the distinct values of a rollup column per influencer, ordered by first row."""
+    values = rollups.sort_values('first_row', kind='stable')[['influencer_name', column]].drop_duplicates()
+    codes = groups.get_indexer(values['influencer_name'])
+    lists = _reduce_groups_in_row_order(codes, len(groups), values[column].to_numpy(dtype=object), lambda v: v.tolist())
+    return pd.Series(lists, index=groups, dtype=object)
+
+def _summary_frame_from_rollups(cells: pd.DataFrame, assets: pd.DataFrame) -> pd.DataFrame:
+    """Merges rollup cells into one summary row per influencer."""
+    grouped = cells.groupby('influencer_name').agg(
+        campaign_count=('row_count', 'sum'),
+        total_conversions=('conversions', 'sum'),
+        total_views=('views', 'sum'),
+        total_clicks=('clicks', 'sum'),
+        total_spend_eur=('spend_eur', 'sum'),
+        ctr_sum=('ctr_sum', 'sum'), ctr_count=('ctr_count', 'sum'),
+        cvr_sum=('cvr_sum', 'sum'), cvr_count=('cvr_count', 'sum')
+    )
+    grouped.index = grouped.index.astype(object)
+    grouped[['campaign_count', 'total_conversions', 'total_views', 'total_clicks']] = grouped[['campaign_count', 'total_conversions', 'total_views', 'total_clicks']].astype('int64')
+    grouped['markets'] = _first_seen_lists(cells, 'market', grouped.index)
+    grouped['assets'] = _first_seen_lists(assets, 'asset', grouped.index)
+    grouped['avg_ctr'] = grouped['ctr_sum'] / grouped['ctr_count'].where(grouped['ctr_count'] > 0)
+    grouped['avg_cvr'] = grouped['cvr_sum'] / grouped['cvr_count'].where(grouped['cvr_count'] > 0)
+    return _finish_summary_frame(grouped)
+
+def _monthly_summaries_from_rollups(cells: pd.DataFrame) -> Dict[str, dict]:
+    """Merges rollup cells into the per-month summary of the monthly breakdown."""
+    summaries = {}
+    for month_name, month_cells in cells.dropna(subset=['month']).groupby('month'):
+        total_spend_eur = float(month_cells['spend_eur'].sum())
+        total_conversions = int(month_cells['conversions'].sum())
+        summaries[month_name] = {
+            'total_spend_eur': total_spend_eur,
+            'total_conversions': total_conversions,
+            'avg_cac_eur': total_spend_eur / total_conversions if total_conversions > 0 else 0.0,
+            'influencer_count': int(month_cells['influencer_name'].nunique())
+        }
+    return summaries
+
+def route_rollup_processing(cells: pd.DataFrame, assets: pd.DataFrame, payload: Dict[str, Any], df: Optional[pd.DataFrame] = None):
+    """
+    Answers the summary, discovery tier and monthly breakdown views from rollups. The
+    monthly breakdown still lists its campaign rows, so it also needs the filtered rows in df.
+    """
+    view = payload.get("view", "summary")
+    if view == "summary":
+        return _summary_result(_summary_frame_from_rollups(cells, assets), payload)
+    if view == "discovery_tiers":
+        return _discovery_tiers_from_summary(_summary_frame_from_rollups(cells, assets), payload)
+    if view == "monthly_breakdown":
+        _clean_analytics_frame(df)
+        return _influencer_process_monthly_breakdown(df, payload, _monthly_summaries_from_rollups(cells))
+    return {"error": f"View '{view}' cannot be answered from rollups."}
+
 def _influencer_process_custom_range_breakdown(df: pd.DataFrame, payload: dict):
     """Processes data for a custom date range."""
     logger.info("Starting custom range breakdown processing.")
@@ -167,7 +569,7 @@ def _influencer_process_custom_range_breakdown(df: pd.DataFrame, payload: dict):
             logger.warning(f"No data found for the date range {date_from} to {date_to}")
             return {"summary": {}, "details": []}
 
-        total_spend_eur = float(sum(convert_to_eur(row['total_budget_clean'], row['currency']) for _, row in filtered_df.iterrows()))
+        total_spend_eur = float(convert_series_to_eur(filtered_df['total_budget_clean'], filtered_df['currency']).sum())
         total_conversions = int(filtered_df['actual_conversions_clean'].sum())
 
         summary = {
@@ -181,7 +583,7 @@ def _influencer_process_custom_range_breakdown(df: pd.DataFrame, payload: dict):
         details['cac_local'] = (details['budget_local'] / details['conversions']).fillna(0).replace([float('inf'), -float('inf')], 0)
         details['live_date'] = details['live_date'].dt.strftime('%Y-%m-%d')
 
-        return {"source": "custom_range_breakdown", "date_range": {"from": date_from, "to": date_to}, "summary": summary, "details": details.to_dict(orient='records')}
+        return {"source": "custom_range_breakdown", "date_range": {"from": date_from, "to": date_to}, "summary": summary, "details": frame_output(details, payload.get("format"))}
     except Exception as e:
         logger.error(f"Custom range breakdown failed: {e}\n{traceback.format_exc()}")
         return {"error": f"Custom range breakdown failed: {str(e)}"}
@@ -197,7 +599,7 @@ def _influencer_process_weekly_breakdown_by_number(df: pd.DataFrame, payload: di
             logger.warning(f"No data found for week number {week_number} after initial filtering.")
             return {"summary": {}, "details": []}
         
-        total_spend_eur = float(sum(convert_to_eur(row['total_budget_clean'], row['currency']) for _, row in df.iterrows()))
+        total_spend_eur = float(convert_series_to_eur(df['total_budget_clean'], df['currency']).sum())
         total_conversions = int(df['actual_conversions_clean'].sum())
 
         summary = {
@@ -211,19 +613,91 @@ def _influencer_process_weekly_breakdown_by_number(df: pd.DataFrame, payload: di
         details['cac_local'] = (details['budget_local'] / details['conversions']).fillna(0).replace([float('inf'), -float('inf')], 0)
         details['live_date'] = pd.to_datetime(details['live_date'], errors='coerce').dt.strftime('%Y-%m-%d')
         
-        return {"source": "weekly_breakdown_by_number", "week_number": week_number, "summary": summary, "details": details.to_dict(orient='records')}
+        return {"source": "weekly_breakdown_by_number", "week_number": week_number, "summary": summary, "details": frame_output(details, payload.get("format"))}
     except Exception as e:
         logger.error(f"Weekly breakdown by number failed: {e}\n{traceback.format_exc()}")
         return {"error": f"Weekly breakdown by number failed: {str(e)}"}
 
-def _influencer_process_profile(df: pd.DataFrame, influencer_name: str):
+def _ratio(numerator: pd.Series, denominator: pd.Series) -> pd.Series:
+    return (numerator / denominator).where(denominator > 0, 0.0)
+
+def _year_week_index(observed: pd.MultiIndex) -> pd.MultiIndex:
+    """
+    Every (year, week) from the first observed week to the last. A year runs to its last ISO
+    week (52 or 53), or further if the data numbers a later week.
+    """
+    last_observed = pd.Series(observed.get_level_values(1), index=observed.get_level_values(0)).groupby(level=0).max()
+    (first_year, first_week), (last_year, last_week) = observed[0], observed[-1]
+    pairs = []
+    for year in range(first_year, last_year + 1):
+        weeks_in_year = max(datetime.date(year, 12, 28).isocalendar()[1], int(last_observed.get(year, 0)))
+        start, end = first_week if year == first_year else 1, last_week if year == last_year else weeks_in_year
+        pairs.extend((year, week) for week in range(start, end + 1))
+    return pd.MultiIndex.from_tuples(pairs, names=['year', 'week'])
+
+def _influencer_process_weekly_series(df: pd.DataFrame, payload: dict):
+    """
+    Processes every week of the filtered data in one pass: per-week EUR spend, conversions,
+    CAC and influencer counts, with rolling and cumulative windows over consecutive weeks.
+    Weeks are keyed by year and week number, so windows run across year boundaries in order.
+    """
+    logger.info("Starting weekly series processing.")
+    try:
+        years, weeks = pd.to_numeric(df['year'], errors='coerce'), pd.to_numeric(df['wk_clean'], errors='coerce')
+        dated = years.notna() & weeks.notna()
+        df = df.loc[dated].assign(year=years[dated].astype(int), wk_clean=weeks[dated].astype(int))
+        if df.empty:
+            logger.warning("No data with a year and week number found for the weekly series.")
+            return {"summary": {}, "weeks": []}
+
+        df = df.assign(spend_eur=convert_series_to_eur(df['total_budget_clean'], df['currency']))
+        weekly = df.groupby(['year', 'wk_clean']).agg(
+            spend_eur=('spend_eur', 'sum'),
+            conversions=('actual_conversions_clean', 'sum'),
+            influencer_count=('influencer_name', 'nunique')
+        )
+        # Weeks without campaigns are kept as zero rows so windows span weeks, not rows
+        full_index = _year_week_index(weekly.index)
+        weekly = weekly.set_axis(full_index.get_indexer(weekly.index)).reindex(range(len(full_index)), fill_value=0)
+        weekly['conversions'] = weekly['conversions'].astype(int)
+        weekly['cac_eur'] = _ratio(weekly['spend_eur'], weekly['conversions'])
+
+        rolling = weekly[['spend_eur', 'conversions']].rolling(WEEKLY_ROLLING_WEEKS, min_periods=1).sum()
+        weekly['rolling_spend_eur'] = rolling['spend_eur']
+        weekly['rolling_conversions'] = rolling['conversions'].astype(int)
+        weekly['rolling_cac_eur'] = _ratio(weekly['rolling_spend_eur'], weekly['rolling_conversions'])
+        weekly['cumulative_spend_eur'] = weekly['spend_eur'].cumsum()
+        weekly['cumulative_conversions'] = weekly['conversions'].cumsum()
+        weekly['cumulative_cac_eur'] = _ratio(weekly['cumulative_spend_eur'], weekly['cumulative_conversions'])
+        # Distinct influencers to date: count each influencer in the first week they appear
+        positions = pd.Series(full_index.get_indexer(pd.MultiIndex.from_arrays([df['year'], df['wk_clean']])), index=df.index)
+        first_weeks = positions.groupby(df['influencer_name'], observed=True).min()
+        weekly['cumulative_influencers'] = np.bincount(first_weeks, minlength=len(full_index)).cumsum()
+        weekly.insert(0, 'week', full_index.get_level_values('week'))
+        weekly.insert(0, 'year', full_index.get_level_values('year'))
+
+        total_spend_eur = float(weekly['spend_eur'].sum())
+        total_conversions = int(weekly['conversions'].sum())
+        summary = {
+            'total_spend_eur': total_spend_eur,
+            'total_conversions': total_conversions,
+            'avg_cac_eur': total_spend_eur / total_conversions if total_conversions > 0 else 0.0,
+            'influencer_count': len(first_weeks),
+            'rolling_weeks': WEEKLY_ROLLING_WEEKS
+        }
+        return {"source": "weekly_series", "summary": summary, "weeks": frame_output(weekly, payload.get("format"))}
+    except Exception as e:
+        logger.error(f"Weekly series failed: {e}\n{traceback.format_exc()}")
+        return {"error": f"Weekly series failed: {str(e)}"}
+
+def _influencer_process_profile(df: pd.DataFrame, influencer_name: str, output_format: str = None):
     """Processes data for a single influencer profile view."""
     influencer_df = df.copy()
     influencer_df['cac_local'] = (influencer_df['total_budget_clean'] / influencer_df['actual_conversions_clean']).fillna(0).replace([float('inf'), -float('inf')], 0)
     influencer_df['ctr'] = (influencer_df['clicks'] / influencer_df['views']).fillna(0).replace([float('inf'), -float('inf')], 0)
     
     if 'month' in influencer_df.columns:
-        influencer_df['month_order'] = influencer_df['month'].map(MONTH_ORDER)
+        influencer_df['month_order'] = _month_order(influencer_df['month'])
         influencer_df = influencer_df.sort_values(by=['year', 'month_order'])
         
-    return {"source": "influencer_detail", "campaigns": influencer_df.to_dict(orient='records')}
+    return {"source": "influencer_detail", "campaigns": frame_output(influencer_df, output_format)}
@@ -0,0 +1,130 @@
+# ================================================
+# FILE: app/services/rollup_service.py
+# PURPOSE: Incrementally maintained rollups of the campaign snapshot
+# ================================================
+import threading
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Tuple
+from app.config import logger
+from . import processing_service, snapshot_service
+
+class RollupStore:
+    """
+    Holds the rollup cells of one campaign frame. The store is rebuilt when it is pointed at a
+    different frame, and adding, removing or replacing rows only merges the changed rows'
+    aggregates into the cells they touch.
+    """
+
+    def __init__(self):
+        self._cells = None
+        self._assets = None
+        self._cell_index = None
+        self._asset_index = None
+        self._source = None
+        self._next_row = 0
+        self._lock = threading.RLock()
+
+    @property
+    def cell_count(self) -> int:
+        return 0 if self._cells is None else len(self._cells)
+
+    def can_answer(self, clauses: List[snapshot_service.FilterClause]) -> bool:
+        """True when every clause filters on a rollup key, so filtering cells equals filtering rows."""
+        return all(column in processing_service.ROLLUP_KEYS for _, column, _ in clauses)
+
+    def rebuild(self, frame: pd.DataFrame):
+        """Recomputes every cell from a full campaign frame."""
+        cells, assets = processing_service.campaign_rollups(frame, np.arange(len(frame)))
+        with self._lock:
+            self._cells, self._assets, self._source, self._next_row = cells, assets, frame, len(frame)
+            self._cell_index = pd.MultiIndex.from_frame(cells[processing_service.ROLLUP_KEYS])
+            self._asset_index = pd.MultiIndex.from_frame(assets[processing_service.ROLLUP_KEYS + ['asset']])
+        logger.info(f"Built {len(cells)} rollup cells from {len(frame)} campaign rows.")
+
+    def describes(self, frame: pd.DataFrame) -> bool:
+        """True when the rollups were built from, or kept up to date with, this exact frame."""
+        return frame is not None and self._source is frame
+
+    def ensure_built(self, frame: pd.DataFrame):
+        """Rebuilds the rollups unless they already describe this exact frame."""
+        if self.describes(frame):
+            return
+        with self._lock:
+            # Another thread may have built them while this one waited
+            if not self.describes(frame):
+                self.rebuild(frame)
+
+    def add_rows(self, rows: pd.DataFrame, frame: Optional[pd.DataFrame] = None, first_rows: Optional[np.ndarray] = None):
+        """
+        Merges campaign rows into the cells. frame is the campaign data they now belong to and
+        first_rows their positions in it; rows without positions are treated as appended.
+        """
+        with self._lock:
+            if first_rows is None:
+                first_rows = np.arange(self._next_row, self._next_row + len(rows))
+            self._next_row = max(self._next_row, int(np.max(first_rows, initial=-1)) + 1)
+            self._merge(*processing_service.campaign_rollups(rows, first_rows), frame)
+
+    def remove_rows(self, rows: pd.DataFrame, frame: Optional[pd.DataFrame] = None):
+        """
+        Subtracts deleted campaign rows from the cells, dropping cells that become empty. A
+        remaining cell keeps its first row position, so list order reflects first insertion.
+        """
+        with self._lock:
+            cells, assets = processing_service.campaign_rollups(rows, np.zeros(len(rows)))
+            self._merge(self._negated(cells), self._negated(assets), frame)
+
+    def replace_rows(self, old_rows: pd.DataFrame, new_rows: pd.DataFrame, frame: Optional[pd.DataFrame] = None, first_rows: Optional[np.ndarray] = None):
+        """Applies changed campaign rows: their old versions are subtracted and the new ones added."""
+        with self._lock:
+            self.remove_rows(old_rows)
+            self.add_rows(new_rows, frame, first_rows)
+
+    def select(self, clauses: List[snapshot_service.FilterClause]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Returns the cells, and their asset counts, that satisfy all clauses."""
+        with self._lock:
+            cells, assets = self._cells, self._assets
+        return snapshot_service.apply_clauses(cells, clauses), snapshot_service.apply_clauses(assets, clauses)
+
+    @staticmethod
+    def _negated(rollups: pd.DataFrame) -> pd.DataFrame:
+        measures = [col for col in rollups.columns if col not in processing_service.ROLLUP_KEYS + ['asset', 'first_row']]
+        # A removal never moves a cell's first row, so it carries none
+        return rollups.assign(**{col: -rollups[col] for col in measures}, first_row=np.nan)
+
+    @staticmethod
+    def _merge_touched(rollups: pd.DataFrame, index: pd.MultiIndex, delta: pd.DataFrame, keys: List[str]) -> Tuple[pd.DataFrame, pd.MultiIndex]:
+        """
+        Adds delta cells to the cells with the same keys, looked up in the kept key index, and
+        appends cells for new keys. Cells whose row count reaches zero are dropped; the key
+        index only changes, and is rehashed, when cells are added or dropped.
+        """
+        delta_index = pd.MultiIndex.from_frame(delta[keys])
+        positions = index.get_indexer(delta_index)
+        found = positions >= 0
+        rows = positions[found]
+        # Assigning whole columns leaves the arrays of frames already handed out by select() untouched
+        updated = rollups.copy(deep=False)
+        for col in rollups.columns:
+            if col in keys:
+                continue
+            values = rollups[col].to_numpy().astype(np.result_type(rollups[col].dtype, delta[col].dtype))
+            if col == 'first_row':
+                values[rows] = np.fmin(values[rows], delta[col].to_numpy()[found])
+            else:
+                values[rows] += delta[col].to_numpy()[found]
+            updated[col] = values
+        if not found.all():
+            updated = pd.concat([updated, delta[~found]], ignore_index=True)
+            index = index.append(delta_index[~found])
+        live = updated['row_count'].to_numpy() > 0
+        if not live.all():
+            updated, index = updated[live].reset_index(drop=True), index[live]
+        return updated, index
+
+    def _merge(self, cells: pd.DataFrame, assets: pd.DataFrame, frame: Optional[pd.DataFrame]):
+        self._cells, self._cell_index = self._merge_touched(self._cells, self._cell_index, cells, processing_service.ROLLUP_KEYS)
+        self._assets, self._asset_index = self._merge_touched(self._assets, self._asset_index, assets, processing_service.ROLLUP_KEYS + ['asset'])
+        if frame is not None:
+            self._source = frame
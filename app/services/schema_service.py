@@ -0,0 +1,72 @@
+# ================================================
+# FILE: app/services/schema_service.py
+# PURPOSE: Schema-driven construction of compact, typed DataFrames for the views
+# ================================================
+import pandas as pd
+from typing import Dict, Any, List
+from app.config import CAMPAIGN_VIEW_NAME, TARGET_VIEW_NAME
+
+# Column kinds: 'category' for repeated low-cardinality strings, 'number' for numeric columns.
+# Integer columns are stored at the narrowest width; processing widens them back to int64
+# before aggregating. Floats stay float64 so EUR totals are computed exactly as before.
+VIEW_SCHEMAS = {
+    CAMPAIGN_VIEW_NAME: {
+        'influencer_name': 'category', 'market': 'category', 'currency': 'category', 'month': 'category', 'asset': 'category',
+        'year': 'number', 'wk_clean': 'number', 'total_budget_clean': 'number', 'actual_conversions_clean': 'number',
+        'views_clean': 'number', 'clicks_clean': 'number', 'ctr_clean': 'number', 'cvr_clean': 'number'
+    },
+    # The target view holds a handful of rows per region and month, and its processing fills
+    # missing values with 0, so only its numbers are typed
+    TARGET_VIEW_NAME: {
+        'year': 'number', 'target_budget_clean': 'number', 'actual_spend_clean': 'number',
+        'target_conversions_clean': 'number', 'actual_conversions_clean': 'number'
+    }
+}
+
+def _typed_column(values: pd.Series, kind: str) -> pd.Series:
+    if kind == 'category':
+        return values.astype('category')
+    numbers = pd.to_numeric(values, errors='coerce')
+    if pd.api.types.is_integer_dtype(numbers):
+        return pd.to_numeric(numbers, downcast='integer')
+    return numbers
+
+def build_frame(rows, view_name: str) -> pd.DataFrame:
+    """Builds a DataFrame from fetched rows (or an untyped frame), applying the view's schema in one pass."""
+    frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+    schema = VIEW_SCHEMAS.get(view_name, {})
+    typed = {col: _typed_column(frame[col], kind) for col, kind in schema.items() if col in frame.columns}
+    return frame.assign(**typed) if typed else frame
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenates typed page frames. Categorical columns are first given the same sorted
+    categories; pd.concat would otherwise fall back to object dtype when pages differ.
+    """
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    for col in frames[0].columns:
+        if all(isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames if col in frame.columns):
+            categories = sorted(set().union(*(frame[col].cat.categories for frame in frames if col in frame.columns)))
+            for frame in frames:
+                if col in frame.columns:
+                    frame[col] = frame[col].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+def memory_report(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Compares the deep memory footprint of a typed frame with the untyped frame it replaces."""
+    columns = {}
+    for col in frame.columns:
+        typed_bytes = int(frame[col].memory_usage(index=False, deep=True))
+        untyped_bytes = int(pd.Series(frame[col].tolist()).memory_usage(index=False, deep=True))
+        columns[col] = {"dtype": str(frame[col].dtype), "typed_bytes": typed_bytes, "untyped_bytes": untyped_bytes}
+    typed_total = sum(c["typed_bytes"] for c in columns.values())
+    untyped_total = sum(c["untyped_bytes"] for c in columns.values())
+    return {
+        "rows": len(frame), "typed_bytes": typed_total, "untyped_bytes": untyped_total,
+        "saved_ratio": round(1 - typed_total / untyped_total, 4) if untyped_total else 0.0,
+        "columns": columns
+    }
@@ -0,0 +1,141 @@
+# ================================================
+# FILE: app/services/search_service.py
+# PURPOSE: In-memory index over influencer names for typeahead search and exact name resolution
+# ================================================
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+# Ranking of match kinds, best first, and the trigram similarity a fuzzy match needs
+MATCH_KINDS = ('exact', 'prefix', 'substring', 'fuzzy')
+FUZZY_MIN_SIMILARITY = 0.35
+
+def normalize_name(name) -> str:
+    """Case-folds a name, strips accents and collapses whitespace."""
+    decomposed = unicodedata.normalize('NFKD', str(name))
+    return ' '.join(''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold().split())
+
+def _trigrams(text: str, padded: bool = True) -> set:
+    if padded:
+        text = f'  {text} '
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class NameIndex:
+    """
+    Resolves partial or misspelled names to the exact distinct names it was built from. Names
+    are normalized once; prefixes of the full name and of each word are found by binary search
+    over sorted keys, substrings through a trigram inverted index, and misspellings by trigram
+    similarity.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.names = sorted({name for name in names if isinstance(name, str) and name.strip()})
+        self.normalized = [normalize_name(name) for name in self.names]
+        self._folded = [name.casefold() for name in self.names]
+        self._by_normalized: Dict[str, List[int]] = defaultdict(list)
+        postings = defaultdict(list)
+        gram_counts = []
+        prefix_keys = []
+        for name_id, normalized in enumerate(self.normalized):
+            self._by_normalized[normalized].append(name_id)
+            grams = _trigrams(normalized)
+            for gram in grams:
+                postings[gram].append(name_id)
+            gram_counts.append(len(grams))
+            prefix_keys.append((normalized, name_id))
+            prefix_keys.extend((word, name_id) for word in normalized.split()[1:])
+        prefix_keys.sort()
+        self._prefix_keys = [key for key, _ in prefix_keys]
+        self._prefix_ids = [name_id for _, name_id in prefix_keys]
+        # Sorted posting arrays per trigram, so candidate sets are intersected and counted in numpy
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._gram_counts = np.array(gram_counts, dtype=np.int32)
+        self._empty = np.array([], dtype=np.int32)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _prefix_ids_for(self, query: str) -> set:
+        ids, position = set(), bisect_left(self._prefix_keys, query)
+        while position < len(self._prefix_keys) and self._prefix_keys[position].startswith(query):
+            ids.add(self._prefix_ids[position])
+            position += 1
+        return ids
+
+    def _substring_ids_for(self, query: str) -> set:
+        grams = sorted(_trigrams(query, padded=False), key=lambda gram: len(self._postings.get(gram, self._empty)))
+        if grams:
+            candidates = self._postings.get(grams[0], self._empty)
+            for gram in grams[1:]:
+                if not len(candidates):
+                    break
+                candidates = np.intersect1d(candidates, self._postings.get(gram, self._empty), assume_unique=True)
+            candidates = candidates.tolist()
+        else:
+            candidates = range(len(self.names))
+        return {name_id for name_id in candidates if query in self.normalized[name_id]}
+
+    def _fuzzy_scores_for(self, query: str) -> Dict[int, float]:
+        grams = _trigrams(query)
+        matched = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not matched:
+            return {}
+        shared = np.bincount(np.concatenate(matched), minlength=len(self.names))
+        # Jaccard similarity of the query's and each name's trigram sets
+        similarity = shared / (len(grams) + self._gram_counts - shared)
+        close = np.flatnonzero(similarity >= FUZZY_MIN_SIMILARITY)
+        return dict(zip(close.tolist(), similarity[close].tolist()))
+
+    def search(self, query: str, limit: Optional[int] = 10) -> List[dict]:
+        """Ranks names for a typeahead query: exact, then prefix, substring and fuzzy matches."""
+        query = normalize_name(query)
+        if not query:
+            return []
+        kinds = {name_id: 'exact' for name_id in self._by_normalized.get(query, [])}
+        for kind, ids in (('prefix', self._prefix_ids_for(query)), ('substring', self._substring_ids_for(query))):
+            for name_id in ids:
+                kinds.setdefault(name_id, kind)
+        fuzzy_scores = self._fuzzy_scores_for(query)
+        for name_id in fuzzy_scores:
+            kinds.setdefault(name_id, 'fuzzy')
+        scores = {name_id: fuzzy_scores[name_id] if kind == 'fuzzy' else 1.0 for name_id, kind in kinds.items()}
+        ranked = sorted(kinds, key=lambda name_id: (MATCH_KINDS.index(kinds[name_id]), -scores[name_id], self.names[name_id]))
+        return [{"influencer_name": self.names[name_id], "match": kinds[name_id], "score": round(scores[name_id], 4)}
+                for name_id in ranked[:limit]]
+
+    def resolve(self, query: str, limit: Optional[int] = None) -> Optional[List[str]]:
+        """
+        Returns the exact names a profile query refers to: every name containing the query,
+        as an ilike substring filter would match. Unlike search(), matching only ignores case,
+        so accents and spacing must be typed as stored. Misspellings resolve to nothing rather
+        than to someone else's profile; fuzzy matches are only offered by search(). Returns
+        None when more than limit names match.
+        """
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+        # Names containing the case-folded query also contain its normalized form, so the trigram candidates cover them
+        folded = str(query).casefold()
+        ids = {name_id for name_id in self._substring_ids_for(normalized) if folded in self._folded[name_id]}
+        if limit is not None and len(ids) > limit:
+            return None
+        return [self.names[name_id] for name_id in sorted(ids)]
+
+class NameIndexCache:
+    """Keeps the name index of the latest frame of names, rebuilding it when the frame is replaced."""
+
+    def __init__(self):
+        self._index = None
+        self._source = None
+        self._lock = threading.Lock()
+
+    def for_frame(self, frame: pd.DataFrame) -> NameIndex:
+        with self._lock:
+            if self._source is not frame:
+                names = frame['influencer_name'].dropna().unique() if 'influencer_name' in frame.columns else []
+                self._index, self._source = NameIndex(names), frame
+            return self._index
@@ -0,0 +1,123 @@
+# ================================================
+# FILE: app/services/shared_snapshot_service.py
+# PURPOSE: Arrow snapshot files shared by worker processes through memory mapping
+# ================================================
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+import pandas as pd
+from app.config import logger, SNAPSHOT_TTL_SECONDS
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional; without it every worker keeps its own snapshot
+    pa = None
+
+try:
+    import fcntl
+except ImportError:  # no cross-process lock outside POSIX; concurrent refreshes then both fetch
+    fcntl = None
+
+def _arrow_column(values: pd.Series):
+    """
+    Converts a column so it maps back without copying where possible: numbers keep NaN as a
+    value rather than a null, and categoricals become dictionary arrays of their codes.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        return pa.DictionaryArray.from_arrays(pa.array(codes, mask=codes < 0), pa.array(values.cat.categories.astype(object).to_numpy(), from_pandas=True))
+    if values.dtype.kind in 'biuf':
+        return pa.array(values.to_numpy())
+    return pa.array(values.astype(object).to_numpy(), from_pandas=True)
+
+def write_frame(path: str, frame: pd.DataFrame):
+    """
+    Writes a frame as an uncompressed Arrow IPC (Feather v2) file. The file is written next to
+    its destination and renamed over it, so readers see either the old or the new file whole.
+    """
+    table = pa.Table.from_arrays([_arrow_column(frame[col]) for col in frame.columns], names=[str(col) for col in frame.columns])
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-', suffix='.arrow')
+    try:
+        with os.fdopen(handle, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            sink.flush()
+            os.fsync(sink.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def map_frame(path: str) -> pd.DataFrame:
+    """
+    Memory-maps an Arrow snapshot file as a read-only frame. Numeric columns point straight
+    into the mapped pages, which every process mapping the file shares.
+    """
+    with pa.memory_map(path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+class SharedSnapshotFile:
+    """
+    A view's snapshot kept in one Arrow file that every worker maps. A worker whose snapshot
+    is due reuses the file if another worker refreshed it within max_age_seconds; otherwise it
+    loads the view, rewrites the file and maps it. A lock file makes concurrent workers wait
+    for one refresh instead of each fetching the view.
+    """
+
+    def __init__(self, view_name: str, directory: str, max_age_seconds: float = SNAPSHOT_TTL_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.view_name = view_name
+        self.path = os.path.join(directory, f"{view_name}.arrow")
+        self.max_age_seconds = max_age_seconds
+        self.clock = clock
+        self._refresh_requested = False
+        os.makedirs(directory, exist_ok=True)
+
+    def request_refresh(self):
+        """Makes the next load rewrite the file even if it is still fresh."""
+        self._refresh_requested = True
+
+    def age_seconds(self) -> Optional[float]:
+        try:
+            return self.clock() - os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _is_fresh(self) -> bool:
+        age = self.age_seconds()
+        return age is not None and age < self.max_age_seconds
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self, fetch: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Returns the mapped snapshot, refreshing the shared file through fetch() first when it is due."""
+        forced, self._refresh_requested = self._refresh_requested, False
+        if not forced and self._is_fresh():
+            return self._map("Mapped")
+        with self._locked():
+            # Another worker may have refreshed the file while this one waited for the lock
+            if forced or not self._is_fresh():
+                started = time.perf_counter()
+                write_frame(self.path, fetch())
+                logger.info(f"Wrote shared snapshot of '{self.view_name}' in {time.perf_counter() - started:.2f}s.")
+            return self._map("Mapped refreshed")
+
+    def _map(self, action: str) -> pd.DataFrame:
+        started = time.perf_counter()
+        frame = map_frame(self.path)
+        logger.info(f"{action} shared snapshot of '{self.view_name}' ({len(frame)} rows) in {(time.perf_counter() - started) * 1000:.1f} ms.")
+        return frame
@@ -0,0 +1,135 @@
+# ================================================
+# FILE: app/services/snapshot_service.py
+# PURPOSE: In-process snapshots of the Supabase views with local filtering
+# ================================================
+import threading
+import time
+import numpy as np
+import pandas as pd
+from operator import gt, ge, lt, le
+from typing import Callable, List, Optional, Tuple, Any
+from app.config import logger, SNAPSHOT_TTL_SECONDS
+from . import schema_service
+
+FilterClause = Tuple[str, str, Any]
+_COMPARISONS = {'gt': gt, 'gte': ge, 'lt': lt, 'lte': le}
+
+def apply_clauses(df: pd.DataFrame, clauses: List[FilterClause], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Evaluates (operator, column, value) filter clauses against a frame with boolean masks,
+    keeping only the given columns (all of them when None) in the single resulting copy.
+    """
+    if df.empty:
+        return df.copy()
+    mask = np.ones(len(df), dtype=bool)
+    for operator, column, value in clauses:
+        values = df[column]
+        if operator == 'eq':
+            mask &= (values == value).to_numpy(dtype=bool, na_value=False)
+        elif operator == 'in':
+            mask &= values.isin(value).to_numpy(dtype=bool)
+        elif operator == 'ilike':
+            mask &= values.str.contains(value, case=False, regex=False, na=False).to_numpy(dtype=bool)
+        elif operator in _COMPARISONS:
+            mask &= _COMPARISONS[operator](values, value).to_numpy(dtype=bool, na_value=False)
+        else:
+            raise ValueError(f"Unsupported filter operator '{operator}'.")
+    return df.loc[mask, columns if columns is not None else df.columns].reset_index(drop=True)
+
+class SortedRangeIndex:
+    """
+    Row positions of a frame ordered by one column's values parsed as dates, so the rows
+    within a date range are found by binary search instead of a scan of every row.
+    """
+
+    def __init__(self, values: pd.Series):
+        parsed = pd.to_datetime(values, errors='coerce').to_numpy(dtype='datetime64[ns]')
+        valid = np.flatnonzero(~np.isnat(parsed))
+        self.order = valid[np.argsort(parsed[valid], kind='stable')]
+        self.sorted_values = parsed[self.order]
+
+    def range_positions(self, clauses: List[FilterClause]) -> np.ndarray:
+        """Returns the ascending row positions satisfying every gt/gte/lt/lte clause on the column."""
+        lower, upper = 0, len(self.order)
+        for operator, _, value in clauses:
+            bound = pd.Timestamp(value).to_datetime64().astype('datetime64[ns]')
+            if operator in ('gt', 'gte'):
+                lower = max(lower, int(np.searchsorted(self.sorted_values, bound, side='left' if operator == 'gte' else 'right')))
+            else:
+                upper = min(upper, int(np.searchsorted(self.sorted_values, bound, side='right' if operator == 'lte' else 'left')))
+        return np.sort(self.order[lower:upper]) if upper > lower else np.array([], dtype=np.intp)
+
+class ViewSnapshot:
+    """Holds an in-memory copy of one Supabase view, refreshed on a TTL or on demand."""
+
+    def __init__(self, view_name: str, loader: Callable[[], pd.DataFrame], ttl_seconds: float = SNAPSHOT_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic, date_columns: Tuple[str, ...] = ()):
+        self.view_name = view_name
+        self.date_columns = tuple(date_columns)
+        self._range_indexes = {}
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._frame = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    @property
+    def loaded_at(self):
+        return self._loaded_at
+
+    def is_stale(self) -> bool:
+        """True when nothing is loaded yet or the snapshot has outlived its TTL."""
+        return self._frame is None or self.clock() - self._loaded_at >= self.ttl_seconds
+
+    def on_refresh(self, callback: Callable[[str], None]):
+        """Registers a callback invoked with the view name after every successful refresh."""
+        self._listeners.append(callback)
+
+    def get_frame(self) -> pd.DataFrame:
+        """Returns the current snapshot, reloading it first if it is stale."""
+        if self.is_stale():
+            return self.refresh(force=False)
+        return self._frame
+
+    def refresh(self, force: bool = True) -> pd.DataFrame:
+        """Reloads the view from Supabase. With force=False another thread's fresh load is reused."""
+        with self._lock:
+            if not force and not self.is_stale():
+                return self._frame
+            started = time.perf_counter()
+            frame = self.loader()
+            self._frame, self._loaded_at, self._range_indexes = frame, self.clock(), {}
+            logger.success(f"Loaded snapshot of '{self.view_name}' with {len(frame)} rows in {time.perf_counter() - started:.2f}s.")
+        for listener in self._listeners:
+            listener(self.view_name)
+        return frame
+
+    def _range_index(self, frame: pd.DataFrame, column: str) -> SortedRangeIndex:
+        """Builds a date column's range index on first use, once per loaded frame."""
+        indexes = self._range_indexes
+        if (cached := indexes.get(column)) is None or cached[0] is not frame:
+            cached = indexes[column] = (frame, SortedRangeIndex(frame[column]))
+        return cached[1]
+
+    def select(self, clauses: List[FilterClause], columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Returns a fresh frame holding the requested columns of the rows that satisfy all clauses.
+        Range clauses on indexed date columns narrow the rows by binary search first, so only
+        rows inside the range are scanned for the remaining clauses.
+        """
+        frame = self.get_frame()
+        ranged = [clause for clause in clauses if clause[1] in self.date_columns and clause[0] in ('gt', 'gte', 'lt', 'lte')]
+        if not ranged or frame.empty:
+            return apply_clauses(frame, clauses, columns)
+        positions = None
+        for column in dict.fromkeys(clause[1] for clause in ranged):
+            in_range = self._range_index(frame, column).range_positions([clause for clause in ranged if clause[1] == column])
+            positions = in_range if positions is None else np.intersect1d(positions, in_range, assume_unique=True)
+        rest = [clause for clause in clauses if clause not in ranged]
+        return apply_clauses(frame.iloc[positions].reset_index(drop=True), rest, columns)
+
+    def memory_report(self):
+        """Reports the typed versus untyped memory footprint of the loaded snapshot, if any."""
+        return schema_service.memory_report(self._frame) if self._frame is not None else None
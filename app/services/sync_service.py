@@ -0,0 +1,125 @@
+# ================================================
+# FILE: app/services/sync_service.py
+# PURPOSE: High-watermark delta sync of a Supabase view into a local frame
+# ================================================
+import threading
+import time
+import numpy as np
+import pandas as pd
+from typing import Callable, List
+from app.config import logger, DELTA_SYNC_WATERMARK_COLUMN, DELTA_SYNC_KEY_COLUMNS, DELTA_SYNC_RECONCILE_SECONDS
+from . import schema_service, snapshot_service
+
+def _row_keys(frame: pd.DataFrame, key_columns: List[str]) -> pd.MultiIndex:
+    return pd.MultiIndex.from_arrays([frame[col].astype(object).to_numpy() for col in key_columns])
+
+def _max_value(values: pd.Series):
+    """Highest watermark value as a plain Python scalar, ready to be sent in a filter."""
+    value = values.max()
+    return value.item() if isinstance(value, np.generic) else value
+
+class DeltaSync:
+    """
+    Keeps a local copy of a view current by fetching only rows whose watermark column
+    (an updated_at timestamp or an increasing primary key) is at or past the highest value
+    seen so far. Fetched rows replace local rows with the same key in place, new keys are
+    appended, and a periodic full reload reconciles deletes, which a watermark cannot see.
+    """
+
+    def __init__(self, view_name: str, fetch: Callable[[List[snapshot_service.FilterClause]], pd.DataFrame],
+                 watermark_column: str = DELTA_SYNC_WATERMARK_COLUMN, key_columns: List[str] = DELTA_SYNC_KEY_COLUMNS,
+                 reconcile_seconds: float = DELTA_SYNC_RECONCILE_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.view_name = view_name
+        self.fetch = fetch
+        self.watermark_column = watermark_column
+        self.key_columns = list(key_columns)
+        self.reconcile_seconds = reconcile_seconds
+        self.clock = clock
+        self.frame = None
+        self.watermark = None
+        self._reconciled_at = None
+        self._reconcile_requested = False
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.metrics = {
+            "full_syncs": 0, "delta_syncs": 0, "last_sync": None, "last_rows_pulled": 0, "rows_pulled_total": 0,
+            "last_duration_seconds": 0.0, "duration_seconds_total": 0.0
+        }
+
+    def on_merge(self, callback: Callable[[pd.DataFrame, pd.DataFrame, pd.DataFrame, np.ndarray, pd.DataFrame], None]):
+        """
+        Registers a callback invoked after each delta merge with the previous frame, the
+        replaced rows, the fetched rows, the fetched rows' positions and the merged frame.
+        """
+        self._listeners.append(callback)
+
+    def request_reconcile(self):
+        """Makes the next sync a full reload."""
+        self._reconcile_requested = True
+
+    def adopt(self, frame: pd.DataFrame):
+        """
+        Continues from a frame holding a synced state of the view, such as a memory-mapped copy
+        written by this or another process, in place of the local frame.
+        """
+        with self._lock:
+            self.frame = frame
+            # Never synced here yet: the next sync stays a full reload
+            if self.watermark is not None and not frame.empty and self.watermark_column in frame.columns:
+                self.watermark = _max_value(frame[self.watermark_column])
+
+    def _reconcile_due(self) -> bool:
+        return (self.frame is None or self.watermark is None or self._reconcile_requested
+                or self.clock() - self._reconciled_at >= self.reconcile_seconds)
+
+    def sync(self) -> pd.DataFrame:
+        """Brings the local frame up to date and returns it."""
+        with self._lock:
+            started = time.perf_counter()
+            if self._reconcile_due():
+                kind, pulled = "full", self._full_sync()
+            else:
+                kind, pulled = "delta", self._delta_sync()
+            duration = time.perf_counter() - started
+            self.metrics[f"{kind}_syncs"] += 1
+            self.metrics.update(last_sync=kind, last_rows_pulled=pulled, last_duration_seconds=round(duration, 6))
+            self.metrics["rows_pulled_total"] += pulled
+            self.metrics["duration_seconds_total"] = round(self.metrics["duration_seconds_total"] + duration, 6)
+            logger.info(f"{kind.capitalize()} sync of '{self.view_name}' pulled {pulled} rows in {duration:.2f}s.")
+            return self.frame
+
+    def _full_sync(self) -> int:
+        frame = self.fetch([])
+        self.frame, self._reconciled_at, self._reconcile_requested = frame, self.clock(), False
+        if frame.empty or not {self.watermark_column, *self.key_columns}.issubset(frame.columns) or not _row_keys(frame, self.key_columns).is_unique:
+            if not frame.empty:
+                logger.warning(f"'{self.view_name}' lacks the watermark column or unique keys; every sync will be a full reload.")
+            self.watermark = None
+        else:
+            self.watermark = _max_value(frame[self.watermark_column])
+        return len(frame)
+
+    def _delta_sync(self) -> int:
+        # Rows at the watermark itself are fetched again, so rows committed later with the
+        # same timestamp are not missed; merging them a second time changes nothing
+        changed = self.fetch([('gte', self.watermark_column, self.watermark)])
+        if changed.empty:
+            return 0
+        changed = changed.loc[~_row_keys(changed, self.key_columns).duplicated(keep='last')].reset_index(drop=True)
+        previous = self.frame
+        positions = _row_keys(previous, self.key_columns).get_indexer(_row_keys(changed, self.key_columns))
+        updated = positions >= 0
+        positions[~updated] = len(previous) + np.arange(int((~updated).sum()))
+
+        replaced = previous.iloc[positions[updated]].reset_index(drop=True)
+        kept = previous.drop(index=previous.index[positions[updated]])
+        merged = schema_service.concat_frames([kept, changed])
+        # Put every row back at its position: kept rows first hold their old slots in order
+        order = np.concatenate([np.setdiff1d(np.arange(len(previous)), positions[updated]), positions])
+        merged = merged.iloc[np.argsort(order, kind='stable')].reset_index(drop=True)
+
+        self.frame = merged
+        self.watermark = max(self.watermark, _max_value(changed[self.watermark_column]))
+        for listener in self._listeners:
+            listener(previous, replaced, changed, positions, merged)
+        return len(changed)
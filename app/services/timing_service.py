@@ -0,0 +1,161 @@
+# ================================================
+# FILE: app/services/timing_service.py
+# PURPOSE: Per-request timing spans, Server-Timing headers and Prometheus latency metrics
+# ================================================
+import contextvars
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, Optional, Tuple
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current = contextvars.ContextVar('request_timings', default=None)
+_NO_SPAN = nullcontext()
+
+class RequestTimings:
+    """
+    Time spent per span name during one request. Spans nest; each records only its own time,
+    excluding nested spans, so the spans of a request add up to at most its total.
+    """
+
+    def __init__(self, source: str, view: str, clock=time.perf_counter):
+        self.source = source
+        self.view = view
+        self.clock = clock
+        self.started = clock()
+        self.durations: Dict[str, float] = {}
+        self.rows: Dict[str, int] = {}
+        self._nested = []
+
+    def total(self) -> float:
+        return self.clock() - self.started
+
+    def server_timing(self, total: float) -> str:
+        """Formats the spans as a Server-Timing header value, in milliseconds."""
+        metrics = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.durations.items()]
+        return ", ".join(metrics + [f"total;dur={total * 1000:.2f}"])
+
+class _Span:
+    __slots__ = ('timings', 'name', 'started')
+
+    def __init__(self, timings: RequestTimings, name: str):
+        self.timings, self.name = timings, name
+
+    def __enter__(self):
+        self.timings._nested.append(0.0)
+        self.started = self.timings.clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        timings = self.timings
+        elapsed = timings.clock() - self.started
+        nested = timings._nested.pop()
+        timings.durations[self.name] = timings.durations.get(self.name, 0.0) + elapsed - nested
+        if timings._nested:
+            timings._nested[-1] += elapsed
+        return False
+
+def begin(source: str, view: str) -> RequestTimings:
+    """Starts collecting spans for the current request."""
+    timings = RequestTimings(source, view)
+    _current.set(timings)
+    return timings
+
+def end() -> Optional[RequestTimings]:
+    """Stops collecting and returns the current request's spans, if any were being collected."""
+    timings = _current.get()
+    _current.set(None)
+    return timings
+
+def span(name: str):
+    """
+    Times a block as the named span of the current request. Outside a timed request (timing
+    disabled, or a worker thread) this is a shared no-op context manager.
+    """
+    timings = _current.get()
+    return _Span(timings, name) if timings is not None else _NO_SPAN
+
+def add_rows(stage: str, count: int):
+    """Adds to the current request's row count for a stage, such as rows fetched."""
+    timings = _current.get()
+    if timings is not None:
+        timings.rows[stage] = timings.rows.get(stage, 0) + int(count)
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names: Tuple[str, ...], values: Tuple) -> str:
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label set, in the Prometheus exposition layout."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets=LATENCY_BUCKETS):
+        self.name, self.help_text, self.label_names, self.buckets = name, help_text, label_names, buckets
+        self._series = {}
+
+    def observe(self, labels: Tuple[str, ...], seconds: float):
+        counts, totals = self._series.setdefault(labels, ([0] * len(self.buckets), [0.0, 0]))
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                counts[i] += 1
+        totals[0] += seconds
+        totals[1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, (total, count)) in sorted(self._series.items()):
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts + [count]):
+                lines.append(f"{self.name}_bucket{_labels(self.label_names + ('le',), labels + (bound,))} {bucket_count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+class Counter:
+    """Monotonic counter per label set."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name, self.help_text, self.label_names = name, help_text, label_names
+        self._series = {}
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1):
+        self._series[labels] = self._series.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_labels(self.label_names, labels)} {value}" for labels, value in sorted(self._series.items()))
+        return lines
+
+class MetricsRegistry:
+    """Aggregates finished request timings into latency histograms and row counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._create()
+
+    def _create(self):
+        self.requests = Histogram('lyra_request_duration_seconds', 'Query request latency.', ('source', 'view'))
+        self.spans = Histogram('lyra_span_duration_seconds', 'Time spent per processing stage of a query request.', ('span', 'source', 'view'))
+        self.rows = Counter('lyra_rows_total', 'Rows handled per processing stage.', ('stage', 'source', 'view'))
+
+    def observe(self, timings: RequestTimings, total: float):
+        with self._lock:
+            self.requests.observe((timings.source, timings.view), total)
+            for name, seconds in timings.durations.items():
+                self.spans.observe((name, timings.source, timings.view), seconds)
+            for stage, count in timings.rows.items():
+                self.rows.inc((stage, timings.source, timings.view), count)
+
+    def render(self) -> str:
+        """Renders every metric in the Prometheus text exposition format."""
+        with self._lock:
+            lines = self.requests.render() + self.spans.render() + self.rows.render()
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._create()
+
+metrics = MetricsRegistry()
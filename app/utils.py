@@ -2,7 +2,10 @@
 # FILE: app/utils.py
 # PURPOSE: Shared helper functions
 # ================================================
+import numpy as np
+import pandas as pd
 from .config import HARDCODED_RATES
+from .services import timing_service
 
 def convert_to_eur(amount, currency):
     """Converts a given amount from a specified currency to EUR."""
@@ -10,3 +13,19 @@ def convert_to_eur(amount, currency):
         return 0.0
     rate = HARDCODED_RATES.get(str(currency).upper(), 1.0)
     return float(amount) / rate if rate != 0 else 0.0
+
+def convert_series_to_eur(amounts: pd.Series, currencies: pd.Series) -> pd.Series:
+    """
+    Vectorized counterpart of convert_to_eur for a whole amount/currency column pair.
+    Rates are resolved once per distinct currency; unknown currencies use a rate of 1.0,
+    zero rates yield 0.0 and missing amounts convert to 0.0.
+    """
+    with timing_service.span("convert"):
+        codes, currency_values = pd.factorize(currencies, use_na_sentinel=False)
+        rate_lookup = np.array([HARDCODED_RATES.get(str(c).upper(), 1.0) for c in currency_values], dtype='float64')
+        rates = rate_lookup[codes] if len(rate_lookup) else np.ones(len(codes), dtype='float64')
+
+        values = pd.to_numeric(amounts).to_numpy(dtype='float64', na_value=0.0)
+        safe_rates = np.where(rates != 0, rates, 1.0)
+        converted = np.where(rates != 0, values / safe_rates, 0.0)
+        return pd.Series(converted, index=amounts.index, dtype='float64')
@@ -0,0 +1,53 @@
+# ================================================
+# FILE: benchmarks/bench_name_search.py
+# PURPOSE: Compares name-index resolution with the ilike substring scan it replaces
+# ================================================
+"""
+Usage: python -m benchmarks.bench_name_search [--rows 200000] [--names 20000]
+
+Times resolving partial names with the in-memory NameIndex against the snapshot equivalent of
+the ilike filter (a case-insensitive substring scan over every campaign row).
+"""
+import argparse
+import random
+import string
+import time
+import numpy as np
+import pandas as pd
+from app.services.search_service import NameIndex
+
+QUERIES = ['ann', 'berg', 'johanna lind', 'xq', 'mikael', 'anna brg']
+
+def _names(count: int, rng: random.Random):
+    first = ['Anna', 'Bo', 'Cleo', 'Dag', 'Eva', 'Johanna', 'Mikael', 'Sofia', 'Oskar', 'Ida']
+    last = ['Berg', 'Lind', 'Dahl', 'Ek', 'Lindqvist', 'Holm', 'Nyström', 'Sandberg']
+    return [f"{rng.choice(first)} {rng.choice(last)} {''.join(rng.choices(string.ascii_lowercase, k=4))}" for _ in range(count)]
+
+def _time(fn, repeat: int = 20) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--names', type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    names = _names(args.names, rng)
+    column = pd.Series(np.array(names, dtype=object)[np.random.default_rng(0).integers(0, len(names), args.rows)]).astype('category')
+
+    started = time.perf_counter()
+    index = NameIndex(column.dropna().unique())
+    print(f"Built index over {len(index)} names from {args.rows} rows in {(time.perf_counter() - started) * 1000:.1f} ms\n")
+    print(f"{'query':<16}{'matches':>9}{'index (us)':>14}{'ilike scan (us)':>18}")
+    for query in QUERIES:
+        resolved = index.resolve(query)
+        index_time = _time(lambda: index.resolve(query))
+        scan_time = _time(lambda: column.str.contains(query, case=False, regex=False, na=False), repeat=3)
+        print(f"{query:<16}{len(resolved):>9}{index_time * 1e6:>14.1f}{scan_time * 1e6:>18.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# ================================================
+# FILE: benchmarks/bench_startup.py
+# PURPOSE: Times application startup, first requests and warm-up in fresh processes
+# ================================================
+"""
+Usage: python -m benchmarks.bench_startup [--trials 7] [--rows 10000] [--output startup_results.json]
+
+Each trial runs in a new interpreter, so nothing is already imported or cached:
+  cold  create_app(), then GET / and a first summary query, paging from a stubbed Supabase client
+  warm  create_app(), warm_up() with snapshots on, then the same first query
+
+The median of every stage is reported, with the heavy modules create_app() imported. Building
+the synthetic rows imports pandas before the first query, so its time leaves that import out.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+HEAVY_MODULES = ('pandas', 'numpy', 'supabase', 'pyarrow')
+QUERY = {"source": "influencer_analytics", "view": "summary"}
+
+# Runs in the child interpreter; prints one JSON object of stage timings in milliseconds
+TRIAL = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+app = create_app(warm=False)
+timings = {"create_app_ms": (time.perf_counter() - started) * 1000}
+heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+client = app.test_client()
+if MODE == "cold":
+    started = time.perf_counter()
+    assert client.get('/').status_code == 200
+    timings["first_health_ms"] = (time.perf_counter() - started) * 1000
+
+import app as package
+from app.config import CAMPAIGN_VIEW_NAME, TARGET_VIEW_NAME
+from benchmarks.stub_client import FrameSupabaseClient
+from benchmarks.synthetic import campaign_frame, target_frame
+package._supabase_client = FrameSupabaseClient({CAMPAIGN_VIEW_NAME: campaign_frame(ROWS, 0), TARGET_VIEW_NAME: target_frame(ROWS, 0)})
+if MODE == "warm":
+    started = time.perf_counter()
+    package.warm_up()
+    timings["warm_up_ms"] = (time.perf_counter() - started) * 1000
+
+started = time.perf_counter()
+response = client.post('/api/influencer/query', json=QUERY)
+assert response.status_code == 200, response.get_data(as_text=True)[:200]
+timings["first_query_ms"] = (time.perf_counter() - started) * 1000
+print(json.dumps({"timings": timings, "heavy_modules_at_startup": heavy}))
+"""
+
+def trial(mode: str, rows: int) -> dict:
+    env = {**os.environ, "SUPABASE_URL": "https://benchmark.supabase.co", "SUPABASE_KEY": "benchmark",
+           "SNAPSHOT_MODE": "true" if mode == "warm" else "false", "RESPONSE_CACHE_ENABLED": "false"}
+    env.pop("SHARED_SNAPSHOT_DIR", None)
+    code = f"MODE = {mode!r}\nROWS = {rows}\nHEAVY_MODULES = {HEAVY_MODULES!r}\nQUERY = {QUERY!r}\n" \
+           "from app.config import logger\nlogger.remove()\n" + TRIAL
+    completed = subprocess.run([sys.executable, '-c', code], env=env, cwd=Path(__file__).resolve().parent.parent,
+                               capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def run(trials: int, rows: int) -> dict:
+    results = {}
+    for mode in ("cold", "warm"):
+        runs = [trial(mode, rows) for _ in range(trials)]
+        stages = {stage: round(statistics.median(run["timings"][stage] for run in runs), 1) for stage in runs[0]["timings"]}
+        results[mode] = {"median_ms": stages, "heavy_modules_at_startup": runs[0]["heavy_modules_at_startup"], "trials": trials}
+        for stage, median in stages.items():
+            print(f"{mode:<6}{stage:<20}{median:>10.1f} ms", flush=True)
+    print(f"heavy modules imported by create_app(): {', '.join(results['cold']['heavy_modules_at_startup']) or 'none'}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trials', type=int, default=7)
+    parser.add_argument('--rows', type=int, default=10_000, help='synthetic rows served to the first query and warm-up')
+    parser.add_argument('--output', default='startup_results.json')
+    args = parser.parse_args()
+
+    results = run(args.trials, args.rows)
+    Path(args.output).write_text(json.dumps({"rows": args.rows, **results}, indent=2))
+    print(f"\nWrote {args.output}")
+
+if __name__ == '__main__':
+    main()
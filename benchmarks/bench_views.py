@@ -0,0 +1,199 @@
+# ================================================
+# FILE: benchmarks/bench_views.py
+# PURPOSE: Times every query view on synthetic data and flags regressions against a baseline
+# ================================================
+"""
+Usage: python -m benchmarks.bench_views [--sizes 10000,100000,1000000] [--output results.json]
+                                        [--update-baseline] [--fail-on-regression]
+
+Three groups of cases are timed at each size, on seeded synthetic campaign and target rows:
+  processing     the processing functions on an already typed frame (no fetch)
+  serialization  encoding processed results in the records, columnar and ndjson layouts
+  route          POST /api/influencer/query end to end, paging from a stubbed Supabase client
+
+Results are written as JSON. Each case is compared with benchmarks/baseline.json and reported
+as a regression when its median is more than --tolerance slower (and at least --min-delta-ms)
+than the baseline, scaled by a calibration workload timed at the start of both runs.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "https://benchmark.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+import numpy as np
+import pandas as pd
+from app.config import logger, CAMPAIGN_VIEW_NAME, TARGET_VIEW_NAME
+from app.serialization import dumps, ndjson_lines
+from app.services import processing_service, schema_service, snapshot_service
+from .stub_client import FrameSupabaseClient
+from .synthetic import campaign_frame, target_frame
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+# (case, payload, clauses applied before processing, as data_service would push them down)
+ANALYTICS_CASES = [
+    ("summary", {"view": "summary"}, []),
+    ("summary_top50", {"view": "summary", "sort": {"by": "total_spend_eur"}, "limit": 50}, []),
+    ("discovery_tiers", {"view": "discovery_tiers", "filters": {"tier": "gold"}}, []),
+    ("monthly_breakdown", {"view": "monthly_breakdown", "filters": {"year": 2025}}, [('eq', 'year', 2025)]),
+    ("custom_range_breakdown", {"view": "custom_range_breakdown", "filters": {"date_from": "2025-03-01", "date_to": "2025-05-31"}},
+     [('gte', 'live_date_clean', '2025-03-01'), ('lt', 'live_date_clean', '2025-06-01')]),
+    ("weekly_breakdown_by_number", {"view": "weekly_breakdown_by_number", "filters": {"week_number": 10}}, [('eq', 'wk_clean', 10)]),
+    ("weekly_series", {"view": "weekly_series", "filters": {"year": 2025}}, [('eq', 'year', 2025)]),
+    ("profile", {"view": "summary", "filters": {"influencer_name": "Influencer 000000"}}, [('eq', 'influencer_name', 'Influencer 000000')])
+]
+DASHBOARD_CASES = [
+    ("dashboard_uk", {"filters": {"market": "UK"}}, [('eq', 'region', 'UK')]),
+    ("dashboard_nordics", {"filters": {"market": "Nordics"}}, [('in', 'region', ['Sweden', 'Norway', 'Denmark'])]),
+    ("market_comparison", {"view": "market_comparison", "filters": {}}, [])
+]
+ROUTE_CASES = [
+    ("summary", {"source": "influencer_analytics", "view": "summary"}),
+    ("weekly_series", {"source": "influencer_analytics", "view": "weekly_series", "filters": {"year": 2025}}),
+    ("dashboard_nordics", {"source": "dashboard", "filters": {"market": "Nordics"}})
+]
+
+def _time(fn, repeat: int, setup=None) -> dict:
+    """Runs fn repeat times, each on a fresh setup() result when given, and returns timings in ms."""
+    # One untimed run first, so one-off costs (lazy imports, first allocations) are not measured
+    fn(*((setup(),) if setup else ()))
+    timings = []
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        started = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(timings), 3), "min_ms": round(min(timings), 3), "repeat": repeat}
+
+def _typed(frame: pd.DataFrame, view_name: str, clauses, columns=None) -> pd.DataFrame:
+    return schema_service.build_frame(snapshot_service.apply_clauses(frame, clauses, columns), view_name)
+
+def bench_processing(campaigns: pd.DataFrame, targets: pd.DataFrame, repeat: int) -> dict:
+    results = {}
+    for case, payload, clauses in ANALYTICS_CASES:
+        frame = _typed(campaigns, CAMPAIGN_VIEW_NAME, clauses, processing_service.required_analytics_columns(payload))
+        results[case] = _time(lambda df: processing_service.route_analytics_processing(df, payload), repeat, frame.copy)
+    for case, payload, clauses in DASHBOARD_CASES:
+        frame = _typed(targets, TARGET_VIEW_NAME, clauses, processing_service.required_dashboard_columns(payload))
+        if case == "market_comparison":
+            run = lambda df: processing_service.process_market_comparison(df, None)
+        else:
+            run = lambda df, market=payload["filters"]["market"]: processing_service.process_dashboard_data(df, market)
+        results[case] = _time(run, repeat, frame.copy)
+    return results
+
+def bench_serialization(campaigns: pd.DataFrame, repeat: int) -> dict:
+    frame = _typed(campaigns, CAMPAIGN_VIEW_NAME, [], processing_service.ANALYTICS_VIEW_COLUMNS["summary"])
+    results = {}
+    for output_format in ("records", "columnar", "ndjson"):
+        processed = processing_service.route_analytics_processing(frame.copy(), {"view": "summary", "format": output_format})
+        encode = (lambda: b"".join(ndjson_lines(processed))) if output_format == "ndjson" else (lambda: dumps(processed))
+        results[f"summary_{output_format}"] = _time(encode, repeat)
+    return results
+
+def bench_routes(app, campaigns: pd.DataFrame, targets: pd.DataFrame, repeat: int) -> dict:
+    from app import routes
+    from app.services import data_service
+
+    data_service.supabase = FrameSupabaseClient({CAMPAIGN_VIEW_NAME: campaigns, TARGET_VIEW_NAME: targets})
+    data_service.SNAPSHOT_MODE = False
+    routes.RESPONSE_CACHE_ENABLED = False
+    results = {}
+    with app.test_client() as client:
+        for case, payload in ROUTE_CASES:
+            body = json.dumps(payload)
+            def post():
+                response = client.post('/api/influencer/query', data=body, content_type='application/json')
+                assert response.status_code == 200, response.get_data(as_text=True)[:200]
+            results[case] = _time(post, repeat)
+    return results
+
+def calibrate(repeat: int = 7) -> float:
+    """Times a fixed pandas workload, so results from machines or runs at different speeds compare."""
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({'key': rng.integers(0, 1000, 200_000), 'value': rng.random(200_000)})
+    return _time(lambda: frame.groupby('key')['value'].agg(['sum', 'mean', 'max']), repeat)["median_ms"]
+
+def run(sizes, repeat: int, seed: int) -> dict:
+    from app import create_app
+
+    # Routes register on the first app created in a process, so one app serves every size
+    app = create_app()
+    calibration_ms = calibrate()
+    cases = {}
+    for rows in sizes:
+        campaigns, targets = campaign_frame(rows, seed), target_frame(rows, seed)
+        # Larger sizes get fewer repeats so the full suite stays within a few minutes
+        size_repeat = max(1, repeat if rows < 1_000_000 else repeat // 3)
+        for group, timings in (("processing", bench_processing(campaigns, targets, size_repeat)),
+                               ("serialization", bench_serialization(campaigns, size_repeat)),
+                               ("route", bench_routes(app, campaigns, targets, size_repeat))):
+            for case, timing in timings.items():
+                cases[f"{group}/{case}/{rows}"] = timing
+                print(f"{group:<15}{case:<28}{rows:>9}{timing['median_ms']:>12.1f} ms", flush=True)
+    return {
+        "meta": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            "python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+            "machine": platform.machine(), "seed": seed, "sizes": list(sizes), "calibration_ms": calibration_ms
+        },
+        "cases": cases
+    }
+
+def regressions(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list:
+    """
+    Cases whose median is both relatively and absolutely slower than the baseline's, after
+    scaling the baseline by how much faster or slower this run's calibration workload was.
+    """
+    speed = results["meta"]["calibration_ms"] / baseline.get("meta", {}).get("calibration_ms", results["meta"]["calibration_ms"])
+    flagged = []
+    for name, timing in results["cases"].items():
+        previous = baseline.get("cases", {}).get(name)
+        if previous is None:
+            continue
+        expected = previous["median_ms"] * speed
+        if timing["median_ms"] - expected > min_delta_ms and timing["median_ms"] > expected * (1 + tolerance):
+            flagged.append({"case": name, "baseline_ms": previous["median_ms"], "expected_ms": round(expected, 3),
+                            "median_ms": timing["median_ms"], "slowdown": round(timing["median_ms"] / expected, 2)})
+    return flagged
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH))
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed relative slowdown before a case is flagged')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help='ignore slowdowns smaller than this')
+    parser.add_argument('--update-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--fail-on-regression', action='store_true', help='exit with status 1 when a case regressed')
+    args = parser.parse_args()
+
+    logger.remove()
+    results = run([int(size) for size in args.sizes.split(',')], args.repeat, args.seed)
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists():
+        results["regressions"] = regressions(results, json.loads(baseline_path.read_text()), args.tolerance, args.min_delta_ms)
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print(f"\nWrote {len(results['cases'])} cases to {args.output}")
+
+    for flagged in results.get("regressions", []):
+        print(f"REGRESSION {flagged['case']}: expected {flagged['expected_ms']:.1f} ms, took {flagged['median_ms']:.1f} ms (x{flagged['slowdown']})")
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps({key: results[key] for key in ("meta", "cases")}, indent=2) + "\n")
+        print(f"Updated baseline {baseline_path}")
+    if args.fail_on_regression and results.get("regressions"):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# ================================================
+# FILE: benchmarks/stub_client.py
+# PURPOSE: Supabase client stand-in that serves paged rows from in-memory frames
+# ================================================
+from types import SimpleNamespace
+import pandas as pd
+from app.serialization import frame_to_records
+from app.services import snapshot_service
+
+class FrameQuery:
+    """Collects the builder calls data_service makes and answers them from a frame."""
+
+    def __init__(self, client, view_name: str):
+        self.client = client
+        self.view_name = view_name
+        self.columns = '*'
+        self.count_mode = None
+        self.clauses = []
+        self.range_bounds = None
+
+    def select(self, columns='*', count=None):
+        self.columns, self.count_mode = columns, count
+        return self
+
+    def _clause(operator):
+        def add(self, column, value):
+            self.clauses.append((operator, column, value.strip('%') if operator == 'ilike' else value))
+            return self
+        return add
+
+    eq, in_, ilike = _clause('eq'), _clause('in'), _clause('ilike')
+    gt, gte, lt, lte = _clause('gt'), _clause('gte'), _clause('lt'), _clause('lte')
+    del _clause
+
+    def order(self, column, desc=False):
+        return self
+
+    def range(self, start, end):
+        self.range_bounds = (start, end)
+        return self
+
+    def execute(self):
+        rows = self.client.matching(self.view_name, self.clauses, self.columns)
+        if self.range_bounds is not None:
+            start, end = self.range_bounds
+            rows = rows.iloc[start:min(end + 1, start + self.client.max_rows)]
+        # Rows arrive as JSON objects, with nulls rather than NaN
+        records = frame_to_records(rows.astype(object).where(rows.notna(), None))
+        return SimpleNamespace(data=records, count=len(self.client.matching(self.view_name, self.clauses, self.columns)) if self.count_mode else None)
+
+class FrameSupabaseClient:
+    """
+    Serves views from untyped frames. Each distinct filter set is evaluated once and kept,
+    so paging through a large result costs only the row conversion, as it would on a server.
+    """
+
+    def __init__(self, frames, max_rows: int = 1000):
+        self.frames = frames
+        self.max_rows = max_rows
+        self._results = {}
+
+    def matching(self, view_name: str, clauses, columns: str) -> pd.DataFrame:
+        key = (view_name, repr(clauses), columns)
+        if key not in self._results:
+            wanted = None if columns == '*' else [col.strip() for col in columns.split(',')]
+            self._results[key] = snapshot_service.apply_clauses(self.frames[view_name], clauses, wanted)
+        return self._results[key]
+
+    def from_(self, view_name: str):
+        return FrameQuery(self, view_name)
+
+    table = from_
@@ -0,0 +1,80 @@
+# ================================================
+# FILE: benchmarks/synthetic.py
+# PURPOSE: Seeded generator of realistic campaign and target rows for benchmarks
+# ================================================
+import numpy as np
+import pandas as pd
+from app.config import MONTH_ORDER
+
+# Market mix and each market's local currency; a share of rows is booked in EUR or USD instead
+MARKETS = {'Sweden': 'SEK', 'Norway': 'NOK', 'Denmark': 'DKK', 'UK': 'GBP', 'France': 'EUR', 'Germany': 'EUR'}
+MARKET_WEIGHTS = [0.3, 0.15, 0.12, 0.25, 0.1, 0.08]
+FOREIGN_CURRENCY_SHARE = 0.05
+MISSING_SHARE = 0.03
+ASSETS = ['Reel', 'Story', 'Post', 'Video']
+_MONTHS = np.array(list(MONTH_ORDER))
+
+def _with_missing(values: np.ndarray, rng: np.random.Generator, share: float = MISSING_SHARE) -> np.ndarray:
+    values = values.astype(float) if values.dtype.kind in 'iu' else values.astype(object)
+    values[rng.random(len(values)) < share] = np.nan if values.dtype.kind == 'f' else None
+    return values
+
+def _currencies(markets: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    currencies = pd.Series(markets).map(MARKETS).to_numpy(dtype=object)
+    foreign = rng.random(len(markets)) < FOREIGN_CURRENCY_SHARE
+    currencies[foreign] = rng.choice(['EUR', 'USD'], int(foreign.sum()))
+    return currencies
+
+def influencer_names(count: int) -> np.ndarray:
+    return np.array([f'Influencer {i:06d}' for i in range(count)], dtype=object)
+
+def campaign_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Rows shaped like the campaign view. Influencer popularity follows a Zipf-like curve, so a
+    few names hold many campaigns and most hold one or two; about 3% of values are missing.
+    """
+    rng = np.random.default_rng(seed)
+    names = influencer_names(max(50, rows // 20))
+    popularity = 1 / np.arange(1, len(names) + 1) ** 1.1
+    markets = rng.choice(list(MARKETS), rows, p=MARKET_WEIGHTS)
+
+    live_dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 731, rows), unit='D')
+    views = rng.lognormal(9, 1.5, rows).astype(np.int64)
+    clicks = (views * rng.beta(2, 60, rows)).astype(np.int64)
+    # Older rows only carry the raw engagement columns, newer ones the cleaned ones
+    cleaned = rng.random(rows) < 0.7
+    conversions = rng.poisson(np.maximum(clicks, 1) * 0.02)
+    frame = pd.DataFrame({
+        'influencer_name': names[rng.choice(len(names), rows, p=popularity / popularity.sum())],
+        'year': live_dates.year.to_numpy(),
+        'market': markets,
+        'month': _MONTHS[live_dates.month.to_numpy() - 1],
+        'wk_clean': _with_missing(live_dates.isocalendar().week.to_numpy(dtype=np.int64), rng),
+        'currency': _currencies(markets, rng),
+        'total_budget_clean': _with_missing(np.round(rng.lognormal(8, 1.2, rows), 2), rng),
+        'actual_conversions_clean': _with_missing(conversions, rng),
+        'views_clean': np.where(cleaned, views, 0),
+        'views': np.where(cleaned, 0, views),
+        'clicks_clean': np.where(cleaned, clicks, 0),
+        'clicks': np.where(cleaned, 0, clicks),
+        'ctr_clean': _with_missing(clicks / np.maximum(views, 1), rng),
+        'cvr_clean': _with_missing(conversions / np.maximum(clicks, 1), rng),
+        'asset': _with_missing(rng.choice(ASSETS, rows), rng),
+        'live_date_clean': _with_missing(live_dates.strftime('%Y-%m-%d').to_numpy(dtype=object), rng)
+    })
+    return frame
+
+def target_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Rows shaped like the market target view: budget and conversion lines per region and month."""
+    rng = np.random.default_rng(seed)
+    regions = rng.choice(list(MARKETS), rows, p=MARKET_WEIGHTS)
+    return pd.DataFrame({
+        'year': rng.choice([2024, 2025], rows),
+        'month': rng.choice(_MONTHS, rows),
+        'region': regions,
+        'currency': pd.Series(regions).map(MARKETS).to_numpy(dtype=object),
+        'target_budget_clean': _with_missing(np.round(rng.lognormal(9, 1, rows), 2), rng),
+        'actual_spend_clean': _with_missing(np.round(rng.lognormal(8.8, 1, rows), 2), rng),
+        'target_conversions_clean': _with_missing(rng.poisson(200, rows), rng),
+        'actual_conversions_clean': _with_missing(rng.poisson(180, rows), rng)
+    })
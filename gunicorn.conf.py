@@ -0,0 +1,34 @@
+# ================================================
+# FILE: gunicorn.conf.py
+# PURPOSE: Preforking multi-worker production server configuration
+# ================================================
+import multiprocessing
+import os
+
+wsgi_app = "wsgi:app"
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', 10000)}"
+
+# One process per core for the pandas work, each with a few threads for requests waiting on Supabase.
+# Caches and the counters behind /metrics and the /api/*/stats endpoints live in each worker, so
+# those endpoints report only the worker that answered, never totals across workers
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+
+# The app and the query modules are imported once in the master, and forked workers share those pages
+preload_app = True
+
+def on_starting(server):
+    import app.services.data_service  # noqa: F401
+
+def post_fork(server, worker):
+    """Warms each worker up before it accepts traffic, when WARMUP_ON_START is set."""
+    from app import warm_up
+    from app.config import WARMUP_ON_START, logger
+    if WARMUP_ON_START:
+        try:
+            warm_up()
+        except Exception as e:
+            # A worker that cannot warm up still serves; its first requests pay the cost or report the error
+            logger.error(f"Warm-up failed in worker {worker.pid}: {e}")
@@ -15,3 +15,10 @@ def test_client():
         # Establish an application context
         with flask_app.app_context():
             yield testing_client
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """Start every test with an empty response cache so mocked services are always reached."""
+    from app.services.cache_service import response_cache
+    response_cache.clear()
+    yield
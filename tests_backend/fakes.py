@@ -0,0 +1,121 @@
+# ================================================
+# FILE: tests_backend/fakes.py
+# PURPOSE: Local stand-in for the Supabase client used by service tests
+# ================================================
+import copy
+from types import SimpleNamespace
+
+# Representative rows of the two Supabase views
+CAMPAIGN_ROWS = [
+    {'influencer_name': 'Anna Berg', 'year': 2025, 'market': 'Sweden', 'month': 'Jan', 'wk_clean': 2, 'currency': 'SEK', 'total_budget_clean': 11300, 'actual_conversions_clean': 10, 'views_clean': 1000, 'views': 0, 'clicks_clean': 50, 'clicks': 0, 'ctr_clean': 0.05, 'cvr_clean': 0.2, 'asset': 'Reel', 'live_date_clean': '2025-01-08'},
+    {'influencer_name': 'anna berg', 'year': 2025, 'market': 'Norway', 'month': 'Feb', 'wk_clean': 6, 'currency': 'NOK', 'total_budget_clean': 5750, 'actual_conversions_clean': 5, 'views_clean': 0, 'views': 800, 'clicks_clean': 0, 'clicks': 40, 'ctr_clean': 0.05, 'cvr_clean': 0.1, 'asset': 'Story', 'live_date_clean': '2025-02-03'},
+    {'influencer_name': 'Bo Lind', 'year': 2024, 'market': 'UK', 'month': 'Jan', 'wk_clean': 3, 'currency': 'GBP', 'total_budget_clean': 850, 'actual_conversions_clean': 0, 'views_clean': 500, 'views': 0, 'clicks_clean': 10, 'clicks': 0, 'ctr_clean': 0.02, 'cvr_clean': 0, 'asset': None, 'live_date_clean': '2024-01-15'},
+    {'influencer_name': 'Cleo Dahl', 'year': 2025, 'market': 'Denmark', 'month': 'Jan', 'wk_clean': 2, 'currency': 'DKK', 'total_budget_clean': 7460, 'actual_conversions_clean': 20, 'views_clean': 2000, 'views': 0, 'clicks_clean': 100, 'clicks': 0, 'ctr_clean': 0.05, 'cvr_clean': 0.2, 'asset': 'Reel', 'live_date_clean': '2025-01-09'}
+]
+TARGET_ROWS = [
+    {'year': 2025, 'month': 'Jan', 'region': 'Sweden', 'currency': 'SEK', 'target_budget_clean': 1130, 'actual_spend_clean': 1130, 'target_conversions_clean': 10, 'actual_conversions_clean': 5},
+    {'year': 2025, 'month': 'Jan', 'region': 'UK', 'currency': 'GBP', 'target_budget_clean': 850, 'actual_spend_clean': 425, 'target_conversions_clean': 100, 'actual_conversions_clean': 50},
+    {'year': 2024, 'month': 'Feb', 'region': 'Norway', 'currency': 'NOK', 'target_budget_clean': 1150, 'actual_spend_clean': 0, 'target_conversions_clean': 10, 'actual_conversions_clean': 0}
+]
+
+class FakeQuery:
+    """Mimics the chainable PostgREST query builder over an in-memory list of rows."""
+
+    def __init__(self, client, view_name):
+        self.client = client
+        self.view_name = view_name
+        self.columns = '*'
+        self.predicates = []
+        self.filters = []
+        self.range_bounds = None
+        self.order_by = []
+        self.count_mode = None
+
+    def select(self, columns='*', count=None):
+        self.columns = columns
+        self.count_mode = count
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(('eq', column, value))
+        self.predicates.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = list(values)
+        self.filters.append(('in', column, values))
+        self.predicates.append(lambda row: row.get(column) in values)
+        return self
+
+    def ilike(self, column, pattern):
+        self.filters.append(('ilike', column, pattern))
+        needle = pattern.strip('%').lower()
+        self.predicates.append(lambda row: row.get(column) is not None and needle in str(row.get(column)).lower())
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(('gt', column, value))
+        self.predicates.append(lambda row: row.get(column) is not None and row.get(column) > value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(('gte', column, value))
+        self.predicates.append(lambda row: row.get(column) is not None and row.get(column) >= value)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(('lt', column, value))
+        self.predicates.append(lambda row: row.get(column) is not None and row.get(column) < value)
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(('lte', column, value))
+        self.predicates.append(lambda row: row.get(column) is not None and row.get(column) <= value)
+        return self
+
+    def order(self, column, desc=False):
+        self.order_by.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self.range_bounds = (start, end)
+        return self
+
+    def execute(self):
+        self.client.executed.append(self)
+        rows = [row for row in self.client.tables.get(self.view_name, []) if all(p(row) for p in self.predicates)]
+        for column, desc in reversed(self.order_by):
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        total = len(rows)
+        if self.range_bounds is not None:
+            start, end = self.range_bounds
+            rows = rows[start:min(end + 1, start + self.client.max_rows)]
+        else:
+            rows = rows[:self.client.max_rows]
+        if self.columns != '*':
+            wanted = [c.strip() for c in self.columns.split(',')]
+            rows = [{c: row.get(c) for c in wanted} for row in rows]
+        return SimpleNamespace(data=copy.deepcopy(rows), count=total if self.count_mode and self.client.report_count else None)
+
+class FakeSupabaseClient:
+    """Minimal Supabase client exposing from_() over named in-memory tables."""
+
+    def __init__(self, tables=None, max_rows=1000, report_count=True):
+        self.tables = tables or {}
+        self.max_rows = max_rows
+        self.report_count = report_count
+        self.executed = []
+
+    def from_(self, view_name):
+        return FakeQuery(self, view_name)
+
+    table = from_
+
+class FakeClock:
+    """Manually advanced stand-in for time.monotonic."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
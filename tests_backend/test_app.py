@@ -0,0 +1,55 @@
+# ================================================
+# FILE: tests_backend/test_app.py
+# PURPOSE: Tests for the application factory, lazy startup and warm-up
+# ================================================
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+import app as package
+
+def test_create_app_defers_heavy_imports():
+    """Creating the app and answering the health check does not import pandas or supabase."""
+    code = ("import json, sys\nfrom app import create_app\n"
+            "create_app(warm=False).test_client().get('/')\n"
+            "print(json.dumps([name for name in ('pandas', 'supabase') if name in sys.modules]))")
+    env = {**os.environ, "SUPABASE_URL": "https://x.supabase.co", "SUPABASE_KEY": "dummy"}
+    completed = subprocess.run([sys.executable, '-c', code], env=env, cwd=Path(__file__).resolve().parent.parent,
+                               capture_output=True, text=True, check=True)
+    assert json.loads(completed.stdout.strip().splitlines()[-1]) == []
+
+def test_init_supabase_client_raises_without_credentials(mocker):
+    """A missing URL or key raises instead of exiting the process."""
+    mocker.patch.object(package, '_supabase_client', None)
+    mocker.patch.dict(os.environ, {"SUPABASE_URL": "", "SUPABASE_KEY": ""})
+    with pytest.raises(RuntimeError):
+        package.init_supabase_client()
+
+def test_lazy_client_created_once_on_first_use(mocker):
+    """The proxy creates the client on first attribute access and reuses it afterwards."""
+    mocker.patch.object(package, '_supabase_client', None)
+    mocker.patch.dict(os.environ, {"SUPABASE_URL": "https://x.supabase.co", "SUPABASE_KEY": "dummy"})
+    client = mocker.Mock()
+    create_client = mocker.patch('supabase.create_client', return_value=client)
+
+    assert package.supabase.from_ is client.from_
+    package.supabase.table
+    create_client.assert_called_once_with("https://x.supabase.co", "dummy")
+
+def test_warm_up_loads_enabled_caches(mocker):
+    """Warm-up creates the client and loads the snapshots and name index that are enabled."""
+    from app.services import data_service
+    init_client = mocker.patch('app.init_supabase_client')
+    mocker.patch.multiple(package, SNAPSHOT_MODE=True, ROLLUP_MODE=False, NAME_INDEX_ENABLED=True)
+    campaigns = mocker.patch.object(data_service, 'campaign_snapshot')
+    targets = mocker.patch.object(data_service, 'target_snapshot')
+    name_index = mocker.patch.object(data_service, 'name_index')
+
+    package.warm_up()
+
+    init_client.assert_called_once()
+    campaigns.get_frame.assert_called_once()
+    targets.get_frame.assert_called_once()
+    name_index.assert_called_once()
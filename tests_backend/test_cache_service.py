@@ -0,0 +1,47 @@
+# ================================================
+# FILE: tests_backend/test_cache_service.py
+# PURPOSE: Tests for the response cache and payload canonicalization
+# ================================================
+from app.config import CAMPAIGN_VIEW_NAME
+from app.services.cache_service import ResponseCache, canonical_key
+from .fakes import FakeClock
+
+def test_canonical_key_ignores_key_order_all_filters_and_tier_case():
+    """Test that equivalent payloads share a key and different ones do not."""
+    base = {"source": "influencer_analytics", "view": "discovery_tiers", "filters": {"tier": "Gold", "market": "All", "year": "2025"}}
+    equivalent = {"filters": {"year": 2025, "tier": "gold"}, "view": "discovery_tiers", "source": "influencer_analytics"}
+    different = {"source": "influencer_analytics", "view": "discovery_tiers", "filters": {"tier": "silver", "year": 2025}}
+
+    assert canonical_key(base) == canonical_key(equivalent)
+    assert canonical_key(base) != canonical_key(different)
+    assert canonical_key({"source": "influencer_analytics"}) == canonical_key({"source": "influencer_analytics", "view": "summary", "filters": {}})
+
+def test_response_cache_evicts_least_recently_used_within_byte_bound():
+    """Test LRU eviction once the byte bound is exceeded."""
+    cache = ResponseCache(max_bytes=10, ttl_seconds={"dashboard": 60})
+    cache.put("a", "dashboard", b"aaaa")
+    cache.put("b", "dashboard", b"bbbb")
+    cache.get("a")
+    cache.put("c", "dashboard", b"cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa" and cache.get("c") == b"cccc"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 8
+
+def test_response_cache_ttl_per_source_and_view_invalidation():
+    """Test per-source expiry and invalidation when a view is refreshed."""
+    clock = FakeClock()
+    cache = ResponseCache(max_bytes=1000, ttl_seconds={"dashboard": 300, "influencer_analytics": 30}, clock=clock)
+    cache.put("dash", "dashboard", b"{}")
+    cache.put("summary", "influencer_analytics", b"{}")
+    cache.put("tiers", "influencer_analytics", b"{}")
+
+    clock.now = 31
+    assert cache.get("summary") is None
+    assert cache.get("dash") == b"{}"
+
+    assert cache.invalidate_view(CAMPAIGN_VIEW_NAME) == 1
+    assert cache.get("tiers") is None
+    assert cache.get("dash") == b"{}"
+    assert cache.stats()["expirations"] == 1
@@ -0,0 +1,73 @@
+# ================================================
+# FILE: tests_backend/test_coalesce_service.py
+# PURPOSE: Tests for single-flight coalescing of identical in-flight queries
+# ================================================
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from app.services.coalesce_service import SingleFlight, CoalesceTimeout
+
+def _run_concurrently(flights, key, compute, callers=5):
+    """Starts callers for one key while compute is blocked, returning their futures once all have joined."""
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        futures = [executor.submit(flights.do, key, compute) for _ in range(callers)]
+        return [future.exception() or future.result() for future in futures]
+
+def _blocking(result=None, error=None):
+    """A computation that waits until released, counting its calls."""
+    release, calls = threading.Event(), []
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        if error is not None:
+            raise error
+        return result
+    return compute, release, calls
+
+def _release_when_joined(flights, release, waiters):
+    def watch():
+        while flights.stats()["coalesced"] < waiters:
+            threading.Event().wait(0.001)
+        release.set()
+    threading.Thread(target=watch, daemon=True).start()
+
+def test_concurrent_callers_share_one_computation():
+    """Test that callers with the same key wait for one computation and get its result."""
+    flights = SingleFlight(timeout_seconds=5)
+    compute, release, calls = _blocking(result={"count": 1})
+    _release_when_joined(flights, release, 4)
+
+    results = _run_concurrently(flights, "same", compute)
+
+    assert results == [{"count": 1}] * 5
+    assert len(calls) == 1
+    assert flights.stats() == {"executed": 1, "coalesced": 4, "errors": 0, "timeouts": 0, "in_flight": 0}
+    # Nothing is kept afterwards: a later call computes again
+    assert flights.do("same", lambda: "fresh") == "fresh"
+
+def test_errors_propagate_to_every_waiter():
+    """Test that an exception in the shared computation is raised to every caller."""
+    flights = SingleFlight(timeout_seconds=5)
+    compute, release, calls = _blocking(error=RuntimeError("fetch failed"))
+    _release_when_joined(flights, release, 2)
+
+    results = _run_concurrently(flights, "same", compute, callers=3)
+
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) and str(result) == "fetch failed" for result in results)
+    assert flights.stats()["errors"] == 1
+
+def test_waiters_time_out():
+    """Test that a waiter gives up after the timeout while the computation keeps running."""
+    flights = SingleFlight(timeout_seconds=0.05)
+    compute, release, _ = _blocking(result="late")
+    leader = threading.Thread(target=flights.do, args=("slow", compute))
+    leader.start()
+    while flights.stats()["in_flight"] == 0:
+        threading.Event().wait(0.001)
+
+    with pytest.raises(CoalesceTimeout):
+        flights.do("slow", compute)
+    release.set()
+    leader.join()
+    assert flights.stats()["timeouts"] == 1
@@ -0,0 +1,201 @@
+# ================================================
+# FILE: tests_backend/test_data_service.py
+# PURPOSE: Tests for data fetching against a local Supabase stand-in
+# ================================================
+import numpy as np
+import pandas as pd
+import pytest
+from app.config import CAMPAIGN_VIEW_NAME, TARGET_VIEW_NAME
+from app.services import data_service, snapshot_service
+from .fakes import FakeSupabaseClient, FakeClock, CAMPAIGN_ROWS, TARGET_ROWS
+
+@pytest.fixture
+def fake_client(mocker):
+    """Installs a fake Supabase client and fresh snapshots on the data service."""
+    client = FakeSupabaseClient({CAMPAIGN_VIEW_NAME: CAMPAIGN_ROWS, TARGET_VIEW_NAME: TARGET_ROWS})
+    mocker.patch.object(data_service, 'supabase', client)
+    mocker.patch.object(data_service, 'campaign_snapshot', snapshot_service.ViewSnapshot(CAMPAIGN_VIEW_NAME, lambda: data_service.fetch_view_frame(CAMPAIGN_VIEW_NAME)))
+    mocker.patch.object(data_service, 'target_snapshot', snapshot_service.ViewSnapshot(TARGET_VIEW_NAME, lambda: data_service.fetch_view_frame(TARGET_VIEW_NAME)))
+    mocker.patch.object(data_service, 'influencer_names_snapshot', snapshot_service.ViewSnapshot(CAMPAIGN_VIEW_NAME, lambda: data_service.fetch_view_frame(CAMPAIGN_VIEW_NAME, columns=['influencer_name'])))
+    return client
+
+@pytest.mark.parametrize("payload", [
+    {"view": "summary", "filters": {}},
+    {"view": "summary", "filters": {"year": "2025", "market": "Nordics"}},
+    {"view": "monthly_breakdown", "filters": {"month": "Jan", "market": "All"}},
+    {"view": "weekly_breakdown_by_number", "filters": {"week_number": "2"}},
+    {"view": "summary", "filters": {"influencer_name": " anna "}},
+    {"view": "summary", "filters": {"market": "France"}}
+])
+def test_snapshot_mode_matches_remote_filters(fake_client, mocker, payload):
+    """Test that locally filtered snapshots give the same results as Supabase-side filtering."""
+    remote = data_service.get_analytics_data(payload)
+    mocker.patch.object(data_service, 'SNAPSHOT_MODE', True)
+    local = data_service.get_analytics_data(payload)
+
+    assert local == remote
+
+@pytest.mark.parametrize("filters", [{}, {"market": "Nordics"}, {"market": "UK", "year": 2025}])
+def test_snapshot_mode_dashboard_matches_remote_filters(fake_client, mocker, filters):
+    """Test the dashboard source against a target snapshot."""
+    remote = data_service.get_dashboard_data({"filters": filters})
+    mocker.patch.object(data_service, 'SNAPSHOT_MODE', True)
+    local = data_service.get_dashboard_data({"filters": filters})
+
+    assert local == remote
+
+def test_market_comparison_uses_one_fetch(fake_client):
+    """Test that the comparison view pushes the market list down and fetches once."""
+    result = data_service.get_dashboard_data({"view": "market_comparison", "filters": {"markets": ["UK", "Nordics"], "year": 2025}})
+
+    assert len(fake_client.executed) == 1
+    assert ('in', 'region', ["UK", "Sweden", "Norway", "Denmark"]) in fake_client.executed[0].filters
+    assert result['markets']['UK']['kpi_summary'] == data_service.get_dashboard_data({"filters": {"market": "UK", "year": 2025}})['kpi_summary']
+    assert result['markets']['Norway'] == {"kpi_summary": {}, "monthly_detail": []}
+    assert result['markets']['Nordics']['kpi_summary']['target_budget'] == 100
+
+def test_snapshot_loaded_once_across_queries(fake_client, mocker):
+    """Test that repeated queries in snapshot mode reuse a single fetch."""
+    mocker.patch.object(data_service, 'SNAPSHOT_MODE', True)
+    for market in ["Sweden", "UK", "Nordics"]:
+        data_service.get_analytics_data({"view": "summary", "filters": {"market": market}})
+
+    assert len(fake_client.executed) == 1
+
+def test_snapshot_refreshes_after_ttl(fake_client):
+    """Test TTL expiry and on-demand refresh, including refresh listeners."""
+    client, clock, refreshed = fake_client, FakeClock(), []
+    snapshot = snapshot_service.ViewSnapshot(CAMPAIGN_VIEW_NAME, lambda: data_service.fetch_view_frame(CAMPAIGN_VIEW_NAME), ttl_seconds=60, clock=clock)
+    snapshot.on_refresh(refreshed.append)
+
+    snapshot.get_frame()
+    clock.now = 59
+    snapshot.get_frame()
+    assert len(client.executed) == 1
+
+    clock.now = 60
+    snapshot.get_frame()
+    snapshot.refresh()
+    assert len(client.executed) == 3
+    assert refreshed == [CAMPAIGN_VIEW_NAME] * 3
+
+def test_fetch_view_frame_pages_through_capped_responses(fake_client, mocker):
+    """Test that concurrent range paging over a unique order reassembles every row when the server caps page size."""
+    rows = [dict(CAMPAIGN_ROWS[i % len(CAMPAIGN_ROWS)], influencer_name=f'influencer_{i:02d}') for i in range(11)]
+    fake_client.tables[CAMPAIGN_VIEW_NAME] = rows[::-1]
+    fake_client.max_rows = 3
+    mocker.patch.object(data_service, 'FETCH_PAGE_SIZE', 5)
+    mocker.patch.object(data_service, 'FETCH_ORDER_COLUMN', 'influencer_name')
+    executor = mocker.spy(data_service, 'ThreadPoolExecutor')
+
+    df = data_service.fetch_view_frame(CAMPAIGN_VIEW_NAME, [('eq', 'year', 2025)])
+
+    expected = [row['influencer_name'] for row in rows if row['year'] == 2025]
+    assert df['influencer_name'].tolist() == expected
+    assert [query.range_bounds for query in fake_client.executed] == [(0, 4), (3, 5), (6, 8)]
+    assert all(query.order_by == [('influencer_name', False)] for query in fake_client.executed)
+    executor.assert_called_once()
+
+def test_fetch_view_frame_orders_every_page_by_default(fake_client):
+    """Test that every page, including the first, is ordered by the view's primary key unless configured otherwise."""
+    fake_client.tables[CAMPAIGN_VIEW_NAME] = [dict(row, id=len(CAMPAIGN_ROWS) - i) for i, row in enumerate(CAMPAIGN_ROWS)]
+    fake_client.max_rows = 2
+
+    df = data_service.fetch_view_frame(CAMPAIGN_VIEW_NAME)
+
+    assert len(df) == len(CAMPAIGN_ROWS)
+    assert [query.range_bounds for query in fake_client.executed] == [(0, 999), (2, 3)]
+    assert all(query.order_by == [('id', False)] for query in fake_client.executed)
+
+def test_fetch_view_frame_refuses_to_page_without_order_column(fake_client, mocker):
+    """Test that a view spanning several pages is refused, not read inconsistently, when no order column is set."""
+    fake_client.max_rows = 2
+    mocker.patch.object(data_service, 'FETCH_ORDER_COLUMN', '')
+
+    with pytest.raises(RuntimeError, match='FETCH_ORDER_COLUMN'):
+        data_service.fetch_view_frame(CAMPAIGN_VIEW_NAME)
+    assert len(fake_client.executed) == 1
+
+def test_fetch_view_frame_single_page_without_order_column(fake_client, mocker):
+    """Test that a view fitting in one page is still read when no order column is set."""
+    mocker.patch.object(data_service, 'FETCH_ORDER_COLUMN', '')
+
+    df = data_service.fetch_view_frame(CAMPAIGN_VIEW_NAME)
+
+    assert len(df) == len(CAMPAIGN_ROWS)
+    assert fake_client.executed[0].order_by == []
+
+def test_fetch_view_frame_without_row_count(fake_client):
+    """Test sequential paging when the server does not report an exact count."""
+    fake_client.report_count = False
+    fake_client.max_rows = 2
+
+    df = data_service.fetch_view_frame(CAMPAIGN_VIEW_NAME)
+
+    assert len(df) == len(CAMPAIGN_ROWS)
+    assert len(fake_client.executed) == 3
+
+def test_batch_shares_fetches_and_matches_single_queries(fake_client):
+    """Test that a batch answers each query as a single request would, with one fetch per distinct filter set."""
+    filters = {"market": "Nordics", "year": 2025}
+    payloads = [
+        {"source": "dashboard", "filters": filters},
+        {"source": "influencer_analytics", "view": "summary", "filters": filters},
+        {"source": "influencer_analytics", "view": "discovery_tiers", "tier": "gold", "filters": filters},
+        {"source": "influencer_analytics", "view": "monthly_breakdown", "filters": filters},
+        {"source": "influencer_analytics", "view": "summary", "filters": {"market": "UK"}, "format": "columnar"},
+        {"source": "unknown"},
+        {"source": "influencer_analytics", "filters": {"year": "not-a-year"}}
+    ]
+    single = [data_service.get_dashboard_data(payloads[0])] + [data_service.get_analytics_data(p) for p in payloads[1:5]]
+    fake_client.executed.clear()
+
+    results = data_service.get_batch_data(payloads)
+
+    assert results[:5] == single
+    assert "Invalid 'source'" in results[5]["error"]
+    assert results[6]["error"].startswith("Influencer Analytics query failed")
+    assert sorted(query.view_name for query in fake_client.executed) == [CAMPAIGN_VIEW_NAME, CAMPAIGN_VIEW_NAME, TARGET_VIEW_NAME]
+
+RANGE_ROWS = CAMPAIGN_ROWS + [
+    dict(CAMPAIGN_ROWS[0], influencer_name='Dag Ek', live_date_clean='2025-02-28T10:30:00'),
+    dict(CAMPAIGN_ROWS[1], influencer_name='Eva Holm', live_date_clean=None),
+    dict(CAMPAIGN_ROWS[2], influencer_name='Finn Ask', live_date_clean='not a date'),
+    dict(CAMPAIGN_ROWS[3], influencer_name='Gun Berg', live_date_clean='2025-03-01')
+]
+
+@pytest.mark.parametrize("date_from, date_to", [
+    ("2025-01-01", "2025-02-28"),
+    ("2025-1-9", "2025-2-28 12:00"),
+    ("2024-01-01", "2026-01-01"),
+    ("2026-01-01", "2026-02-01")
+])
+def test_custom_range_pushdown_and_snapshot_index(fake_client, mocker, date_from, date_to):
+    """Test that the date range is pushed into the query and answered from the snapshot's date index alike."""
+    fake_client.tables[CAMPAIGN_VIEW_NAME] = RANGE_ROWS
+    payload = {"view": "custom_range_breakdown", "filters": {"date_from": date_from, "date_to": date_to}}
+
+    remote = data_service.get_analytics_data(payload)
+    pushed = [f for f in fake_client.executed[-1].filters if f[1] == 'live_date_clean']
+    snapshot = snapshot_service.ViewSnapshot(CAMPAIGN_VIEW_NAME, lambda: data_service.fetch_view_frame(CAMPAIGN_VIEW_NAME), date_columns=('live_date_clean',))
+    mocker.patch.multiple(data_service, SNAPSHOT_MODE=True, campaign_snapshot=snapshot)
+    index = mocker.spy(snapshot_service.SortedRangeIndex, 'range_positions')
+    local = data_service.get_analytics_data(payload)
+
+    assert [op for op, _, _ in pushed] == ['gte', 'lt']
+    assert index.call_count == 1
+    assert local == remote
+
+def test_sorted_range_index_matches_masks():
+    """Test binary-searched date ranges against boolean masks over parsed dates."""
+    rng = np.random.default_rng(1)
+    dates = pd.Series(pd.to_datetime('2024-01-01') + pd.to_timedelta(rng.integers(0, 500, 2000), unit='D')).dt.strftime('%Y-%m-%d')
+    dates[rng.random(2000) < 0.1] = None
+    index = snapshot_service.SortedRangeIndex(dates)
+    parsed = pd.to_datetime(dates)
+
+    for clauses in [[('gte', 'd', '2024-03-01'), ('lt', 'd', '2024-04-01')], [('gt', 'd', '2024-12-31')], [('lte', 'd', '2024-01-01')], [('gte', 'd', '2030-01-01')]]:
+        mask = np.ones(len(dates), dtype=bool)
+        for operator, _, value in clauses:
+            mask &= snapshot_service._COMPARISONS[operator](parsed, pd.Timestamp(value)).to_numpy()
+        assert index.range_positions(clauses).tolist() == np.flatnonzero(mask).tolist()
@@ -2,8 +2,15 @@
 # FILE: tests_backend/test_processing_service.py
 # PURPOSE: Tests for the data transformation logic
 # ================================================
+import json
+import math
+import numpy as np
+import pytest
 import pandas as pd
-from app.services import processing_service
+from app.config import CAMPAIGN_VIEW_NAME
+from app.services import processing_service, schema_service
+from app.utils import convert_to_eur
+from .fakes import CAMPAIGN_ROWS, TARGET_ROWS
 
 def test_process_dashboard_data():
     """Test basic aggregation for dashboard data."""
@@ -68,3 +75,249 @@ def test_process_custom_range_breakdown():
     assert len(result['details']) == 2
     assert result['summary']['total_spend_eur'] == 300
     assert result['summary']['total_conversions'] == 25
+
+def _legacy_influencer_summary(df: pd.DataFrame):
+    """Reference implementation of the summary view prior to the named-aggregation rewrite."""
+    grouped = df.groupby('influencer_name').apply(lambda x: pd.Series({
+        'campaign_count': int(len(x)),
+        'total_conversions': int(x['actual_conversions_clean'].sum()),
+        'total_views': int(x['views'].sum()),
+        'total_clicks': int(x['clicks'].sum()),
+        'markets': list(x['market'].unique()),
+        'assets': list(x['asset'].dropna().unique()),
+        'total_spend_eur': float(sum(convert_to_eur(row['total_budget_clean'], row['currency']) for _, row in x.iterrows())),
+        'avg_ctr': float(x[x['ctr_clean'] > 0]['ctr_clean'].mean()),
+        'avg_cvr': float(x[x['cvr_clean'] > 0]['cvr_clean'].mean())
+    })).reset_index()
+    grouped['effective_cac_eur'] = (grouped['total_spend_eur'] / grouped['total_conversions']).fillna(0).replace([float('inf'), -float('inf')], 0)
+    grouped.fillna({'avg_ctr': 0, 'avg_cvr': 0}, inplace=True)
+    return {"source": "influencer_summary", "count": len(grouped), "items": grouped.to_dict(orient='records')}
+
+def _random_campaign_frame(n: int = 2000, seed: int = 42) -> pd.DataFrame:
+    """Campaign rows with repeated influencers, mixed currencies and gaps."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'influencer_name': rng.choice([f'influencer_{i}' for i in range(150)], n),
+        'market': rng.choice(['Sweden', 'Norway', 'Denmark', 'UK', 'France'], n),
+        'currency': rng.choice(['SEK', 'NOK', 'DKK', 'GBP', 'EUR', 'USD'], n),
+        'asset': rng.choice(['Reel', 'Story', 'Post', None], n),
+        'total_budget_clean': rng.integers(0, 60000, n) * 1.01,
+        'actual_conversions_clean': rng.integers(0, 30, n),
+        'views': rng.integers(0, 200000, n),
+        'clicks': rng.integers(0, 5000, n),
+        'ctr_clean': rng.random(n) * (rng.random(n) > 0.4),
+        'cvr_clean': rng.random(n) * (rng.random(n) > 0.4)
+    })
+
+def test_influencer_process_summary_matches_legacy_output():
+    """Test the named-aggregation summary produces byte-for-byte the same JSON as the legacy groupby/apply."""
+    df = _random_campaign_frame()
+
+    result = processing_service._influencer_process_summary(df, {})
+
+    assert json.dumps(result) == json.dumps(_legacy_influencer_summary(df))
+
+def test_group_sums_reproduce_python_and_numpy_rounding():
+    """Test the vectorized segment sums against sum() and ndarray.sum() on short, blocked and split segments."""
+    rng = np.random.default_rng(11)
+    lengths = np.concatenate([rng.integers(1, 8, 40), rng.integers(8, 129, 40), rng.integers(129, 3000, 20)])
+    values = rng.random(lengths.sum()) * rng.choice([1e-3, 1.0, 1e6], lengths.sum())
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    segments = [values[start:start + length] for start, length in zip(starts, lengths)]
+
+    assert processing_service._sequential_sums(values, starts, lengths).tolist() == [sum(v.tolist()) for v in segments]
+    assert processing_service._pairwise_sums(values, starts, lengths).tolist() == [v.sum() for v in segments]
+
+def _legacy_discovery_tiers(df: pd.DataFrame, requested_tier: str = None):
+    """Reference implementation of the discovery tiers prior to the rank-based rewrite."""
+    grouped = pd.DataFrame(_legacy_influencer_summary(df)["items"])
+    zero_cac = grouped[grouped['effective_cac_eur'] <= 0]
+    ranked = grouped[grouped['effective_cac_eur'] > 0].sort_values(by='effective_cac_eur', ascending=True, kind='stable')
+    top, mid = math.ceil(len(ranked) / 3), math.ceil(len(ranked) * 2 / 3)
+    tiers = {"gold": ranked.iloc[:top], "silver": ranked.iloc[top:mid], "bronze": pd.concat([ranked.iloc[mid:], zero_cac])}
+    tiers = {tier: frame.to_dict(orient='records') for tier, frame in tiers.items()}
+    return tiers[requested_tier] if requested_tier else {"source": "discovery_tiers", **tiers}
+
+def test_discovery_tiers_match_legacy_split():
+    """Test the rank-based split against sorting the rebuilt summary frame."""
+    df = _random_campaign_frame(seed=3)
+    df.loc[df['influencer_name'] == 'influencer_7', 'actual_conversions_clean'] = 0
+
+    result = processing_service._influencer_process_discovery_tiers(df, {})
+
+    assert json.dumps(result) == json.dumps(_legacy_discovery_tiers(df))
+    assert result["bronze"][-1]["influencer_name"] == 'influencer_7'
+
+@pytest.mark.parametrize("tier", ["gold", "silver", "bronze"])
+def test_discovery_tier_pages(tier):
+    """Test that a requested tier is paged with limit and offset."""
+    df = _random_campaign_frame(seed=5)
+    expected = _legacy_discovery_tiers(df, tier)
+
+    first = processing_service._influencer_process_discovery_tiers(df.copy(), {"filters": {"tier": tier.upper()}, "limit": 10})
+    second = processing_service._influencer_process_discovery_tiers(df.copy(), {"filters": {"tier": tier}, "limit": 10, "offset": 10})
+
+    assert first["tier"] == tier and first["total"] == len(expected)
+    assert json.dumps(first["items"] + second["items"]) == json.dumps(expected[:20])
+
+def test_discovery_tiers_reject_negative_limit():
+    """Test paging validation."""
+    result = processing_service._influencer_process_discovery_tiers(_random_campaign_frame(50), {"limit": -1})
+
+    assert "error" in result
+
+@pytest.mark.parametrize("sort", [None, {"by": "total_spend_eur"}, {"by": "effective_cac_eur", "order": "asc"}, {"by": "campaign_count"}])
+def test_summary_cursor_pages_cover_the_full_order(sort):
+    """Test that walking summary pages by cursor yields every influencer once, in the full stable order."""
+    df = _random_campaign_frame(seed=9)
+    full = processing_service._influencer_process_summary(df.copy(), {"sort": sort} if sort else {})["items"]
+
+    pages, cursor = [], None
+    while True:
+        page = processing_service._influencer_process_summary(df.copy(), {"sort": sort, "limit": 40, "cursor": cursor})
+        pages.extend(page["items"])
+        assert page["total"] == len(full)
+        if not (cursor := page["next_cursor"]):
+            break
+
+    assert json.dumps(pages) == json.dumps(full)
+
+@pytest.mark.parametrize("sort", [None, {"by": "total_spend_eur"}, {"by": "influencer_name", "order": "desc"}])
+def test_summary_cursor_pages_over_typed_frame(sort):
+    """Test cursor paging over the categorical columns of a frame typed by schema_service, as fetched."""
+    df = schema_service.build_frame(_random_campaign_frame(seed=9), CAMPAIGN_VIEW_NAME)
+    full = processing_service._influencer_process_summary(df.copy(), {"sort": sort} if sort else {})["items"]
+
+    pages, cursor = [], None
+    while True:
+        page = processing_service._influencer_process_summary(df.copy(), {"sort": sort, "limit": 40, "cursor": cursor})
+        assert "error" not in page
+        pages.extend(page["items"])
+        if not (cursor := page["next_cursor"]):
+            break
+
+    assert [item["influencer_name"] for item in pages] == [item["influencer_name"] for item in full]
+
+def test_summary_top_n_and_offset():
+    """Test top-N selection and offset paging against the fully sorted summary."""
+    df = _random_campaign_frame(seed=9)
+    sort = {"by": "total_conversions", "order": "desc"}
+    full = processing_service._influencer_process_summary(df.copy(), {"sort": sort})["items"]
+
+    top = processing_service._influencer_process_summary(df.copy(), {"sort": sort, "limit": 5})
+    later = processing_service._influencer_process_summary(df.copy(), {"sort": sort, "limit": 5, "offset": 5})
+
+    assert top["count"] == 5 and top["items"] == full[:5]
+    assert later["items"] == full[5:10]
+
+@pytest.mark.parametrize("payload", [
+    {"limit": "x"},
+    {"cursor": "not-a-cursor"},
+    {"sort": {"by": "no_such_column"}, "limit": 5}
+])
+def test_summary_paging_errors(payload):
+    """Test invalid paging input is reported as an error."""
+    assert "error" in processing_service._influencer_process_summary(_random_campaign_frame(50), payload)
+
+def test_summary_cursor_must_match_sort():
+    """Test that a cursor cannot be reused with a different sort."""
+    df = _random_campaign_frame(200)
+    cursor = processing_service._influencer_process_summary(df.copy(), {"sort": {"by": "total_views"}, "limit": 3})["next_cursor"]
+
+    result = processing_service._influencer_process_summary(df.copy(), {"sort": {"by": "total_clicks"}, "limit": 3, "cursor": cursor})
+
+    assert "does not match" in result["error"]
+
+@pytest.mark.parametrize("view", sorted(processing_service.ANALYTICS_VIEW_COLUMNS))
+def test_analytics_views_only_read_declared_columns(view):
+    """Test each view on a frame holding only its declared columns; an undeclared column access raises."""
+    payload = {"view": view, "filters": {"date_from": "2025-01-01", "date_to": "2025-12-31", "week_number": 2}}
+    columns = processing_service.required_analytics_columns(payload)
+
+    projected = processing_service.route_analytics_processing(pd.DataFrame(CAMPAIGN_ROWS)[columns], payload)
+    full = processing_service.route_analytics_processing(pd.DataFrame(CAMPAIGN_ROWS), payload)
+
+    assert "error" not in projected
+    assert projected == full
+
+def test_nordics_dashboard_only_reads_declared_columns():
+    """Test the Nordics dashboard rollup on its declared columns only."""
+    payload = {"filters": {"market": "Nordics"}}
+    columns = processing_service.required_dashboard_columns(payload)
+
+    projected = processing_service.process_dashboard_data(pd.DataFrame(TARGET_ROWS)[columns], "Nordics")
+
+    assert projected == processing_service.process_dashboard_data(TARGET_ROWS, "Nordics")
+
+def test_market_comparison_matches_single_market_dashboards():
+    """Test that one comparison pass gives each market's and the Nordics dashboard KPIs."""
+    rows = TARGET_ROWS + [
+        {'year': 2025, 'month': 'Feb', 'region': 'Sweden', 'currency': 'SEK', 'target_budget_clean': 2260, 'actual_spend_clean': 1695, 'target_conversions_clean': 20, 'actual_conversions_clean': 12},
+        {'year': 2025, 'month': 'Jan', 'region': 'Denmark', 'currency': 'DKK', 'target_budget_clean': 746, 'actual_spend_clean': None, 'target_conversions_clean': 5, 'actual_conversions_clean': 1}
+    ]
+    frame = pd.DataFrame(rows)
+    result = processing_service.process_market_comparison(frame[processing_service.MARKET_COMPARISON_COLUMNS].copy(), ["Sweden", "UK", "Norway", "Denmark", "Finland"])
+
+    assert result['source'] == "dashboard_comparison"
+    assert list(result['markets']) == ["Sweden", "UK", "Norway", "Denmark", "Finland", "Nordics"]
+    for market in ["Sweden", "UK", "Norway", "Denmark"]:
+        single = processing_service.process_dashboard_data(frame[frame['region'] == market].copy(), market)
+        assert result['markets'][market]['kpi_summary'] == single['kpi_summary']
+        assert [row['month'] for row in result['markets'][market]['monthly_detail']] == [row['month'] for row in single['monthly_detail']]
+    assert result['markets']['Finland'] == {"kpi_summary": {}, "monthly_detail": []}
+
+    nordics = processing_service.process_dashboard_data(frame[frame['region'].isin(["Sweden", "Norway", "Denmark"])].copy(), "Nordics")
+    assert result['markets']['Nordics']['kpi_summary'] == nordics['kpi_summary']
+    for combined, single in zip(result['markets']['Nordics']['monthly_detail'], nordics['monthly_detail']):
+        assert combined == {key: pytest.approx(value) if isinstance(value, float) else value for key, value in single.items()}
+
+def test_weekly_series_matches_per_week_breakdowns():
+    """Test the one-pass weekly series against per-week breakdowns and looped windows."""
+    df = _random_campaign_frame(n=600)
+    rng = np.random.default_rng(7)
+    df['wk_clean'] = rng.choice([w for w in range(1, 53) if w not in (10, 11, 30)], len(df)).astype(float)
+    df.loc[df.index[::50], 'wk_clean'] = np.nan
+    df['live_date_clean'] = '2025-01-01'
+    df['year'] = 2025
+
+    result = processing_service._influencer_process_weekly_series(df.copy(), {})
+    weeks = result['weeks']
+
+    assert [row['week'] for row in weeks] == list(range(1, 53))
+    assert weeks[9]['spend_eur'] == 0 and weeks[9]['influencer_count'] == 0 and weeks[9]['cac_eur'] == 0
+    for row in weeks:
+        single = processing_service._influencer_process_weekly_breakdown_by_number(df[df['wk_clean'] == row['week']].copy(), {})
+        if not single['summary']:
+            continue
+        assert row['spend_eur'] == pytest.approx(single['summary']['total_spend_eur'])
+        assert row['conversions'] == single['summary']['total_conversions']
+        assert row['cac_eur'] == pytest.approx(single['summary']['avg_cac_eur'])
+        assert row['influencer_count'] == single['summary']['influencer_count']
+
+    for i, row in enumerate(weeks):
+        window = weeks[max(0, i - 3):i + 1]
+        assert row['rolling_spend_eur'] == pytest.approx(sum(w['spend_eur'] for w in window))
+        assert row['rolling_conversions'] == sum(w['conversions'] for w in window)
+        assert row['cumulative_conversions'] == sum(w['conversions'] for w in weeks[:i + 1])
+        assert row['cumulative_influencers'] == df.loc[df['wk_clean'] <= row['week'], 'influencer_name'].nunique()
+    assert result['summary']['total_conversions'] == weeks[-1]['cumulative_conversions']
+    assert result['summary']['influencer_count'] == df.dropna(subset=['wk_clean'])['influencer_name'].nunique()
+    assert processing_service._influencer_process_weekly_series(df.iloc[:0].copy(), {}) == {"summary": {}, "weeks": []}
+
+def test_weekly_series_keeps_years_apart():
+    """Test that the same week number in different years stays separate and windows run on across the year end."""
+    df = pd.DataFrame({
+        'influencer_name': ['A', 'B', 'A', 'C'],
+        'currency': 'EUR',
+        'total_budget_clean': [100.0, 200.0, 300.0, 400.0],
+        'actual_conversions_clean': [1, 2, 3, 4],
+        'year': [2024, 2024, 2025, 2025],
+        'wk_clean': [1, 51, 1, 2]
+    })
+
+    weeks = processing_service._influencer_process_weekly_series(df, {})['weeks']
+
+    assert [(row['year'], row['week']) for row in weeks] == [(2024, w) for w in range(1, 53)] + [(2025, 1), (2025, 2)]
+    assert weeks[0]['spend_eur'] == 100 and weeks[52]['spend_eur'] == 300
+    assert weeks[52]['rolling_spend_eur'] == 500 and weeks[53]['rolling_spend_eur'] == 900
+    assert [row['cumulative_influencers'] for row in (weeks[0], weeks[50], weeks[52], weeks[53])] == [1, 2, 2, 3]
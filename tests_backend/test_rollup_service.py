@@ -0,0 +1,128 @@
+# ================================================
+# FILE: tests_backend/test_rollup_service.py
+# PURPOSE: Tests for rollup-answered views and incremental rollup maintenance
+# ================================================
+import random
+import threading
+import numpy as np
+import pytest
+from app.config import CAMPAIGN_VIEW_NAME
+from app.services import data_service, processing_service, rollup_service, schema_service, snapshot_service
+from .fakes import FakeSupabaseClient, CAMPAIGN_ROWS
+
+def _campaign_rows(count, seed=7):
+    """Varied campaign rows built from the sample rows, including gaps and repeated cells."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        row = dict(rng.choice(CAMPAIGN_ROWS))
+        row.update(
+            influencer_name=rng.choice(['Anna Berg', 'Bo Lind', 'Cleo Dahl', 'Dag Ek', 'Eva Ås']),
+            month=rng.choice(['Jan', 'Feb', 'Mar', None]),
+            total_budget_clean=rng.randint(0, 20000) / 7,
+            actual_conversions_clean=rng.choice([0, 1, 5, 12]),
+            asset=rng.choice(['Reel', 'Story', None]),
+            ctr_clean=rng.choice([0, 0.01, 0.05]),
+            campaign_id=i
+        )
+        rows.append(row)
+    return rows
+
+def _rounded(obj, ordered_lists=True):
+    """Rounds floats so rollup sums can be compared with row-order sums."""
+    if isinstance(obj, dict):
+        return {key: _rounded(value, ordered_lists) for key, value in obj.items()}
+    if isinstance(obj, list):
+        values = [_rounded(value, ordered_lists) for value in obj]
+        return values if ordered_lists or any(isinstance(v, dict) for v in values) else sorted(values, key=str)
+    return round(obj, 6) if isinstance(obj, float) else obj
+
+@pytest.fixture
+def rollup_mode(mocker):
+    """Serves the campaign view from a snapshot of generated rows, with rollup mode switchable."""
+    client = FakeSupabaseClient({CAMPAIGN_VIEW_NAME: _campaign_rows(120)})
+    mocker.patch.object(data_service, 'supabase', client)
+    mocker.patch.object(data_service, 'campaign_snapshot', snapshot_service.ViewSnapshot(CAMPAIGN_VIEW_NAME, lambda: data_service.fetch_view_frame(CAMPAIGN_VIEW_NAME)))
+    mocker.patch.object(data_service, 'campaign_rollups', rollup_service.RollupStore())
+    mocker.patch.object(data_service, 'SNAPSHOT_MODE', True)
+    return lambda enabled: mocker.patch.object(data_service, 'ROLLUP_MODE', enabled)
+
+@pytest.mark.parametrize("payload", [
+    {"view": "summary", "filters": {}},
+    {"view": "summary", "filters": {"market": "Nordics", "year": 2025}, "sort": {"by": "total_spend_eur", "order": "desc"}},
+    {"view": "discovery_tiers", "filters": {}},
+    {"view": "discovery_tiers", "filters": {"tier": "gold", "month": "Jan"}},
+    {"view": "monthly_breakdown", "filters": {"market": "UK"}},
+    {"view": "summary", "filters": {"market": "France"}}
+])
+def test_rollup_views_match_row_processing(rollup_mode, payload):
+    """Test that views answered from rollups match the row-based results."""
+    rollup_mode(False)
+    from_rows = data_service.get_analytics_data(payload)
+    rollup_mode(True)
+    from_rollups = data_service.get_analytics_data(payload)
+
+    assert data_service.campaign_rollups.cell_count > 0
+    assert _rounded(from_rollups) == _rounded(from_rows)
+
+def test_rollups_fall_back_to_rows_for_unkeyed_filters(rollup_mode, mocker):
+    """Test that filters outside the rollup keys are still answered from rows."""
+    rollup_mode(True)
+    processing = mocker.spy(processing_service, 'route_rollup_processing')
+
+    data_service.get_analytics_data({"view": "summary", "filters": {"week_number": 2}})
+
+    assert processing.call_count == 0
+
+def test_batch_answers_keyed_filters_from_rollups(rollup_mode, mocker):
+    """Test that batch sub-queries take the rollup path a single query would, and give the same answers."""
+    rollup_mode(True)
+    payloads = [{"source": "influencer_analytics", "view": "summary", "filters": {"market": "UK"}},
+                {"source": "influencer_analytics", "view": "summary", "filters": {"week_number": 2}}]
+    expected = [data_service.get_analytics_data(payload) for payload in payloads]
+    processing = mocker.spy(processing_service, 'route_rollup_processing')
+
+    assert data_service.get_batch_data(payloads) == expected
+    assert processing.call_count == 1
+
+def test_incremental_updates_match_rebuild():
+    """Test that adding, changing and removing rows leaves the same cells as a full rebuild."""
+    rows = _campaign_rows(90, seed=11)
+    frame = schema_service.build_frame(rows, CAMPAIGN_VIEW_NAME)
+    store = rollup_service.RollupStore()
+    store.rebuild(frame.iloc[:60].reset_index(drop=True))
+    store.add_rows(frame.iloc[60:].reset_index(drop=True))
+
+    changed = [dict(row, total_budget_clean=row['total_budget_clean'] + 100, market='Norway') for row in rows[:10]]
+    store.replace_rows(frame.iloc[:10], schema_service.build_frame(changed, CAMPAIGN_VIEW_NAME), first_rows=np.arange(10))
+    store.remove_rows(frame.iloc[80:])
+
+    final_rows = changed + rows[10:80]
+    # Changed rows keep their original positions
+    rebuilt = rollup_service.RollupStore()
+    rebuilt.rebuild(schema_service.build_frame(final_rows, CAMPAIGN_VIEW_NAME))
+
+    for payload in [{"view": "summary"}, {"view": "discovery_tiers"}]:
+        incremental = processing_service.route_rollup_processing(*store.select([]), payload)
+        expected = processing_service.route_rollup_processing(*rebuilt.select([]), payload)
+        # Removals keep a cell's first row position, so market and asset lists may be ordered differently
+        assert _rounded(incremental, ordered_lists=False) == _rounded(expected, ordered_lists=False)
+    assert store.cell_count == rebuilt.cell_count
+
+def test_concurrent_ensure_built_builds_once(mocker):
+    """Test that threads asking for rollups of the same new frame share a single build."""
+    frame = schema_service.build_frame(_campaign_rows(30), CAMPAIGN_VIEW_NAME)
+    store = rollup_service.RollupStore()
+    release = threading.Event()
+    campaign_rollups = processing_service.campaign_rollups
+    build = mocker.patch.object(processing_service, 'campaign_rollups', side_effect=lambda *args: release.wait(1) and campaign_rollups(*args))
+
+    threads = [threading.Thread(target=store.ensure_built, args=(frame,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert build.call_count == 1
+    assert store.describes(frame)
@@ -3,6 +3,13 @@
 # PURPOSE: Tests for the API endpoints in routes.py
 # ================================================
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.config import CAMPAIGN_VIEW_NAME
+from app.services import timing_service
+from app.services.coalesce_service import SingleFlight
+from .fakes import FakeSupabaseClient, CAMPAIGN_ROWS
 
 def test_health_check(test_client):
     """Test the health check endpoint."""
@@ -57,3 +64,154 @@ def test_handle_influencer_query_service_error(test_client, mocker):
     
     assert response.status_code == 400
     assert response.json['error'] == 'Database connection failed'
+
+@pytest.mark.parametrize("limit", [-1, "ten", 2.5, None])
+def test_name_search_rejects_invalid_limit(test_client, limit):
+    """Test that a name_search limit that is not a non-negative integer is a payload error."""
+    payload = {"source": "influencer_analytics", "view": "name_search", "query": "anna", "limit": limit}
+    response = test_client.post('/api/influencer/query', data=json.dumps(payload), content_type='application/json')
+
+    assert response.status_code == 400
+    assert "'limit'" in response.json['error']
+
+def test_handle_influencer_query_serves_equivalent_payload_from_cache(test_client, mocker):
+    """Test that an equivalent repeated payload is answered from the response cache."""
+    mock_data = {"source": "influencer_summary", "count": 1, "items": [{"influencer_name": "Test Influencer"}]}
+    service = mocker.patch('app.services.data_service.get_analytics_data', return_value=mock_data)
+
+    first = {"source": "influencer_analytics", "view": "summary", "filters": {"market": "UK", "year": "2025", "month": "All"}}
+    second = {"filters": {"year": 2025, "market": "UK"}, "source": "influencer_analytics"}
+    test_client.post('/api/influencer/query', data=json.dumps(first), content_type='application/json')
+    response = test_client.post('/api/influencer/query', data=json.dumps(second), content_type='application/json')
+
+    assert response.status_code == 200
+    assert response.json == mock_data
+    assert service.call_count == 1
+    stats = test_client.get('/api/cache/stats').json
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+def test_handle_influencer_query_columnar_format(test_client, mocker):
+    """Test that the columnar format carries the same data as the default record layout."""
+    mocker.patch('app.services.data_service.supabase', FakeSupabaseClient({CAMPAIGN_VIEW_NAME: CAMPAIGN_ROWS}))
+
+    payload = {"source": "influencer_analytics", "view": "summary", "filters": {"year": 2025}}
+    records = test_client.post('/api/influencer/query', data=json.dumps(payload), content_type='application/json').json
+    columnar = test_client.post('/api/influencer/query', data=json.dumps({**payload, "format": "columnar"}), content_type='application/json').json
+
+    assert columnar['count'] == records['count'] == 3
+    assert columnar['items']['influencer_name'] == [item['influencer_name'] for item in records['items']]
+    assert columnar['items']['total_spend_eur'] == [item['total_spend_eur'] for item in records['items']]
+
+def test_handle_influencer_query_invalid_format(test_client):
+    """Test request with an unsupported response format."""
+    payload = {"source": "dashboard", "format": "xml"}
+    response = test_client.post('/api/influencer/query', data=json.dumps(payload), content_type='application/json')
+
+    assert response.status_code == 400
+    assert "Invalid 'format'" in response.json['error']
+
+def test_handle_influencer_query_ndjson_stream(test_client, mocker):
+    """Test that the NDJSON stream carries the summary first and then the same rows as the record layout."""
+    mocker.patch('app.services.data_service.supabase', FakeSupabaseClient({CAMPAIGN_VIEW_NAME: CAMPAIGN_ROWS}))
+
+    payload = {"source": "influencer_analytics", "view": "custom_range_breakdown", "filters": {"date_from": "2025-01-01", "date_to": "2025-02-28"}}
+    records = test_client.post('/api/influencer/query', data=json.dumps(payload), content_type='application/json').json
+    response = test_client.post('/api/influencer/query', data=json.dumps({**payload, "format": "ndjson"}), content_type='application/json')
+    lines = [json.loads(line) for line in response.data.splitlines()]
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert lines[0] == {"type": "summary", **{k: v for k, v in records.items() if k != 'details'}, "sections": {"details": len(records['details'])}}
+    assert lines[1] == {"type": "section", "name": "details", "count": len(records['details'])}
+    assert lines[2:] == records['details']
+
+def test_handle_influencer_batch_query(test_client, mocker):
+    """Test that batch results come back in order with per-item errors."""
+    mocker.patch('app.services.data_service.supabase', FakeSupabaseClient({CAMPAIGN_VIEW_NAME: CAMPAIGN_ROWS}))
+    queries = [
+        {"source": "influencer_analytics", "view": "summary", "filters": {"year": 2025}},
+        {"source": "influencer_analytics", "view": "bogus", "filters": {"year": 2025}},
+        {"source": "dashboard", "format": "ndjson"}
+    ]
+    single = test_client.post('/api/influencer/query', data=json.dumps(queries[0]), content_type='application/json').json
+
+    response = test_client.post('/api/influencer/query/batch', data=json.dumps({"queries": queries}), content_type='application/json')
+
+    assert response.status_code == 200
+    results = response.json['results']
+    assert results[0] == {"status": "ok", "result": single}
+    assert results[1] == {"status": "error", "error": "Invalid view 'bogus'."}
+    assert results[2]['status'] == 'error' and "format" in results[2]['error']
+
+def test_batch_sub_queries_share_the_response_cache(test_client, mocker):
+    """Test that batch sub-queries are served from, and fill, the single query endpoint's cache."""
+    mock_data = {"source": "influencer_summary", "count": 1, "items": [{"influencer_name": "Test Influencer"}]}
+    service = mocker.patch('app.services.data_service.get_batch_data', return_value=[mock_data])
+    cached = {"source": "influencer_analytics", "view": "summary", "filters": {"year": 2025}}
+    fresh = {"source": "influencer_analytics", "view": "summary", "filters": {"year": 2024}}
+    mocker.patch('app.services.data_service.get_analytics_data', return_value=mock_data)
+    test_client.post('/api/influencer/query', data=json.dumps(cached), content_type='application/json')
+
+    response = test_client.post('/api/influencer/query/batch', data=json.dumps({"queries": [cached, fresh]}), content_type='application/json')
+    single = test_client.post('/api/influencer/query', data=json.dumps(fresh), content_type='application/json')
+
+    assert response.json == {"count": 2, "results": [{"status": "ok", "result": mock_data}] * 2}
+    service.assert_called_once_with([fresh])
+    assert single.json == mock_data
+    assert test_client.get('/api/cache/stats').json['hits'] == 2
+
+def test_handle_influencer_batch_query_requires_queries(test_client):
+    """Test batch request validation."""
+    response = test_client.post('/api/influencer/query/batch', data=json.dumps({"queries": []}), content_type='application/json')
+
+    assert response.status_code == 400
+
+def test_timing_header_and_metrics_endpoint(test_client, mocker):
+    """Test that timed requests report their stages in Server-Timing and in /metrics."""
+    mocker.patch('app.services.data_service.supabase', FakeSupabaseClient({CAMPAIGN_VIEW_NAME: CAMPAIGN_ROWS}))
+    mocker.patch('app.routes.TIMING_ENABLED', True)
+    mocker.patch('app.services.timing_service.metrics', timing_service.MetricsRegistry())
+
+    payload = {"source": "influencer_analytics", "view": "summary", "filters": {"year": 2025}}
+    response = test_client.post('/api/influencer/query', data=json.dumps(payload), content_type='application/json')
+    spans = dict(metric.split(';dur=') for metric in response.headers['Server-Timing'].split(', '))
+
+    assert {"fetch", "coerce", "convert", "aggregate", "serialize", "total"} <= set(spans)
+    assert sum(float(ms) for name, ms in spans.items() if name != "total") <= float(spans["total"])
+
+    metrics = test_client.get('/metrics')
+    assert metrics.content_type.startswith('text/plain; version=0.0.4')
+    assert 'lyra_request_duration_seconds_count{source="influencer_analytics",view="summary"} 1' in metrics.get_data(as_text=True)
+    assert 'lyra_rows_total{stage="fetched",source="influencer_analytics",view="summary"} 3' in metrics.get_data(as_text=True)
+
+def test_no_timing_header_when_disabled(test_client, mocker):
+    """Test that untimed requests carry no Server-Timing header."""
+    mocker.patch('app.services.data_service.supabase', FakeSupabaseClient({CAMPAIGN_VIEW_NAME: CAMPAIGN_ROWS}))
+    payload = {"source": "influencer_analytics", "view": "summary"}
+
+    assert 'Server-Timing' not in test_client.post('/api/influencer/query', data=json.dumps(payload), content_type='application/json').headers
+
+def test_identical_concurrent_queries_are_coalesced(test_client, mocker):
+    """Test that concurrent identical queries run the service once and all receive its answer."""
+    flights = SingleFlight(timeout_seconds=5)
+    mocker.patch('app.routes.query_flights', flights)
+    mocker.patch('app.routes.RESPONSE_CACHE_ENABLED', False)
+    release = threading.Event()
+    def slow_answer(payload):
+        release.wait(5)
+        return {"source": "influencer_summary", "count": 1, "items": [{"influencer_name": "A"}]}
+    service = mocker.patch('app.services.data_service.get_analytics_data', side_effect=slow_answer)
+
+    def watch():
+        while flights.stats()["coalesced"] < 3:
+            threading.Event().wait(0.001)
+        release.set()
+    threading.Thread(target=watch, daemon=True).start()
+    # Equivalent payloads share a canonical key
+    payloads = [{"source": "influencer_analytics", "filters": {"market": "All"}}] * 2 + [{"source": "influencer_analytics", "view": "summary"}] * 2
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        responses = list(executor.map(lambda p: test_client.application.test_client().post('/api/influencer/query', data=json.dumps(p), content_type='application/json'), payloads))
+
+    assert service.call_count == 1
+    assert all(response.status_code == 200 and response.json['count'] == 1 for response in responses)
+    assert test_client.get('/api/coalesce/stats').json['coalesced'] == 3
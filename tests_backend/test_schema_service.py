@@ -0,0 +1,54 @@
+# ================================================
+# FILE: tests_backend/test_schema_service.py
+# PURPOSE: Tests for the typed DataFrame loader
+# ================================================
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from app.config import CAMPAIGN_VIEW_NAME
+from app.services import processing_service, schema_service
+
+def _campaign_rows(n: int, seed: int = 3) -> list:
+    rng = np.random.default_rng(seed)
+    names = [f'influencer_{i}' for i in range(40)]
+    return [{
+        'influencer_name': str(rng.choice(names)), 'year': int(rng.choice([2024, 2025])),
+        'market': str(rng.choice(['Sweden', 'Norway', 'UK'])), 'month': str(rng.choice(['Jan', 'Feb', 'Mar', 'Oct'])),
+        'wk_clean': int(rng.integers(1, 53)), 'currency': str(rng.choice(['SEK', 'NOK', 'GBP'])),
+        'total_budget_clean': float(rng.integers(0, 9000)), 'actual_conversions_clean': int(rng.integers(0, 120)),
+        'views_clean': int(rng.integers(0, 50000)), 'views': 0, 'clicks_clean': int(rng.integers(0, 900)), 'clicks': 0,
+        'ctr_clean': float(rng.random()), 'cvr_clean': float(rng.random()),
+        'asset': None if rng.random() < 0.2 else str(rng.choice(['Reel', 'Story'])),
+        'live_date_clean': f'2025-0{int(rng.integers(1, 4))}-1{int(rng.integers(0, 9))}'
+    } for _ in range(n)]
+
+@pytest.mark.parametrize("payload", [
+    {"view": "summary", "sort": {"by": "total_conversions"}},
+    {"view": "discovery_tiers"},
+    {"view": "monthly_breakdown"},
+    {"view": "custom_range_breakdown", "filters": {"date_from": "2025-01-01", "date_to": "2025-02-28"}},
+    {"view": "weekly_breakdown_by_number", "filters": {"week_number": 5}},
+    {"view": "summary", "filters": {"influencer_name": "influencer_1"}}
+])
+def test_typed_frame_gives_identical_results(payload):
+    """Test that processors produce the same JSON from typed frames as from untyped ones."""
+    rows = _campaign_rows(600)
+    pages = [schema_service.build_frame(rows[i:i + 250], CAMPAIGN_VIEW_NAME) for i in range(0, len(rows), 250)]
+    typed = schema_service.concat_frames(pages)
+
+    assert typed['influencer_name'].dtype == 'category'
+    assert typed['actual_conversions_clean'].dtype == 'int8'
+    result = processing_service.route_analytics_processing(typed, payload)
+    expected = processing_service.route_analytics_processing(pd.DataFrame(rows), payload)
+    assert json.dumps(result, default=str) == json.dumps(expected, default=str)
+
+def test_memory_report_shows_smaller_typed_footprint():
+    """Test the before/after memory report for a typed frame."""
+    typed = schema_service.build_frame(_campaign_rows(2000), CAMPAIGN_VIEW_NAME)
+
+    report = schema_service.memory_report(typed)
+
+    assert report["rows"] == 2000
+    assert report["typed_bytes"] < report["untyped_bytes"]
+    assert report["columns"]["market"]["dtype"] == "category"
@@ -0,0 +1,97 @@
+# ================================================
+# FILE: tests_backend/test_search_service.py
+# PURPOSE: Tests for the influencer name index and its use in profile lookups
+# ================================================
+import random
+import pytest
+from app.config import CAMPAIGN_VIEW_NAME
+from app.services import data_service, search_service, snapshot_service
+from .fakes import FakeSupabaseClient, CAMPAIGN_ROWS
+
+NAMES = ['Anna Berg', 'anna berg', 'Annika Ström', 'Bo Lind', 'Cleo Dahl', 'Johanna Lindqvist', 'Zoë Hansen']
+
+def test_normalize_name():
+    """Test case folding, accent stripping and whitespace collapsing."""
+    assert search_service.normalize_name('  Zoë   HANSEN ') == 'zoe hansen'
+
+def test_search_ranks_exact_prefix_substring_and_fuzzy_matches():
+    """Test the typeahead ranking of match kinds."""
+    index = search_service.NameIndex(NAMES)
+
+    assert [(m['influencer_name'], m['match']) for m in index.search('anna berg')][:2] == [('Anna Berg', 'exact'), ('anna berg', 'exact')]
+    assert {m['influencer_name']: m['match'] for m in index.search('lind')} == {'Bo Lind': 'prefix', 'Johanna Lindqvist': 'prefix'}
+    assert index.search('nna')[0] == {'influencer_name': 'Anna Berg', 'match': 'substring', 'score': 1.0}
+    assert index.search('cleo dal')[0]['influencer_name'] == 'Cleo Dahl'
+    assert index.search('zoe')[0] == {'influencer_name': 'Zoë Hansen', 'match': 'prefix', 'score': 1.0}
+    assert len(index.search('a', limit=3)) == 3
+
+def test_resolve_matches_ilike_substring_semantics():
+    """Test that resolving a partial name finds exactly the names a case-insensitive substring filter would."""
+    rng = random.Random(3)
+    names = [' '.join(''.join(rng.choice('abcde ') for _ in range(rng.randint(3, 12))).split()) or 'x' for _ in range(500)]
+    index = search_service.NameIndex(names)
+
+    for query in ['ab', 'abc', 'c d', 'eee', 'a', 'DEAD']:
+        assert index.resolve(query) == sorted({name for name in names if query.lower() in name.lower()})
+
+def test_resolve_ignores_fuzzy_matches_and_caps_results():
+    """Test that a misspelled name resolves to nothing, and that too many matches resolve to None."""
+    index = search_service.NameIndex(NAMES)
+
+    assert index.resolve('Anna Brg') == []
+    assert index.search('Anna Brg')[0]['influencer_name'] in ('Anna Berg', 'anna berg')
+    assert index.resolve('an', limit=2) is None
+    assert index.resolve('berg', limit=2) == ['Anna Berg', 'anna berg']
+
+def test_resolve_only_folds_case():
+    """Test that resolving matches case-insensitively like ilike, while search() also ignores accents and spacing."""
+    index = search_service.NameIndex(NAMES)
+
+    assert index.resolve('ZOË') == ['Zoë Hansen']
+    assert index.resolve('zoe') == []
+    assert index.resolve('anna  berg') == []
+    assert index.search('zoe')[0]['influencer_name'] == 'Zoë Hansen'
+
+@pytest.fixture
+def fake_client(mocker):
+    client = FakeSupabaseClient({CAMPAIGN_VIEW_NAME: CAMPAIGN_ROWS})
+    mocker.patch.object(data_service, 'supabase', client)
+    mocker.patch.object(data_service, 'influencer_names_snapshot', snapshot_service.ViewSnapshot(CAMPAIGN_VIEW_NAME, lambda: data_service.fetch_view_frame(CAMPAIGN_VIEW_NAME, columns=['influencer_name'])))
+    return client
+
+@pytest.mark.parametrize("name", ["anna", " Anna Berg ", "cleo", "nobody", "Anna Brg"])
+def test_profile_lookup_uses_exact_names(fake_client, mocker, name):
+    """Test that profiles fetched through the index match the ilike path and filter on exact names."""
+    payload = {"filters": {"influencer_name": name}}
+    mocker.patch.object(data_service, 'NAME_INDEX_ENABLED', False)
+    expected = data_service.get_analytics_data(payload)
+    mocker.patch.object(data_service, 'NAME_INDEX_ENABLED', True)
+    fake_client.executed.clear()
+
+    assert data_service.get_analytics_data(payload) == expected
+    if expected.get("campaigns"):
+        assert fake_client.executed[-1].columns == '*' and len(fake_client.executed) == 2
+
+def test_profile_lookup_keeps_ilike_above_resolve_cap(fake_client, mocker):
+    """Test that a query matching more names than the cap is filtered with ilike instead of an IN list."""
+    mocker.patch.object(data_service, 'NAME_INDEX_ENABLED', True)
+    mocker.patch.object(data_service, 'NAME_INDEX_MAX_RESOLVED', 1)
+
+    data_service.get_analytics_data({"filters": {"influencer_name": "anna"}})
+
+    assert ('ilike', 'influencer_name', '%anna%') in fake_client.executed[-1].filters
+
+def test_influencer_names_are_loaded_distinct(fake_client):
+    """Test that the names loaded for the index hold each name once."""
+    fake_client.tables[CAMPAIGN_VIEW_NAME] = CAMPAIGN_ROWS * 3
+
+    names = data_service._fetch_influencer_names()
+
+    assert sorted(names['influencer_name'].astype(object)) == sorted({row['influencer_name'] for row in CAMPAIGN_ROWS})
+
+def test_name_search_view(fake_client):
+    """Test the typeahead view."""
+    result = data_service.get_analytics_data({"source": "influencer_analytics", "view": "name_search", "query": "ann", "limit": 5})
+
+    assert result["source"] == "name_search"
+    assert [m["influencer_name"] for m in result["matches"]] == ['Anna Berg', 'anna berg']
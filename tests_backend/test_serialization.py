@@ -0,0 +1,75 @@
+# ================================================
+# FILE: tests_backend/test_serialization.py
+# PURPOSE: Tests for the fast JSON response encoding
+# ================================================
+import json
+import numpy as np
+import pandas as pd
+from app import serialization
+
+FRAME = pd.DataFrame({
+    'influencer_name': pd.Series(['A', 'B', None]).astype('category'),
+    'conversions': np.array([3, 0, 7], dtype='int8'),
+    'cac_local': [1.5, float('nan'), float('inf')],
+    'live_date': ['2025-01-08', None, '2025-02-03']
+})
+
+def test_frame_to_records_matches_to_dict():
+    """Test the column-wise record builder against pandas' own conversion."""
+    assert json.dumps(serialization.frame_to_records(FRAME)) == json.dumps(FRAME.to_dict(orient='records'))
+
+def test_columnar_and_records_encode_nan_and_inf_as_null():
+    """Test both layouts decode to the same values, with non-finite floats as null."""
+    records = json.loads(serialization.dumps({"items": serialization.frame_output(FRAME, "records")}))["items"]
+    columns = json.loads(serialization.dumps({"items": serialization.frame_output(FRAME, "columnar")}))["items"]
+
+    assert records[1] == {'influencer_name': 'B', 'conversions': 0, 'cac_local': None, 'live_date': None}
+    assert records[2]['influencer_name'] is None and records[2]['cac_local'] is None
+    assert columns == {col: [row[col] for row in records] for col in FRAME.columns}
+
+def test_dumps_without_orjson_falls_back_to_standard_library(mocker):
+    """Test the fallback encoder produces the same document."""
+    payload = {"items": serialization.frame_output(FRAME, "columnar"), "total": np.float64(2.5)}
+    expected = json.loads(serialization.dumps(payload))
+
+    mocker.patch.object(serialization, 'orjson', None)
+
+    assert json.loads(serialization.dumps(payload)) == expected
+
+def test_missing_datetimes_encode_as_null(mocker):
+    """Test NaT is written as null, not the string "NaT", in both layouts and by the fallback encoder."""
+    frame = pd.DataFrame({'live_date': pd.to_datetime(['2025-01-08', None])})
+    payload = {"records": serialization.frame_output(frame, "records"), "columnar": serialization.frame_output(frame, "columnar")}
+    expected = {"records": [{'live_date': '2025-01-08T00:00:00'}, {'live_date': None}], "columnar": {'live_date': ['2025-01-08T00:00:00', None]}}
+
+    assert json.loads(serialization.dumps(payload)) == expected
+    mocker.patch.object(serialization, 'orjson', None)
+    assert json.loads(serialization.dumps(payload)) == expected
+
+def test_ndjson_lines_stream_summary_then_rows_in_chunks():
+    """Test the NDJSON stream layout: a summary line, then each row set chunk by chunk."""
+    result = {"source": "influencer_detail", "total": 3, "campaigns": serialization.frame_output(FRAME, "ndjson")}
+    chunks = list(serialization.ndjson_lines(result, chunk_rows=2))
+    lines = [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+    assert len(chunks) == 4
+    assert lines[0] == {"type": "summary", "source": "influencer_detail", "total": 3, "sections": {"campaigns": 3}}
+    assert lines[1] == {"type": "section", "name": "campaigns", "count": 3}
+    assert lines[2:] == json.loads(serialization.dumps(serialization.frame_output(FRAME, "records")))
+
+def test_ndjson_lines_stream_nested_row_sets():
+    """Test that row sets nested in lists and dicts are streamed as sections named by their path."""
+    result = {"source": "monthly_breakdown", "monthly_data": [
+        {"month": "Jan", "summary": {"total": 1}, "details": serialization.frame_output(FRAME, "ndjson")},
+        {"month": "Feb", "summary": {"total": 2}, "details": serialization.frame_output(FRAME.iloc[:1], "ndjson")}
+    ]}
+    lines = [json.loads(line) for line in b"".join(serialization.ndjson_lines(result, chunk_rows=2)).splitlines()]
+    records = json.loads(serialization.dumps(serialization.frame_output(FRAME, "records")))
+
+    assert lines[0] == {"type": "summary", "source": "monthly_breakdown",
+                        "monthly_data": [{"month": "Jan", "summary": {"total": 1}}, {"month": "Feb", "summary": {"total": 2}}],
+                        "sections": {"monthly_data.0.details": 3, "monthly_data.1.details": 1}}
+    assert lines[1] == {"type": "section", "name": "monthly_data.0.details", "count": 3}
+    assert lines[2:5] == records
+    assert lines[5] == {"type": "section", "name": "monthly_data.1.details", "count": 1}
+    assert lines[6:] == records[:1]
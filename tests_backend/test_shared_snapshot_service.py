@@ -0,0 +1,81 @@
+# ================================================
+# FILE: tests_backend/test_shared_snapshot_service.py
+# PURPOSE: Tests for memory-mapped Arrow snapshot files shared across workers
+# ================================================
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from app.config import CAMPAIGN_VIEW_NAME
+from app.services import data_service, schema_service, shared_snapshot_service, snapshot_service
+from .fakes import FakeSupabaseClient, CAMPAIGN_ROWS
+
+pytest.importorskip("pyarrow")
+
+def _campaign_frame():
+    return schema_service.build_frame(CAMPAIGN_ROWS, CAMPAIGN_VIEW_NAME)
+
+def test_round_trip_keeps_types_and_maps_numbers(tmp_path):
+    """Test that a typed frame maps back equal, with numeric columns read-only views of the file."""
+    frame = _campaign_frame()
+    frame.loc[1, 'total_budget_clean'] = np.nan
+    path = str(tmp_path / 'campaigns.arrow')
+    shared_snapshot_service.write_frame(path, frame)
+
+    mapped = shared_snapshot_service.map_frame(path)
+
+    pd.testing.assert_frame_equal(mapped, frame)
+    assert not mapped['total_budget_clean'].to_numpy().flags.writeable
+    assert list(tmp_path.iterdir()) == [tmp_path / 'campaigns.arrow']
+
+def test_workers_reuse_a_fresh_file_and_refresh_a_stale_one(tmp_path):
+    """Test that a second worker maps the first one's file instead of fetching, until it ages out."""
+    fetches, now = [], [time.time()]
+    def fetch():
+        fetches.append(1)
+        return _campaign_frame()
+    first = shared_snapshot_service.SharedSnapshotFile(CAMPAIGN_VIEW_NAME, str(tmp_path), max_age_seconds=60, clock=lambda: now[0])
+    second = shared_snapshot_service.SharedSnapshotFile(CAMPAIGN_VIEW_NAME, str(tmp_path), max_age_seconds=60, clock=lambda: now[0])
+
+    first.load(fetch)
+    assert len(second.load(fetch)) == len(CAMPAIGN_ROWS)
+    assert len(fetches) == 1
+
+    second.request_refresh()
+    second.load(fetch)
+    assert len(fetches) == 2
+
+    now[0] += 61
+    first.load(fetch)
+    assert len(fetches) == 3
+
+def test_concurrent_refreshes_fetch_once(tmp_path):
+    """Test that workers refreshing at the same time wait on the lock for a single fetch."""
+    fetches = []
+    def slow_fetch():
+        fetches.append(1)
+        time.sleep(0.05)
+        return _campaign_frame()
+    files = [shared_snapshot_service.SharedSnapshotFile(CAMPAIGN_VIEW_NAME, str(tmp_path), max_age_seconds=60) for _ in range(4)]
+    threads = [threading.Thread(target=shared.load, args=(slow_fetch,)) for shared in files]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fetches) == 1
+
+def test_snapshot_mode_on_shared_files_matches_remote(tmp_path, mocker):
+    """Test that queries answered from a mapped snapshot equal Supabase-side filtering."""
+    mocker.patch.object(data_service, 'supabase', FakeSupabaseClient({CAMPAIGN_VIEW_NAME: CAMPAIGN_ROWS}))
+    mocker.patch.object(data_service, 'shared_snapshot_files', {CAMPAIGN_VIEW_NAME: shared_snapshot_service.SharedSnapshotFile(CAMPAIGN_VIEW_NAME, str(tmp_path))})
+    snapshot = snapshot_service.ViewSnapshot(CAMPAIGN_VIEW_NAME, data_service._snapshot_loader(CAMPAIGN_VIEW_NAME, data_service.campaign_sync))
+    mocker.patch.object(data_service, 'campaign_snapshot', snapshot)
+    payload = {"view": "summary", "filters": {"market": "Sweden"}}
+
+    remote = data_service.get_analytics_data(payload)
+    mocker.patch.object(data_service, 'SNAPSHOT_MODE', True)
+
+    assert data_service.get_analytics_data(payload) == remote
+    assert (tmp_path / f"{CAMPAIGN_VIEW_NAME}.arrow").exists()
@@ -0,0 +1,91 @@
+# ================================================
+# FILE: tests_backend/test_sync_service.py
+# PURPOSE: Tests for high-watermark delta syncs against a local Supabase stand-in
+# ================================================
+import pytest
+from app.config import CAMPAIGN_VIEW_NAME
+from app.services import data_service, rollup_service, schema_service, snapshot_service, sync_service
+from .fakes import FakeSupabaseClient, FakeClock, CAMPAIGN_ROWS
+
+def _rows():
+    return [dict(row, id=i + 1, updated_at=f'2025-03-0{i + 1}T00:00:00') for i, row in enumerate(CAMPAIGN_ROWS)]
+
+@pytest.fixture
+def synced(mocker):
+    """A delta sync of the campaign view backed by a fake client and a manual clock."""
+    client = FakeSupabaseClient({CAMPAIGN_VIEW_NAME: _rows()})
+    mocker.patch.object(data_service, 'supabase', client)
+    clock = FakeClock()
+    sync = sync_service.DeltaSync(CAMPAIGN_VIEW_NAME, lambda clauses: data_service.fetch_view_frame(CAMPAIGN_VIEW_NAME, clauses),
+                                  watermark_column='updated_at', key_columns=['id'], reconcile_seconds=3600, clock=clock)
+    return client, clock, sync
+
+def _expected(rows):
+    return schema_service.build_frame(rows, CAMPAIGN_VIEW_NAME)
+
+def test_delta_sync_merges_changed_rows_in_place(synced):
+    """Test that only rows at or past the watermark are pulled and merged by key."""
+    client, clock, sync = synced
+    sync.sync()
+    table = client.tables[CAMPAIGN_VIEW_NAME]
+    table[1] = dict(table[1], total_budget_clean=9999, updated_at='2025-03-10T00:00:00')
+    table.append(dict(CAMPAIGN_ROWS[0], id=5, influencer_name='Dag Ek', updated_at='2025-03-11T00:00:00'))
+    client.executed.clear()
+
+    frame = sync.sync()
+
+    assert [query.predicates != [] for query in client.executed] == [True]
+    # The row at the previous watermark is pulled again alongside the changed and new rows
+    assert sync.metrics['last_sync'] == 'delta' and sync.metrics['last_rows_pulled'] == 3
+    assert frame[['id', 'influencer_name', 'total_budget_clean']].astype(object).values.tolist() == \
+        _expected(table)[['id', 'influencer_name', 'total_budget_clean']].astype(object).values.tolist()
+    assert sync.watermark == '2025-03-11T00:00:00'
+
+def test_delta_sync_reconciles_deletes_periodically(synced):
+    """Test that deletes are only picked up by the periodic full reload."""
+    client, clock, sync = synced
+    sync.sync()
+    del client.tables[CAMPAIGN_VIEW_NAME][0]
+
+    assert len(sync.sync()) == len(CAMPAIGN_ROWS)
+    clock.now = 3600
+    assert len(sync.sync()) == len(CAMPAIGN_ROWS) - 1
+    assert sync.metrics['full_syncs'] == 2 and sync.metrics['delta_syncs'] == 1
+    assert sync.metrics['rows_pulled_total'] == len(CAMPAIGN_ROWS) + 1 + len(CAMPAIGN_ROWS) - 1
+    assert sync.metrics['duration_seconds_total'] >= sync.metrics['last_duration_seconds'] > 0
+
+def test_delta_sync_keeps_snapshot_rollups_current(synced, mocker):
+    """Test that a snapshot refreshed by delta sync updates its rollups without a rebuild."""
+    client, clock, sync = synced
+    snapshot = snapshot_service.ViewSnapshot(CAMPAIGN_VIEW_NAME, sync.sync, ttl_seconds=60, clock=clock)
+    rollups = rollup_service.RollupStore()
+    sync.on_merge(lambda previous, replaced, changed, positions, merged: rollups.replace_rows(replaced, changed, merged, positions))
+    mocker.patch.multiple(data_service, campaign_snapshot=snapshot, campaign_rollups=rollups, SNAPSHOT_MODE=True, ROLLUP_MODE=True)
+    payload = {"view": "summary", "filters": {}}
+    data_service.get_analytics_data(payload)
+
+    table = client.tables[CAMPAIGN_VIEW_NAME]
+    table[2] = dict(table[2], actual_conversions_clean=17, updated_at='2025-03-10T00:00:00')
+    clock.now = 60
+    rebuild = mocker.spy(rollups, 'rebuild')
+    from_rollups = data_service.get_analytics_data(payload)
+    mocker.patch.object(data_service, 'ROLLUP_MODE', False)
+
+    assert rebuild.call_count == 0
+    assert from_rollups == data_service.get_analytics_data(payload)
+
+def test_delta_sync_continues_from_an_adopted_frame(synced):
+    """Test that a sync adopting a newer frame, as mapped from a shared file, pulls deltas from its watermark."""
+    client, clock, sync = synced
+    sync.sync()
+    table = client.tables[CAMPAIGN_VIEW_NAME]
+    table[0] = dict(table[0], total_budget_clean=1, updated_at='2025-03-20T00:00:00')
+    newer = _expected(table)
+
+    sync.adopt(newer)
+    client.executed.clear()
+    frame = sync.sync()
+
+    assert sync.watermark == '2025-03-20T00:00:00'
+    assert sync.metrics['last_sync'] == 'delta' and sync.metrics['last_rows_pulled'] == 1
+    assert frame['total_budget_clean'].tolist() == newer['total_budget_clean'].tolist()
@@ -0,0 +1,51 @@
+# ================================================
+# FILE: tests_backend/test_timing_service.py
+# PURPOSE: Tests for request timing spans and the Prometheus metrics registry
+# ================================================
+from app.services import timing_service
+from .fakes import FakeClock
+
+def test_nested_spans_record_exclusive_time():
+    """Test that a span excludes the time of spans nested in it and repeated spans accumulate."""
+    clock = FakeClock()
+    timings = timing_service.RequestTimings("influencer_analytics", "summary", clock=clock)
+    with timing_service._Span(timings, "aggregate"):
+        clock.now = 1.0
+        with timing_service._Span(timings, "convert"):
+            clock.now = 1.5
+        with timing_service._Span(timings, "convert"):
+            clock.now = 2.0
+        clock.now = 3.0
+    clock.now = 3.25
+
+    assert timings.durations == {"aggregate": 2.0, "convert": 1.0}
+    assert timings.server_timing(timings.total()) == "convert;dur=1000.00, aggregate;dur=2000.00, total;dur=3250.00"
+
+def test_spans_are_no_ops_outside_timed_requests():
+    """Test that spans and row counts do nothing until a request begins, and stop after it ends."""
+    assert timing_service.span("fetch") is timing_service._NO_SPAN
+    timing_service.add_rows("fetched", 5)
+
+    timings = timing_service.begin("dashboard", "dashboard")
+    with timing_service.span("fetch"):
+        timing_service.add_rows("fetched", 5)
+    assert timing_service.end() is timings
+    assert set(timings.durations) == {"fetch"} and timings.rows == {"fetched": 5}
+    assert timing_service.span("fetch") is timing_service._NO_SPAN
+
+def test_metrics_render_prometheus_histograms():
+    """Test cumulative buckets, sums, counts and row counters in the exposition format."""
+    registry = timing_service.MetricsRegistry()
+    for seconds in (0.003, 0.2):
+        timings = timing_service.RequestTimings("dashboard", "dashboard")
+        timings.durations = {"fetch": seconds}
+        timings.rows = {"fetched": 10}
+        registry.observe(timings, seconds)
+    lines = registry.render().splitlines()
+
+    assert '# TYPE lyra_span_duration_seconds histogram' in lines
+    assert 'lyra_span_duration_seconds_bucket{span="fetch",source="dashboard",view="dashboard",le="0.005"} 1' in lines
+    assert 'lyra_span_duration_seconds_bucket{span="fetch",source="dashboard",view="dashboard",le="0.25"} 2' in lines
+    assert 'lyra_span_duration_seconds_bucket{span="fetch",source="dashboard",view="dashboard",le="+Inf"} 2' in lines
+    assert 'lyra_request_duration_seconds_count{source="dashboard",view="dashboard"} 2' in lines
+    assert 'lyra_rows_total{stage="fetched",source="dashboard",view="dashboard"} 20' in lines
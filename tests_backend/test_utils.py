@@ -0,0 +1,27 @@
+# ================================================
+# FILE: tests_backend/test_utils.py
+# PURPOSE: Tests for the shared helper functions
+# ================================================
+import pandas as pd
+from app import utils
+
+def test_convert_series_to_eur_matches_scalar_conversion():
+    """Test that the vectorized conversion agrees with convert_to_eur row by row."""
+    amounts = pd.Series([85, 1130, 1150, 746, 50, 200, 10])
+    currencies = pd.Series(['GBP', 'sek', 'NOK', 'DKK', 'EUR', 'XYZ', None])
+
+    result = utils.convert_series_to_eur(amounts, currencies)
+
+    expected = [utils.convert_to_eur(a, c) for a, c in zip(amounts, currencies)]
+    assert result.tolist() == expected
+
+def test_convert_series_to_eur_zero_rate_and_missing_amount(mocker):
+    """Test zero-rate currencies and missing amounts convert to 0.0."""
+    mocker.patch.dict(utils.HARDCODED_RATES, {"ZZZ": 0})
+    amounts = pd.Series([100, None, 50], dtype='object')
+    currencies = pd.Series(['ZZZ', 'EUR', 'EUR'])
+
+    result = utils.convert_series_to_eur(amounts, currencies)
+
+    assert result.tolist() == [0.0, 0.0, 50.0]
+    assert utils.convert_to_eur(100, 'ZZZ') == 0.0
@@ -0,0 +1,9 @@
+# ================================================
+# FILE: wsgi.py
+# PURPOSE: WSGI entry point for production servers (gunicorn -c gunicorn.conf.py)
+# ================================================
+from app import create_app
+
+# Warm-up runs in each worker after the fork (see gunicorn.conf.py), never in the master:
+# a Supabase client created before forking would share its connections between workers
+app = create_app(warm=False)